@@ -0,0 +1,229 @@
+"""
+Récupérateur automatique de données de consommation Enedis
+Version automatique sans interactions manuelles - VERSION SÉCURISÉE
+
+Les sous-modules sont importés à la première utilisation d'un de leurs noms : importer le paquet,
+afficher l'aide ou calculer un plan de téléchargement ne charge ni Selenium ni requests.
+"""
+
+import importlib
+
+# Sous-module -> noms publics qu'il définit
+_EXPORTS = {
+    "settings": (
+        "BASE_URL",
+        "LOOPBACK_HOSTS",
+        "LOG_FILE",
+        "DOWNLOAD_DIR",
+        "MANIFEST_FILE",
+        "RUN_JOURNAL_FILE",
+        "PERIOD_RETRIES",
+        "RETRY_BACKOFF",
+        "BACKFILL_DB_FILE",
+        "BACKFILL_REQUESTS_PER_HOUR",
+        "BACKFILL_MAX_ATTEMPTS",
+        "PORTAL_TIMEZONE",
+        "EXPORT_TIME_COLUMNS",
+        "EXPORT_VALUE_COLUMNS",
+        "DATA_PUBLICATION_DELAY",
+        "PUBLICATION_WINDOW",
+        "POLL_BACKOFF",
+        "POLL_BACKOFF_MAX",
+        "SCHEDULE_JITTER",
+        "GRANULARITY_LABELS",
+        "GRANULARITIES",
+        "GRANULARITY_MAX_DAYS",
+        "HOURLY_HISTORY_DAYS",
+        "PARTIAL_DOWNLOAD_SUFFIXES",
+        "DOWNLOAD_TIMEOUT",
+        "DOWNLOAD_POLL_INTERVAL",
+        "WORKER_LOGIN_STAGGER",
+        "ASYNC_ENGINE_OPTIONS",
+        "DRIVER_CACHE_FILE",
+        "CHROME_BINARY",
+        "SHARED_DRIVER_SERVICE",
+        "RESOURCE_BLOCKING_PROFILES",
+        "RESOURCE_BLOCKING_ALLOW_LIST",
+        "RESOURCE_BLOCKING",
+        "CONSENT_POPIN_BUTTONS",
+        "CONSENT_COOKIE",
+        "PAGE_READY_SELECTOR",
+        "PAGE_READY_BUTTON",
+        "DOM_WAIT_SCRIPT_TIMEOUT",
+        "DOM_WAIT_RETRY_INTERVAL",
+        "WAIT_DEFAULTS",
+        "STAGE_STATS_FILE",
+        "ADAPTIVE_ALPHA",
+        "ADAPTIVE_MIN_SAMPLES",
+        "ADAPTIVE_MARGIN",
+        "METRICS_PREFIX",
+        "STAGE_BUCKETS",
+        "MEASURES_API_URL",
+        "PRM",
+        "CAPTURE_URL_PATTERN",
+        "CAPTURE_CONTENT_TYPES",
+        "CAPTURE_POLL_INTERVAL",
+        "CAPTURE_BUFFER_SIZE",
+        "USER_AGENTS",
+        "resolve_credentials",
+        "require_credentials",
+        "is_secure_url",
+        "require_secure_base_url",
+        "configure_logging",
+    ),
+    "utils": (
+        "get_random_user_agent",
+        "mask_sensitive_data",
+        "validate_date_range",
+    ),
+    "metrics": (
+        "StageMetrics",
+        "METRICS",
+        "AdaptiveTimeouts",
+        "WAIT_TIMEOUTS",
+        "adaptive_wait",
+        "stage_timer",
+        "write_metrics_file",
+        "start_metrics_server",
+    ),
+    "planning": (
+        "split_date_range",
+        "granularity_suffix",
+        "period_file_name",
+        "load_manifest",
+        "save_manifest",
+        "mark_period_downloaded",
+        "expected_intervals",
+        "is_day_complete",
+        "is_day_published",
+        "compute_missing_periods",
+        "plan_periods",
+        "new_run_journal",
+        "load_run_journal",
+        "save_run_journal",
+        "clear_run_journal",
+        "journal_plan",
+        "mark_journal_window",
+        "download_with_retries",
+    ),
+    "store": (
+        "is_data_content_type",
+        "extension_for_content_type",
+        "iter_export_points",
+        "granularity_store_dir",
+        "append_points_to_store",
+        "ingest_export",
+    ),
+    "download_watcher": (
+        "list_download_files",
+        "wait_for_download",
+    ),
+    "rpc_profiler": (
+        "RpcProfiler",
+        "enable_rpc_profiler",
+        "profile_driver",
+    ),
+    "driver_service": (
+        "DriverBinaries",
+        "find_chrome_binary",
+        "load_driver_cache",
+        "resolve_driver_binaries",
+        "AttachedChrome",
+        "SharedDriverService",
+        "prepare_driver",
+        "new_chrome_driver",
+    ),
+    "browser": (
+        "blocked_url_patterns",
+        "setup_driver",
+        "WAIT_FOR_DOM_JS",
+        "wait_for_dom",
+        "ElementSnapshot",
+        "snapshot_elements",
+        "find_in_snapshot",
+        "DISMISS_POPINS_JS",
+        "accept_cookies",
+        "login_step1_email",
+        "login_step2_password",
+        "navigate_to_consumption",
+        "switch_to_iframe",
+        "select_granularity",
+        "CALENDAR_BUTTON_JS",
+        "CALENDAR_MONTHS",
+        "click_calendar_button",
+        "click_shown_day",
+        "select_calendar_date",
+        "select_date_range",
+        "click_visualiser",
+        "visualize_and_download",
+        "is_login_required",
+        "open_measures_page",
+        "close_driver",
+        "BrowserSession",
+    ),
+    "capture": (
+        "CapturedResponse",
+        "wait_for_captured_response",
+        "capture_period_data",
+        "archive_captured_response",
+    ),
+    "http_engine": (
+        "capture_session_credentials",
+        "build_http_session",
+        "fetch_period_http",
+        "download_periods_http",
+    ),
+    "download": (
+        "download_periods_ui",
+        "shard_periods",
+        "download_periods_parallel",
+        "store_downloaded_period",
+        "download_consumption_data",
+    ),
+    "backfill": (
+        "BackfillWindow",
+        "BackfillQueue",
+        "run_backfill",
+    ),
+    "async_engine": (
+        "adaptive_wait_async",
+        "wait_for_dom_async",
+        "click_text_async",
+        "accept_cookies_async",
+        "login_step1_email_async",
+        "login_step2_password_async",
+        "navigate_to_consumption_async",
+        "switch_to_iframe_async",
+        "select_granularity_async",
+        "click_calendar_button_async",
+        "select_calendar_date_async",
+        "select_date_range_async",
+        "visualize_and_download_async",
+        "open_measures_page_async",
+        "download_account_async",
+        "run_accounts_async",
+    ),
+    "accounts": (
+        "load_accounts",
+        "new_account_report",
+        "run_account",
+        "run_batch",
+    ),
+    "scheduler": ("PublicationScheduler",),
+    "cli": ("main",),
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULE_OF)
+
+
+def __getattr__(name: str):
+    """Importe à la demande le sous-module qui définit le nom (PEP 562)"""
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
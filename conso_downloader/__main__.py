@@ -0,0 +1,8 @@
+"""
+Point d'entrée de la ligne de commande : python -m conso_downloader
+"""
+
+from .cli import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Mode multi-comptes (--accounts) : un navigateur par compte, pool borné et rapport d'exécution
+"""
+
+import json
+import logging
+import os
+import re
+import stat
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from .browser import BrowserSession
+from .download import download_consumption_data
+from .settings import ASYNC_ENGINE_OPTIONS, DOWNLOAD_DIR, HOURLY_HISTORY_DAYS, WORKER_LOGIN_STAGGER
+from .utils import mask_sensitive_data
+
+logger = logging.getLogger(__name__)
+
+
+def load_accounts(path: str) -> list:
+    """
+    Charge la liste des comptes du mode multi-comptes
+
+    Format JSON : {"accounts": [{"name": "maison", "email": "...", "password_env": "MAISON_PASSWORD",
+    "prms": ["12345678901234"]}]}. Le mot de passe est lu dans la variable d'environnement
+    indiquée par "password_env" (recommandé) ou, à défaut, dans "password".
+
+    Args:
+        path: Fichier JSON des comptes
+
+    Returns:
+        Liste de comptes {"name", "email", "password", "prms"}
+
+    Raises:
+        ValueError: Si le fichier est invalide ou qu'un compte est incomplet
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Fichier de comptes illisible: {type(e).__name__}") from e
+
+    entries = data.get("accounts") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("Aucun compte défini (clé 'accounts' attendue)")
+
+    if any("password" in entry for entry in entries if isinstance(entry, dict)) and sys.platform != "win32":
+        if stat.S_IMODE(os.stat(path).st_mode) & (stat.S_IRWXG | stat.S_IRWXO):
+            logger.warning(f"⚠️ {path} contient des mots de passe et n'est pas en 600 (chmod 600 {path})")
+
+    accounts, names = [], set()
+    for index, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict) or not entry.get("email"):
+            raise ValueError(f"Compte n°{index}: email manquant")
+
+        password = os.getenv(entry["password_env"]) if entry.get("password_env") else entry.get("password")
+        if not password:
+            raise ValueError(f"Compte n°{index}: mot de passe introuvable (password_env ou password)")
+
+        # Nom utilisé comme répertoire de sortie : caractères sûrs uniquement
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", str(entry.get("name") or f"compte-{index}"))
+        if name in names:
+            raise ValueError(f"Compte n°{index}: nom '{name}' déjà utilisé")
+        names.add(name)
+
+        prms = [str(prm) for prm in entry.get("prms", [])]
+        accounts.append({"name": name, "email": entry["email"], "password": password, "prms": prms})
+
+    return accounts
+
+
+def new_account_report(account: dict) -> dict:
+    """Rapport d'un compte du mode multi-comptes, avant exécution"""
+    return {
+        "name": account["name"],
+        "email": mask_sensitive_data(account["email"], "email"),
+        "prms": account["prms"],
+        "success": False,
+        "results": {},
+        "duration": 0.0,
+    }
+
+
+def run_account(
+    account: dict,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    output_dir: str,
+    headless: bool = True,
+    engine: str = "ui",
+    http_workers: int = 4,
+    incremental: bool = False,
+    store_dir: Optional[str] = None,
+    start_delay: float = 0,
+    archive_raw: bool = False,
+    granularity: str = "hours",
+    hourly_days: int = HOURLY_HISTORY_DAYS,
+) -> dict:
+    """
+    Télécharge les données d'un compte du mode multi-comptes (un seul navigateur, une seule connexion)
+
+    Moteur http : un sous-répertoire par PRM. Moteur ui : le portail affiche le PRM par défaut
+    du compte, seul celui-ci est téléchargé.
+
+    Returns:
+        Rapport {"name", "email" (masqué), "prms", "success", "results", "duration"}
+    """
+    time.sleep(start_delay)
+    started = time.monotonic()
+    account_dir = os.path.join(output_dir, account["name"])
+    report = new_account_report(account)
+
+    if engine == "http" and account["prms"]:
+        jobs = [(prm, os.path.join(account_dir, prm)) for prm in account["prms"]]
+    else:
+        if len(account["prms"]) > 1:
+            logger.warning(f"⚠️ {account['name']}: moteur {engine}, seul le PRM affiché par défaut sera téléchargé")
+        jobs = [(account["prms"][0] if account["prms"] else None, account_dir)]
+
+    session = BrowserSession(
+        headless=headless,
+        download_dir=account_dir,
+        email=account["email"],
+        password=account["password"],
+        capture=engine == "capture",
+    )
+    try:
+        for prm, download_dir in jobs:
+            report["results"][prm or "default"] = download_consumption_data(
+                start_date,
+                end_date,
+                headless=headless,
+                incremental=incremental,
+                session=session,
+                engine=engine,
+                http_workers=http_workers,
+                store_dir=os.path.join(store_dir, account["name"], prm or "") if store_dir else None,
+                download_dir=download_dir,
+                email=account["email"],
+                password=account["password"],
+                prm=prm,
+                archive_raw=archive_raw,
+                granularity=granularity,
+                hourly_days=hourly_days,
+            )
+    except Exception as e:
+        logger.error(f"❌ {account['name']}: erreur générale {type(e).__name__}")
+        logger.debug(f"Détails: {str(e)}")
+    finally:
+        session.close()
+
+    report["success"] = bool(report["results"]) and all(report["results"].values())
+    report["duration"] = round(time.monotonic() - started, 1)
+    return report
+
+
+def run_batch(
+    accounts: list,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    output_dir: str = None,
+    max_workers: int = 4,
+    **options,
+) -> bool:
+    """
+    Exécute plusieurs comptes en parallèle avec un pool borné de navigateurs
+
+    Les comptes partagent le même processus Python (imports payés une fois) ;
+    les connexions de la première vague sont décalées pour étaler les captchas.
+    Moteur async : un seul navigateur, un contexte de navigation isolé par compte.
+
+    Args:
+        accounts: Comptes chargés via load_accounts
+        start_date: Date de début (défaut: J-7)
+        end_date: Date de fin (défaut: hier)
+        output_dir: Répertoire racine, un sous-répertoire par compte (défaut: ./downloads)
+        max_workers: Nombre de comptes traités simultanément
+        **options: Options transmises à run_account (headless, engine, incremental...), ou à
+            run_accounts_async pour le moteur async (ASYNC_ENGINE_OPTIONS)
+
+    Returns:
+        bool: True si tous les comptes ont réussi
+    """
+    output_dir = output_dir or DOWNLOAD_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    max_workers = max(1, min(max_workers, len(accounts)))
+    logger.info(f"👥 Mode multi-comptes: {len(accounts)} compte(s), {max_workers} en parallèle")
+
+    if options.get("engine") == "async":
+        import asyncio
+
+        from .async_engine import run_accounts_async
+
+        # Un seul Chrome, un contexte de navigation par compte (max_workers contextes simultanés)
+        async_options = {key: options[key] for key in ASYNC_ENGINE_OPTIONS if key in options}
+        reports = asyncio.run(
+            run_accounts_async(accounts, start_date, end_date, output_dir, max_contexts=max_workers, **async_options)
+        )
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="account") as executor:
+            futures = [
+                executor.submit(
+                    run_account,
+                    account,
+                    start_date,
+                    end_date,
+                    output_dir,
+                    start_delay=min(index, max_workers - 1) * WORKER_LOGIN_STAGGER,
+                    **options,
+                )
+                for index, account in enumerate(accounts)
+            ]
+            reports = [future.result() for future in futures]
+
+    report_path = os.path.join(output_dir, "batch_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({"generated_at": datetime.now().isoformat(timespec="seconds"), "accounts": reports}, f, indent=2)
+    try:
+        os.chmod(report_path, stat.S_IRUSR | stat.S_IWUSR)  # 600
+    except Exception:
+        pass  # Ignorer si impossible (Windows par exemple)
+
+    logger.info("\n" + "=" * 70)
+    logger.info("📊 RÉSUMÉ MULTI-COMPTES")
+    logger.info("=" * 70)
+    for report in reports:
+        logger.info(f"{'✅' if report['success'] else '❌'} {report['name']} ({report['email']}) - {report['duration']:.0f}s")
+    succeeded = sum(1 for report in reports if report["success"])
+    logger.info(f"📄 Rapport: {report_path} - {succeeded}/{len(reports)} compte(s) en succès")
+
+    return succeeded == len(reports)
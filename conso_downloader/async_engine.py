@@ -0,0 +1,494 @@
+"""
+Moteur async (Playwright) : un contexte de navigation isolé par compte dans un seul processus Chrome
+
+Mêmes étapes que le moteur Selenium, en coroutines ; les scripts du moteur Selenium (browser.py)
+sont réutilisés tels quels.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from .accounts import new_account_report
+from .browser import CALENDAR_BUTTON_JS, CALENDAR_MONTHS, DISMISS_POPINS_JS, WAIT_FOR_DOM_JS
+from .download import store_downloaded_period
+from .metrics import METRICS, WAIT_TIMEOUTS
+from .planning import load_manifest, period_file_name, plan_periods
+from .settings import (
+    BASE_URL,
+    CONSENT_COOKIE,
+    CONSENT_POPIN_BUTTONS,
+    DOM_WAIT_RETRY_INTERVAL,
+    GRANULARITY_LABELS,
+    HOURLY_HISTORY_DAYS,
+    PAGE_READY_BUTTON,
+    PAGE_READY_SELECTOR,
+    WORKER_LOGIN_STAGGER,
+)
+from .utils import get_random_user_agent, mask_sensitive_data, validate_date_range
+
+logger = logging.getLogger(__name__)
+
+
+# Clic d'un élément visible par son texte (même recherche que find_in_snapshot du moteur Selenium)
+# arguments: sélecteur CSS, texte, texte exact (bool), cliquer le parent (bool)
+_CLICK_TEXT_JS = """
+const [selector, needle, exact, parent] = arguments;
+const visible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const text = (el) => (el.textContent || "").trim();
+const matches = (el) => exact ? text(el) === needle : text(el).toLowerCase().includes(needle.toLowerCase());
+const target = Array.from(document.querySelectorAll(selector)).find((el) => visible(el) && !el.disabled && matches(el));
+if (!target) return false;
+(parent ? target.parentElement : target).click();
+return true;
+"""
+
+
+def _page_function(script: str, asynchronous: bool = False) -> str:
+    """
+    Adapte un script execute_script / execute_async_script au format evaluate de Playwright
+
+    Les arguments sont passés en liste (lue via `arguments`) ; un script asynchrone reçoit
+    en dernier argument le callback de fin, comme avec execute_async_script.
+    """
+    if asynchronous:
+        return f"(args) => new Promise((resolve) => (function () {{{script}}}).apply(null, [...args, resolve]))"
+    return f"(args) => (function () {{{script}}}).apply(null, args)"
+
+
+async def adaptive_wait_async(name: str, wait: Callable[[float], Awaitable]):
+    """Équivalent asynchrone de adaptive_wait (wait retourne une coroutine)"""
+    started = time.monotonic()
+    result = await wait(WAIT_TIMEOUTS.timeout(name))
+    WAIT_TIMEOUTS.record(name, time.monotonic() - started, bool(result))
+    return result
+
+
+async def wait_for_dom_async(frame, condition: str, *args, timeout: float = 10) -> bool:
+    """
+    Équivalent asynchrone de wait_for_dom sur une page ou une frame Playwright
+
+    Returns:
+        bool: True si la condition est remplie avant le délai
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        try:
+            return bool(
+                await frame.evaluate(
+                    _page_function(WAIT_FOR_DOM_JS, asynchronous=True), [condition, list(args), int(remaining * 1000)]
+                )
+            )
+        except Exception as e:
+            # Contexte d'exécution détruit pendant l'attente (navigation) : relancer sur la nouvelle page
+            logger.debug(f"Attente '{condition}' interrompue: {type(e).__name__}")
+            await asyncio.sleep(DOM_WAIT_RETRY_INTERVAL)
+
+
+async def _wait_or_fallback(name: str, frame, condition: str, *args) -> bool:
+    """Attente adaptative d'une condition DOM, pause de repli si le délai est dépassé"""
+    if await adaptive_wait_async(name, lambda timeout: wait_for_dom_async(frame, condition, *args, timeout=timeout)):
+        return True
+    await asyncio.sleep(WAIT_TIMEOUTS.fallback(name))  # Fallback
+    return False
+
+
+async def click_text_async(frame, selector: str, needle: str, exact: bool = False, parent: bool = False) -> bool:
+    """Clique le premier élément visible et actif dont le texte correspond (une seule évaluation)"""
+    return bool(await frame.evaluate(_page_function(_CLICK_TEXT_JS), [selector, needle, exact, parent]))
+
+
+async def accept_cookies_async(page, button_ids: tuple = CONSENT_POPIN_BUTTONS) -> bool:
+    """Équivalent asynchrone de accept_cookies"""
+    dismissed = await page.evaluate(_page_function(DISMISS_POPINS_JS), [list(button_ids), CONSENT_COOKIE])
+    if dismissed in ("stored", ""):
+        logger.debug("Pas de popup cookies à fermer")
+        return False
+
+    logger.info(f"✅ Popup cookies accepté: {dismissed}")
+    return True
+
+
+async def login_step1_email_async(page, email: str) -> bool:
+    """Première étape de login : saisie de l'email"""
+    try:
+        await page.fill("#idToken1", email, timeout=10000)
+        logger.info(f"✅ Email saisi: {mask_sensitive_data(email, 'email')}")
+
+        logger.info("⏳ Attente résolution captcha...")
+        start_wait = time.time()
+        resolved = await adaptive_wait_async(
+            "captcha", lambda timeout: wait_for_dom_async(page, "enabled", "#idToken3_0", timeout=timeout)
+        )
+        elapsed = time.time() - start_wait
+        METRICS.observe("captcha", elapsed)
+        if resolved:
+            logger.info(f"✅ Captcha résolu en {elapsed:.1f}s")
+        else:
+            logger.warning(f"⚠️ Timeout captcha après {elapsed:.0f}s, tentative quand même")
+            await asyncio.sleep(WAIT_TIMEOUTS.fallback("captcha"))
+
+        await page.evaluate("() => document.getElementById('idToken3_0').click()")
+        logger.info("✅ Formulaire email soumis")
+        await _wait_or_fallback("password_field", page, "present", "#idToken2")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Erreur login étape 1: {e}")
+        return False
+
+
+async def login_step2_password_async(page, password: str) -> bool:
+    """Deuxième étape de login : saisie du mot de passe"""
+    try:
+        await page.fill("#idToken2", password, timeout=10000)
+        logger.info("✅ Mot de passe saisi")
+
+        await page.evaluate("() => document.getElementById('idToken4_0').click()")
+        logger.info("✅ Connexion en cours...")
+        await _wait_or_fallback("post_login", page, "present", "button")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Erreur login étape 2: {e}")
+        return False
+
+
+async def navigate_to_consumption_async(page) -> bool:
+    """Navigue vers la page 'Suivre ma consommation'"""
+    try:
+        await accept_cookies_async(page)
+
+        if await click_text_async(page, "button", "Ma consommation"):
+            logger.info("🔍 Bouton 'Ma consommation' trouvé")
+            await _wait_or_fallback("menu_links", page, "present", "a")
+
+        if await click_text_async(page, "a", "Suivre ma consommation"):
+            logger.info("🔍 Lien 'Suivre ma consommation' trouvé")
+            await _wait_or_fallback("iframe_present", page, "present", "iframe")
+
+        logger.info("✅ Navigation vers page de consommation réussie")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Erreur navigation: {e}")
+        return False
+
+
+async def switch_to_iframe_async(page):
+    """
+    Retourne la frame des mesures (Playwright adresse les frames directement, sans bascule)
+
+    Returns:
+        Frame Playwright, ou None si l'iframe n'est pas trouvée
+    """
+    try:
+        if not await adaptive_wait_async(
+            "iframe",
+            lambda timeout: wait_for_dom_async(page, "iframeSrc", "mes-mesures", "donnees-de-mesures", timeout=timeout),
+        ):
+            logger.warning("⚠️ Iframe des mesures non trouvée (timeout)")
+            return None
+
+        element = await page.query_selector("iframe[src*='mes-mesures'], iframe[src*='donnees-de-mesures']")
+        frame = await element.content_frame() if element else None
+        if frame is None:
+            logger.warning("⚠️ Iframe des mesures non trouvée (après attente)")
+            return None
+
+        logger.info("✅ Iframe des mesures trouvée")
+        await _wait_or_fallback("heures", frame, "visibleText", "span", "Heures")
+        return frame
+
+    except Exception as e:
+        logger.error(f"❌ Erreur basculement iframe: {e}")
+        return None
+
+
+async def select_granularity_async(frame, granularity: str = "hours") -> bool:
+    """Sélectionne le pas de mesure ('Heures', 'Jours' ou 'Mois') dans la frame des mesures"""
+    label_text = GRANULARITY_LABELS[granularity]
+    try:
+        if not await click_text_async(frame, "span", label_text, exact=True, parent=True):
+            logger.warning(f"⚠️ Bouton '{label_text}' non trouvé")
+            return False
+
+        logger.info(f"✅ Mode '{label_text}' sélectionné")
+        await _wait_or_fallback("calendar_button", frame, "present", "button[aria-label='Ouvrir le calendrier']")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Erreur sélection mode {label_text}: {e}")
+        return False
+
+
+async def click_calendar_button_async(frame, kind: str, value: str = "", timeout: float = 2, shown: list = None):
+    """
+    Équivalent asynchrone de click_calendar_button (et de click_shown_day avec shown)
+
+    Returns:
+        True si le bouton a été cliqué ("month" ou "year" pour monthOrYear), "sameYear" ou "elsewhere"
+        si un autre mois de la même année ou d'une autre année est affiché, False sinon
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        clicked = await frame.evaluate(_page_function(CALENDAR_BUTTON_JS), [kind, str(value), True, shown])
+        if clicked or time.monotonic() >= deadline:
+            return clicked
+        await asyncio.sleep(0.1)
+
+
+async def select_calendar_date_async(frame, target_date: datetime, label: str = "date") -> bool:
+    """Sélectionne une date dans le calendrier ouvert, en ne naviguant que les niveaux qui changent"""
+    logger.info(f"   📅 Sélection {label}: {target_date.strftime('%d/%m/%Y')}")
+    target_month = CALENDAR_MONTHS[target_date.month - 1]
+
+    # Mois déjà affiché : le clic du jour suffit
+    shown = [target_month, str(target_date.year)]
+    shown_day = await click_calendar_button_async(frame, "day", target_date.day, timeout=3, shown=shown)
+    if shown_day is True:
+        logger.info(f"   ⏩ Jour sélectionné: {target_date.day} (mois déjà affiché)")
+        return True
+
+    await click_calendar_button_async(frame, "header")
+    level = None
+    if shown_day == "sameYear":
+        # Même année : le mois directement si la vue des mois est affichée
+        level = await click_calendar_button_async(frame, "monthOrYear", f"{target_month}|{target_date.year}")
+    elif not await click_calendar_button_async(frame, "year", target_date.year):
+        logger.warning(f"   ⚠️ Année {target_date.year} non trouvée")
+        return False
+    if level != "month" and not await click_calendar_button_async(frame, "month", target_month):
+        logger.warning(f"   ⚠️ Mois {target_month} non trouvé")
+        return False
+    if not await click_calendar_button_async(frame, "day", target_date.day, timeout=3):
+        logger.warning(f"   ⚠️ Jour {target_date.day} non trouvé")
+        return False
+
+    logger.info(f"   ✅ Date sélectionnée: {target_date.strftime('%d/%m/%Y')}")
+    return True
+
+
+async def select_date_range_async(frame, start_date: datetime, end_date: datetime) -> bool:
+    """Sélectionne la plage de dates via le calendrier"""
+    try:
+        logger.info(f"🎯 Sélection période: {start_date.strftime('%d/%m/%Y')} → {end_date.strftime('%d/%m/%Y')}")
+        if not await click_calendar_button_async(frame, "open", timeout=4):
+            logger.error("❌ Bouton calendrier non trouvé")
+            return False
+
+        return await select_calendar_date_async(frame, start_date, "date début") and await select_calendar_date_async(
+            frame, end_date, "date fin"
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Erreur sélection période: {e}")
+        return False
+
+
+async def _download_on_click(
+    page, frame, download_dir: str, timeout: float, file_name: Optional[Callable[[str], str]] = None
+) -> Optional[str]:
+    """Clique Télécharger et enregistre le fichier reçu par le contexte (None si pas de bouton)"""
+    download_event = asyncio.ensure_future(page.wait_for_event("download", timeout=timeout * 1000))
+    if not await click_text_async(frame, "button", "télécharger"):
+        download_event.cancel()
+        logger.warning("⚠️ Bouton 'Télécharger' non trouvé ou désactivé")
+        return None
+
+    logger.info("✅ Téléchargement lancé")
+    download = await download_event
+    name = download.suggested_filename
+    if file_name:
+        # Nom propre à la période : deux exports au nom identique ne s'écrasent pas avant leur enregistrement
+        name = file_name(os.path.splitext(name)[1].lstrip(".") or "csv")
+    file_path = os.path.join(download_dir, name)
+    await download.save_as(file_path)
+    logger.info(f"✅ Fichier téléchargé: {os.path.basename(file_path)}")
+    return file_path
+
+
+async def visualize_and_download_async(
+    page, frame, download_dir: str, file_name: Optional[Callable[[str], str]] = None
+) -> Optional[str]:
+    """
+    Clique sur Visualiser puis Télécharger ; le fichier est enregistré dans download_dir
+
+    Chaque contexte reçoit ses propres téléchargements : pas de surveillance du répertoire,
+    plusieurs comptes peuvent télécharger en même temps.
+
+    Args:
+        file_name: Nom du fichier selon l'extension reçue (défaut: nom proposé par le portail)
+
+    Returns:
+        Chemin du fichier téléchargé, ou None en cas d'échec
+    """
+    try:
+        if not await click_text_async(frame, "button", "visualiser"):
+            logger.error("❌ Bouton 'Visualiser' non trouvé")
+            return None
+        logger.info("✅ Visualisation lancée")
+        await _wait_or_fallback("download_button", frame, "enabledButton", "télécharger")
+
+        return await adaptive_wait_async(
+            "download", lambda timeout: _download_on_click(page, frame, download_dir, timeout, file_name)
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Erreur visualisation/téléchargement: {e}")
+        return None
+
+
+async def open_measures_page_async(page, email: str, password: str, granularity: str = "hours"):
+    """
+    Équivalent asynchrone de open_measures_page
+
+    Returns:
+        Frame des mesures prête (pas de mesure sélectionné), ou None
+    """
+    await page.goto(BASE_URL)
+    logger.info(f"📍 Page chargée: {BASE_URL}")
+    await _wait_or_fallback("page_ready", page, "pageReady", PAGE_READY_SELECTOR, PAGE_READY_BUTTON)
+    await accept_cookies_async(page)
+
+    if await page.query_selector("#idToken1"):
+        if not await login_step1_email_async(page, email) or not await login_step2_password_async(page, password):
+            return None
+
+    if not await navigate_to_consumption_async(page):
+        return None
+    frame = await switch_to_iframe_async(page)
+    if frame is None or not await select_granularity_async(frame, granularity):
+        return None
+    return frame
+
+
+async def download_account_async(
+    browser,
+    account: dict,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    output_dir: str,
+    incremental: bool = False,
+    store_dir: Optional[str] = None,
+    granularity: str = "hours",
+    hourly_days: int = HOURLY_HISTORY_DAYS,
+) -> dict:
+    """
+    Télécharge les données d'un compte dans un contexte de navigation isolé du navigateur partagé
+
+    Le contexte a ses propres cookies, stockage et téléchargements : les comptes sont connectés
+    indépendamment, sans lancer un Chrome par compte. Seul le PRM affiché par défaut est téléchargé.
+
+    Returns:
+        Rapport {"name", "email" (masqué), "prms", "success", "results", "duration"}, comme run_account
+    """
+    started = time.monotonic()
+    download_dir = os.path.join(output_dir, account["name"])
+    os.makedirs(download_dir, exist_ok=True)
+    report = new_account_report(account)
+    prm = account["prms"][0] if account["prms"] else None
+    if len(account["prms"]) > 1:
+        logger.warning(f"⚠️ {account['name']}: moteur async, seul le PRM affiché par défaut sera téléchargé")
+
+    context = await browser.new_context(accept_downloads=True, user_agent=get_random_user_agent())
+    try:
+        start_date, end_date = validate_date_range(start_date, end_date)
+        manifest = load_manifest(download_dir)
+        plan = plan_periods(manifest, start_date, end_date, granularity, incremental, hourly_days)
+        account_store = os.path.join(store_dir, account["name"], prm or "") if store_dir else None
+
+        page = await context.new_page()
+        frame = await open_measures_page_async(page, account["email"], account["password"], plan[0][0]) if plan else None
+        success = frame is not None or not plan
+        selected = plan[0][0] if plan else None
+        for step, periods in plan if success else []:
+            if step != selected:
+                if not await select_granularity_async(frame, step):
+                    success = False
+                    break
+                selected = step
+            for period_start, period_end in periods:
+                file_path = None
+                if await select_date_range_async(frame, period_start, period_end):
+                    file_path = await visualize_and_download_async(
+                        page,
+                        frame,
+                        download_dir,
+                        lambda extension: period_file_name(period_start, period_end, extension, step, prm or ""),
+                    )
+                if file_path:
+                    # Écriture Parquet et manifeste hors de la boucle : les autres comptes continuent pendant ce temps
+                    await asyncio.to_thread(
+                        store_downloaded_period,
+                        manifest,
+                        step,
+                        period_start,
+                        period_end,
+                        file_path,
+                        download_dir,
+                        account_store,
+                    )
+                else:
+                    success = False
+        report["results"][prm or "default"] = success
+    except Exception as e:
+        logger.error(f"❌ {account['name']}: erreur générale {type(e).__name__}")
+        logger.debug(f"Détails: {str(e)}")
+    finally:
+        await context.close()
+
+    report["success"] = bool(report["results"]) and all(report["results"].values())
+    report["duration"] = round(time.monotonic() - started, 1)
+    return report
+
+
+async def run_accounts_async(
+    accounts: list,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    output_dir: str,
+    max_contexts: int = 4,
+    headless: bool = True,
+    **options,
+) -> list:
+    """
+    Exécute les comptes dans un seul processus Chrome, un contexte de navigation par compte
+
+    La mémoire et le démarrage croissent avec le nombre de contextes (quelques Mo chacun),
+    plus avec le nombre de navigateurs. Nécessite playwright (import à la demande).
+
+    Args:
+        accounts: Comptes chargés via load_accounts
+        max_contexts: Nombre de contextes ouverts simultanément
+        **options: Options transmises à download_account_async (incremental, store_dir, granularity, hourly_days)
+
+    Returns:
+        Rapports par compte (format de run_account)
+    """
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        logger.error("❌ Moteur async: playwright requis (pip install playwright && playwright install chromium)")
+        return [new_account_report(account) for account in accounts]
+
+    semaphore = asyncio.Semaphore(max_contexts)
+
+    async def run_one(index: int, account: dict) -> dict:
+        async with semaphore:
+            # Connexions de la première vague décalées pour étaler les captchas
+            await asyncio.sleep(min(index, max_contexts - 1) * WORKER_LOGIN_STAGGER)
+            return await download_account_async(browser, account, start_date, end_date, output_dir, **options)
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=headless, args=["--no-sandbox", "--disable-dev-shm-usage"])
+        try:
+            return list(await asyncio.gather(*(run_one(index, account) for index, account in enumerate(accounts))))
+        finally:
+            await browser.close()
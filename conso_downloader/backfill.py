@@ -0,0 +1,293 @@
+"""
+Rattrapage d'historique pluriannuel : file SQLite persistante des périodes et budget de requêtes
+"""
+
+import logging
+import os
+import sqlite3
+import stat
+import time
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Optional, Tuple
+
+from .browser import BrowserSession
+from .download import download_consumption_data
+from .planning import _to_datetime, load_manifest, plan_periods
+from .settings import BACKFILL_DB_FILE, BACKFILL_MAX_ATTEMPTS, BACKFILL_REQUESTS_PER_HOUR, DOWNLOAD_DIR, HOURLY_HISTORY_DAYS
+from .utils import validate_date_range
+
+logger = logging.getLogger(__name__)
+
+
+_BACKFILL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS windows (
+    id INTEGER PRIMARY KEY,
+    granularity TEXT NOT NULL,
+    start_day TEXT NOT NULL,
+    end_day TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    UNIQUE (granularity, start_day, end_day)
+);
+CREATE TABLE IF NOT EXISTS requests (sent_at REAL NOT NULL);
+"""
+
+
+class BackfillWindow(NamedTuple):
+    """Période de la file de rattrapage"""
+
+    id: int
+    granularity: str
+    start: datetime
+    end: datetime
+
+
+class BackfillQueue:
+    """
+    File persistante (SQLite) des périodes d'un rattrapage d'historique pluriannuel
+
+    Les périodes sont servies de la plus récente à la plus ancienne. Leur état et les requêtes
+    envoyées au portail (budget horaire) survivent à un redémarrage : une période en cours lors
+    d'un arrêt brutal redevient disponible à l'ouverture suivante.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: Base SQLite (défaut: ./downloads/.backfill.sqlite)
+        """
+        self.path = path or os.path.join(DOWNLOAD_DIR, BACKFILL_DB_FILE)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        try:
+            os.chmod(self.path, stat.S_IRUSR | stat.S_IWUSR)  # 600
+        except Exception:
+            pass  # Ignorer si impossible (Windows par exemple)
+        with self.db:
+            self.db.executescript(_BACKFILL_SCHEMA)
+            self.db.execute("UPDATE windows SET state = 'pending' WHERE state = 'running'")
+
+    def enqueue(self, plan: list) -> int:
+        """
+        Ajoute les périodes d'un plan (plan_periods) absentes de la file
+
+        Returns:
+            Nombre de périodes ajoutées
+        """
+        rows = [(step, start.date().isoformat(), end.date().isoformat()) for step, periods in plan for start, end in periods]
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO windows (granularity, start_day, end_day) VALUES (?, ?, ?)", rows)
+            return self.db.total_changes - before
+
+    def next_batch(self, limit: int, max_span_days: int = 365) -> list:
+        """
+        Réserve les périodes en attente les plus récentes, contiguës et de même pas
+
+        Le lot forme une seule plage (au plus max_span_days jours) téléchargeable en un appel.
+
+        Returns:
+            Liste de BackfillWindow, de la plus récente à la plus ancienne (vide si la file est terminée)
+        """
+        rows = self.db.execute(
+            "SELECT id, granularity, start_day, end_day FROM windows WHERE state = 'pending' ORDER BY start_day DESC LIMIT ?",
+            (max(1, limit),),
+        ).fetchall()
+
+        batch = []
+        for row_id, step, start, end in rows:
+            window = BackfillWindow(
+                row_id, step, _to_datetime(date.fromisoformat(start)), _to_datetime(date.fromisoformat(end))
+            )
+            if batch:
+                previous = batch[-1]
+                if (
+                    window.granularity != previous.granularity
+                    or window.end + timedelta(days=1) != previous.start
+                    or (batch[0].end - window.start).days > max_span_days
+                ):
+                    break
+            batch.append(window)
+
+        with self.db:
+            self.db.executemany(
+                "UPDATE windows SET state = 'running', updated_at = ? WHERE id = ?",
+                [(datetime.now().isoformat(timespec="seconds"), window.id) for window in batch],
+            )
+        return batch
+
+    def finish(self, window: BackfillWindow, success: bool, max_attempts: int = BACKFILL_MAX_ATTEMPTS) -> None:
+        """Enregistre le résultat d'une période : terminée, de nouveau en attente ou abandonnée"""
+        with self.db:
+            self.db.execute(
+                """
+                UPDATE windows SET
+                    attempts = attempts + 1,
+                    state = CASE WHEN ? THEN 'done' WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,
+                    updated_at = ?
+                WHERE id = ?
+                """,
+                (success, max_attempts, datetime.now().isoformat(timespec="seconds"), window.id),
+            )
+
+    def record_requests(self, count: int = 1) -> None:
+        """Comptabilise des requêtes envoyées au portail dans le budget horaire"""
+        now = time.time()
+        with self.db:
+            self.db.executemany("INSERT INTO requests (sent_at) VALUES (?)", [(now,)] * count)
+            self.db.execute("DELETE FROM requests WHERE sent_at < ?", (now - 3600,))
+
+    def budget(self, requests_per_hour: int) -> Tuple[int, float]:
+        """
+        Requêtes encore autorisées sur l'heure glissante
+
+        Returns:
+            Tuple (requêtes disponibles, secondes avant qu'une requête se libère si aucune ne l'est)
+        """
+        since = time.time() - 3600
+        count, oldest = self.db.execute("SELECT COUNT(*), MIN(sent_at) FROM requests WHERE sent_at >= ?", (since,)).fetchone()
+        available = requests_per_hour - count
+        if available > 0:
+            return available, 0.0
+        return 0, max(0.0, oldest - since)
+
+    def counts(self) -> dict:
+        """Nombre de périodes par état"""
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM windows GROUP BY state").fetchall())
+
+    def close(self) -> None:
+        """Ferme la base"""
+        self.db.close()
+
+
+def _window_downloaded(manifest: dict, window: BackfillWindow, since: datetime) -> bool:
+    """Indique si toutes les journées d'une période ont été enregistrées dans le manifeste depuis `since`"""
+    day = window.start.date()
+    while day <= window.end.date():
+        entry = manifest["days"].get(day.isoformat())
+        try:
+            if not entry or datetime.fromisoformat(entry["downloaded_at"]) < since.replace(microsecond=0):
+                return False
+        except (KeyError, TypeError, ValueError):
+            return False
+        day += timedelta(days=1)
+    return True
+
+
+def run_backfill(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    granularity: str = "hours",
+    hourly_days: int = HOURLY_HISTORY_DAYS,
+    requests_per_hour: int = BACKFILL_REQUESTS_PER_HOUR,
+    workers: int = 1,
+    headless: bool = True,
+    engine: str = "ui",
+    store_dir: Optional[str] = None,
+    download_dir: Optional[str] = None,
+    email: Optional[str] = None,
+    password: Optional[str] = None,
+    prm: Optional[str] = None,
+    archive_raw: bool = False,
+) -> bool:
+    """
+    Rattrapage d'historique sans limite de durée, à partir d'une file persistante
+
+    La plage demandée (plusieurs années possibles) est découpée et ajoutée à la file SQLite de
+    download_dir ; sans dates, la file existante est reprise. Les périodes sont téléchargées de la
+    plus récente à la plus ancienne, sans dépasser requests_per_hour périodes demandées au portail
+    par heure glissante. Chaque lot réunit autant de périodes contiguës que le budget disponible
+    le permet : une seule préparation de la page des mesures par lot avec un navigateur, et avec
+    un pool (workers > 1, moteur ui ou capture) une connexion et un captcha par navigateur et par
+    lot, qui servent ainsi au plus grand nombre de périodes.
+
+    Args:
+        start_date: Date de début de l'historique (None : reprise de la file)
+        end_date: Date de fin (défaut: hier)
+        granularity: Pas de mesure ("hours", "days", "months" ou "mixed")
+        hourly_days: Plan mixte : nombre de jours récents récupérés au pas 30 minutes
+        requests_per_hour: Budget de périodes demandées par heure
+        workers: Périodes téléchargées simultanément (navigateurs du pool, ou requêtes du moteur http)
+        Autres arguments : voir download_consumption_data
+
+    Returns:
+        bool: True si la file est terminée sans période abandonnée
+    """
+    download_dir = download_dir or DOWNLOAD_DIR
+    queue = BackfillQueue(os.path.join(download_dir, BACKFILL_DB_FILE))
+    session = None
+    try:
+        if start_date is not None or end_date is not None:
+            try:
+                start_date, end_date = validate_date_range(start_date, end_date, max_days=None)
+            except ValueError as e:
+                logger.error(f"❌ Dates invalides: {e}")
+                return False
+            plan = plan_periods({"version": 1, "days": {}}, start_date, end_date, granularity, hourly_days=hourly_days)
+            added = queue.enqueue(plan)
+            logger.info(
+                f"🗂️ Rattrapage {start_date.strftime('%d/%m/%Y')} → {end_date.strftime('%d/%m/%Y')}: "
+                f"{added} période(s) ajoutée(s) à la file"
+            )
+
+        # Pool de navigateurs : une connexion par navigateur et par lot (pas de session conservée)
+        pooled = workers > 1 and engine != "http"
+        if not pooled:
+            # Un seul navigateur : session conservée d'un lot à l'autre (reconnexion seulement si expirée)
+            session = BrowserSession(
+                headless=headless, download_dir=download_dir, email=email, password=password, capture=engine == "capture"
+            )
+
+        while True:
+            available, wait = queue.budget(requests_per_hour)
+            if available <= 0:
+                logger.info(f"⏳ Budget atteint ({requests_per_hour} périodes/h), reprise dans {wait:.0f}s")
+                time.sleep(wait)
+                continue
+
+            batch = queue.next_batch(available)
+            if not batch:
+                break
+            if pooled:
+                logger.info(f"🔑 Lot de {len(batch)} période(s): {min(workers, len(batch))} connexion(s) au portail")
+
+            queue.record_requests(len(batch))
+            started = datetime.now()
+            download_consumption_data(
+                batch[-1].start,
+                batch[0].end,
+                headless=headless,
+                session=session,
+                engine=engine,
+                http_workers=max(1, workers),
+                workers=workers,
+                store_dir=store_dir,
+                download_dir=download_dir,
+                email=email,
+                password=password,
+                prm=prm,
+                archive_raw=archive_raw,
+                granularity=batch[0].granularity,
+            )
+            manifest = load_manifest(download_dir)
+            for window in batch:
+                queue.finish(window, _window_downloaded(manifest, window, started))
+
+            counts = queue.counts()
+            logger.info(
+                f"🗂️ Rattrapage: {counts.get('done', 0)} terminée(s), {counts.get('pending', 0)} en attente, "
+                f"{counts.get('failed', 0)} abandonnée(s)"
+            )
+
+        failed = queue.counts().get("failed", 0)
+        if failed:
+            logger.warning(f"⚠️ Rattrapage terminé, {failed} période(s) abandonnée(s) après {BACKFILL_MAX_ATTEMPTS} essais")
+        else:
+            logger.info("🎉 Rattrapage terminé")
+        return failed == 0
+
+    finally:
+        if session is not None:
+            session.close()
+        queue.close()
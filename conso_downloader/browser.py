@@ -0,0 +1,951 @@
+"""
+Pilotage du portail avec Selenium : lancement de Chrome, connexion, navigation, calendrier, téléchargement
+"""
+
+import logging
+import os
+import stat
+import time
+from datetime import datetime
+from typing import Callable, Iterable, NamedTuple, Optional, Union
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from . import settings
+from .download_watcher import list_download_files, wait_for_download
+from .driver_service import AttachedChrome, new_chrome_driver
+from .metrics import METRICS, WAIT_TIMEOUTS, adaptive_wait, stage_timer
+from .rpc_profiler import profile_driver
+from .settings import (
+    BASE_URL,
+    CAPTURE_BUFFER_SIZE,
+    CONSENT_COOKIE,
+    CONSENT_POPIN_BUTTONS,
+    DOM_WAIT_RETRY_INTERVAL,
+    DOM_WAIT_SCRIPT_TIMEOUT,
+    DOWNLOAD_DIR,
+    GRANULARITY_LABELS,
+    PAGE_READY_BUTTON,
+    PAGE_READY_SELECTOR,
+    RESOURCE_BLOCKING_ALLOW_LIST,
+    RESOURCE_BLOCKING_PROFILES,
+    resolve_credentials,
+)
+from .utils import get_random_user_agent
+
+logger = logging.getLogger(__name__)
+
+
+def _wait_until(driver: webdriver.Chrome, timeout: float, condition: Callable):
+    """WebDriverWait(...).until sans exception : None si le délai est dépassé"""
+    try:
+        return WebDriverWait(driver, timeout).until(condition)
+    except TimeoutException:
+        return None
+
+
+def blocked_url_patterns(profile: str = None, extra_patterns: Iterable[str] = None) -> list:
+    """
+    Motifs d'URL à bloquer pour un profil, hors liste d'autorisation
+
+    Args:
+        profile: "none", "static" ou "full" (défaut: RESOURCE_BLOCKING)
+        extra_patterns: Motifs supplémentaires (défaut: variable d'environnement BLOCKED_URLS)
+
+    Returns:
+        Liste de motifs (joker *) pour Network.setBlockedURLs
+
+    Raises:
+        ValueError: Si le profil est inconnu
+    """
+    profile = profile or settings.RESOURCE_BLOCKING
+    if profile not in RESOURCE_BLOCKING_PROFILES:
+        raise ValueError(f"Profil de blocage inconnu: {profile} ({', '.join(RESOURCE_BLOCKING_PROFILES)})")
+    if extra_patterns is None:
+        extra_patterns = [pattern.strip() for pattern in os.getenv("BLOCKED_URLS", "").split(",") if pattern.strip()]
+
+    patterns = []
+    for pattern in (*RESOURCE_BLOCKING_PROFILES[profile], *extra_patterns):
+        if any(allowed in pattern.lower() for allowed in RESOURCE_BLOCKING_ALLOW_LIST):
+            logger.debug(f"Motif de blocage ignoré (liste d'autorisation): {pattern}")
+            continue
+        if pattern not in patterns:
+            patterns.append(pattern)
+    return patterns
+
+
+def setup_driver(
+    download_dir: str = None,
+    headless: bool = False,
+    profile_dir: Optional[str] = None,
+    blocking: Optional[str] = None,
+    capture: bool = False,
+) -> webdriver.Chrome:
+    """
+    Configure et retourne le driver Chrome avec les options anti-détection
+
+    Args:
+        download_dir: Répertoire de téléchargement (défaut: ./downloads)
+        headless: Mode sans interface graphique (défaut: False = visible)
+        profile_dir: Profil Chrome persistant (user-data-dir) pour conserver la session
+        blocking: Profil de blocage des ressources (défaut: RESOURCE_BLOCKING)
+        capture: Journal des évènements réseau activé (moteur capture, réponses lues via CDP)
+    """
+    blocked_urls = blocked_url_patterns(blocking)
+
+    if download_dir is None:
+        download_dir = os.path.join(os.getcwd(), "downloads")
+
+    os.makedirs(download_dir, exist_ok=True)
+
+    options = Options()
+
+    # Mode headless si demandé
+    if headless:
+        options.add_argument("--headless=new")
+        logger.info("🔇 Mode headless activé (navigateur invisible)")
+    else:
+        logger.info("👁️  Mode visible activé (navigateur visible)")
+
+    # Profil persistant : cookies de session et consentement conservés entre exécutions
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        try:
+            os.chmod(profile_dir, stat.S_IRWXU)  # 700 (contient les cookies de session)
+        except Exception:
+            pass  # Ignorer si impossible (Windows par exemple)
+        options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+        logger.info("💾 Profil navigateur persistant activé")
+
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+
+    # Configuration des préférences de téléchargement
+    prefs = {
+        "download.default_directory": download_dir,
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True,
+    }
+    options.add_experimental_option("prefs", prefs)
+
+    # Désactiver les logs Selenium pour une fermeture propre
+    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    options.add_argument("--log-level=3")  # Supprime les erreurs de fermeture
+
+    if capture:
+        # Journal de performance : évènements Network.* relus par le moteur capture
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    with stage_timer("driver_startup"):
+        # Binaires et chromedriver préparés par prepare_driver() si disponibles
+        driver = new_chrome_driver(options)
+        profile_driver(driver)  # --profile : commandes WebDriver comptées dès le lancement
+
+        # Anti-détection via CDP avec User-Agent aléatoire
+        random_ua = get_random_user_agent()
+        driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": random_ua})
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+        # Ressources bloquées avant tout chargement de page (images, polices, traceurs selon le profil)
+        if blocked_urls:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
+            logger.info(f"🚫 Blocage des ressources activé ({len(blocked_urls)} motifs)")
+
+        # Tampons agrandis : le corps des réponses de mesures reste lisible par Network.getResponseBody
+        if capture:
+            driver.execute_cdp_cmd(
+                "Network.enable",
+                {"maxTotalBufferSize": 2 * CAPTURE_BUFFER_SIZE, "maxResourceBufferSize": CAPTURE_BUFFER_SIZE},
+            )
+            logger.info("🎯 Capture des réponses en mémoire activée")
+
+        driver.set_window_size(1536, 864)
+        driver.set_script_timeout(DOM_WAIT_SCRIPT_TIMEOUT)
+
+    logger.info(f"✅ Driver Chrome initialisé - Downloads: {download_dir}")
+    logger.debug(f"🔒 User-Agent: {random_ua[:50]}...")
+    return driver
+
+
+# Conditions évaluées dans le navigateur, réévaluées à chaque mutation du DOM (moteurs Selenium et async)
+# arguments: nom de la condition, liste d'arguments, délai maximal (ms), callback de Selenium
+WAIT_FOR_DOM_JS = """
+const [condition, args, timeout, done] = arguments;
+const visible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const text = (el) => (el.textContent || "").trim();
+const conditions = {
+    present: (selector) => document.querySelector(selector) !== null,
+    enabled: (selector) => {
+        const el = document.querySelector(selector);
+        return !!el && !el.disabled && !el.classList.contains("disabled");
+    },
+    visibleText: (selector, expected) =>
+        Array.from(document.querySelectorAll(selector)).some((el) => visible(el) && text(el) === expected),
+    enabledButton: (needle) =>
+        Array.from(document.querySelectorAll("button")).some(
+            (b) => visible(b) && !b.disabled && text(b).toLowerCase().includes(needle)),
+    pageReady: (selector, needle) => conditions.present(selector) || conditions.enabledButton(needle),
+    iframeSrc: (...needles) =>
+        Array.from(document.querySelectorAll("iframe")).some(
+            (f) => needles.some((needle) => (f.getAttribute("src") || "").includes(needle))),
+};
+const check = () => {
+    try { return !!conditions[condition](...args); } catch (e) { return false; }
+};
+if (check()) { done(true); return; }
+let finished = false;
+const finish = (result) => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    document.removeEventListener("readystatechange", recheck);
+    clearTimeout(timer);
+    done(result);
+};
+const recheck = () => { if (check()) finish(true); };
+const observer = new MutationObserver(recheck);
+observer.observe(document, { subtree: true, childList: true, attributes: true, characterData: true });
+document.addEventListener("readystatechange", recheck);
+const timer = setTimeout(() => finish(check()), timeout);
+"""
+
+
+def wait_for_dom(driver: webdriver.Chrome, condition: str, *args, timeout: float = 10) -> bool:
+    """
+    Attend une condition sur le DOM sans polling côté Python
+
+    La condition est évaluée dans le navigateur à chaque mutation (MutationObserver) :
+    l'attente se termine dès que le DOM change et ne coûte qu'une requête WebDriver.
+
+    Args:
+        driver: Driver Chrome (document ou iframe courant)
+        condition: "present" (sélecteur CSS), "enabled" (sélecteur CSS),
+            "visibleText" (sélecteur CSS, texte exact), "enabledButton" (texte contenu, minuscules),
+            "pageReady" (sélecteur CSS présent ou bouton "enabledButton") ou "iframeSrc" (fragments d'URL)
+        *args: Arguments de la condition
+        timeout: Attente maximale (secondes)
+
+    Returns:
+        bool: True si la condition est remplie avant le délai
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        try:
+            return bool(driver.execute_async_script(WAIT_FOR_DOM_JS, condition, list(args), int(remaining * 1000)))
+        except WebDriverException as e:
+            # Page déchargée pendant l'attente (navigation) : relancer l'attente sur la nouvelle page
+            logger.debug(f"Attente '{condition}' interrompue: {type(e).__name__}")
+            time.sleep(DOM_WAIT_RETRY_INTERVAL)
+
+
+# État de tous les éléments d'un sélecteur CSS relevé en une seule requête WebDriver
+# arguments: sélecteur CSS ; retour: [élément, visible, activé, texte, aria-label] par élément
+_SNAPSHOT_JS = """
+const [selector] = arguments;
+const visible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+return Array.from(document.querySelectorAll(selector)).map((el) => [
+    el,
+    visible(el),
+    !el.disabled,
+    (el.innerText || el.textContent || "").trim(),
+    el.getAttribute("aria-label") || "",
+]);
+"""
+
+
+class ElementSnapshot(NamedTuple):
+    """État d'un élément relevé par snapshot_elements"""
+
+    element: WebElement
+    visible: bool
+    enabled: bool
+    text: str
+    aria_label: str
+
+
+def snapshot_elements(driver: webdriver.Chrome, selector: str) -> list:
+    """
+    Relève en une requête l'état de tous les éléments d'un sélecteur CSS
+
+    Remplace find_elements suivi de is_displayed(), .text ou is_enabled() sur chaque
+    élément (une requête WebDriver par appel et par élément) : la recherche se fait
+    ensuite en Python avec find_in_snapshot.
+
+    Returns:
+        Liste d'ElementSnapshot dans l'ordre du document
+    """
+    return [ElementSnapshot(*row) for row in driver.execute_script(_SNAPSHOT_JS, selector) or []]
+
+
+def find_in_snapshot(
+    snapshot: Iterable[ElementSnapshot], text: str, exact: bool = False, ignore_case: bool = False, enabled: bool = False
+) -> Optional[ElementSnapshot]:
+    """
+    Premier élément visible dont le texte contient (ou vaut, si exact) le texte cherché
+
+    Args:
+        snapshot: Éléments relevés par snapshot_elements
+        text: Texte cherché
+        exact: Texte identique plutôt que contenu
+        ignore_case: Comparaison insensible à la casse
+        enabled: Ignorer les éléments désactivés
+    """
+    if ignore_case:
+        text = text.lower()
+    for item in snapshot:
+        if not item.visible or (enabled and not item.enabled):
+            continue
+        candidate = item.text.lower() if ignore_case else item.text
+        if candidate == text or (not exact and text in candidate):
+            return item
+    return None
+
+
+# Popup de consentement fermée en une requête (moteurs Selenium et async)
+# arguments: identifiants des boutons d'acceptation, nom du cookie de consentement
+DISMISS_POPINS_JS = """
+const [buttonIds, consentCookie] = arguments;
+if (document.cookie.split("; ").some((c) => c.startsWith(consentCookie + "="))) return "stored";
+for (const id of buttonIds) {
+    const button = document.getElementById(id);
+    if (button && button.getClientRects().length && !button.disabled) {
+        button.click();
+        return id;
+    }
+}
+return "";
+"""
+
+
+def accept_cookies(driver: webdriver.Chrome, button_ids: tuple = CONSENT_POPIN_BUTTONS) -> bool:
+    """
+    Ferme la popup de consentement si elle est présente, sans jamais l'attendre
+
+    Une seule requête DOM : si le cookie de consentement existe déjà (profil Chrome persistant,
+    ou popup acceptée plus tôt dans la session), rien n'est cherché ; sinon le premier bouton
+    connu visible est cliqué.
+
+    Returns:
+        bool: True si une popup a été fermée
+    """
+    dismissed = driver.execute_script(DISMISS_POPINS_JS, list(button_ids), CONSENT_COOKIE)
+    if dismissed == "stored":
+        logger.debug("Consentement cookies déjà enregistré")
+        return False
+    if not dismissed:
+        logger.debug("Pas de popup cookies détecté")
+        return False
+
+    logger.info(f"✅ Popup cookies accepté: {dismissed}")
+    return True
+
+
+def login_step1_email(driver: webdriver.Chrome, email: str) -> bool:
+    """Première étape de login : saisie de l'email"""
+    try:
+        wait = WebDriverWait(driver, 10)
+
+        # Attendre le champ email
+        email_field = wait.until(EC.presence_of_element_located((By.ID, "idToken1")))
+        email_field.clear()
+        email_field.send_keys(email)
+        # Ne PAS logger l'email complet - sécurité
+        email_masked = email[:3] + "***@" + email.split("@")[1] if "@" in email else "***"
+        logger.info(f"✅ Email saisi: {email_masked}")
+
+        # Attendre résolution captcha en temps réel
+        # Surveiller quand le bouton devient réellement cliquable (captcha résolu)
+        logger.info("⏳ Attente résolution captcha...")
+        start_wait = time.time()
+        # Attendre que le bouton soit présent et activé (classe disabled retirée)
+        if adaptive_wait("captcha", lambda timeout: wait_for_dom(driver, "enabled", "#idToken3_0", timeout=timeout)):
+            elapsed = time.time() - start_wait
+            METRICS.observe("captcha", elapsed)
+            logger.info(f"✅ Captcha résolu en {elapsed:.1f}s")
+        else:
+            elapsed = time.time() - start_wait
+            METRICS.observe("captcha", elapsed)
+            logger.warning(f"⚠️ Timeout captcha après {elapsed:.0f}s, tentative quand même")
+            time.sleep(WAIT_TIMEOUTS.fallback("captcha"))
+
+        # Cliquer sur Suivant
+        submit_button = driver.find_element(By.ID, "idToken3_0")
+        driver.execute_script("arguments[0].click();", submit_button)
+        logger.info("✅ Formulaire email soumis")
+
+        # Attendre que la page suivante charge (champ password)
+        if not adaptive_wait(
+            "password_field",
+            lambda timeout: _wait_until(driver, timeout, EC.presence_of_element_located((By.ID, "idToken2"))),
+        ):
+            time.sleep(WAIT_TIMEOUTS.fallback("password_field"))  # Fallback
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Erreur login étape 1: {e}")
+        return False
+
+
+def login_step2_password(driver: webdriver.Chrome, password: str) -> bool:
+    """Deuxième étape de login : saisie du mot de passe"""
+    try:
+        wait = WebDriverWait(driver, 10)
+
+        # Attendre le champ mot de passe
+        password_field = wait.until(EC.presence_of_element_located((By.ID, "idToken2")))
+        password_field.clear()
+        password_field.send_keys(password)
+        logger.info("✅ Mot de passe saisi")
+
+        # Cliquer sur Connexion
+        submit_button = driver.find_element(By.ID, "idToken4_0")
+        driver.execute_script("arguments[0].click();", submit_button)
+        logger.info("✅ Connexion en cours...")
+
+        # Attendre que la page post-login charge (présence de boutons)
+        if not adaptive_wait(
+            "post_login",
+            lambda timeout: _wait_until(driver, timeout, EC.presence_of_element_located((By.TAG_NAME, "button"))),
+        ):
+            time.sleep(WAIT_TIMEOUTS.fallback("post_login"))  # Fallback
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Erreur login étape 2: {e}")
+        return False
+
+
+def navigate_to_consumption(driver: webdriver.Chrome) -> bool:
+    """Navigue vers la page 'Suivre ma consommation'"""
+    try:
+        # Accepter le 3ème popup cookies post-connexion
+        accept_cookies(driver)
+
+        # Cliquer sur le menu "Ma consommation" (boutons relevés en une requête)
+        menu_button = find_in_snapshot(snapshot_elements(driver, "button"), "Ma consommation")
+        if menu_button:
+            logger.info("🔍 Bouton 'Ma consommation' trouvé")
+            driver.execute_script("arguments[0].click();", menu_button.element)
+            # Attendre que les liens apparaissent
+            if not adaptive_wait(
+                "menu_links",
+                lambda timeout: _wait_until(driver, timeout, EC.presence_of_element_located((By.TAG_NAME, "a"))),
+            ):
+                time.sleep(WAIT_TIMEOUTS.fallback("menu_links"))  # Fallback
+
+        # Cliquer sur "Suivre ma consommation"
+        link = find_in_snapshot(snapshot_elements(driver, "a"), "Suivre ma consommation")
+        if link:
+            logger.info("🔍 Lien 'Suivre ma consommation' trouvé")
+            driver.execute_script("arguments[0].click();", link.element)
+            # Attendre que l'iframe apparaisse
+            if not adaptive_wait(
+                "iframe_present",
+                lambda timeout: _wait_until(driver, timeout, EC.presence_of_element_located((By.TAG_NAME, "iframe"))),
+            ):
+                time.sleep(WAIT_TIMEOUTS.fallback("iframe_present"))  # Fallback
+
+        logger.info("✅ Navigation vers page de consommation réussie")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Erreur navigation: {e}")
+        return False
+
+
+def switch_to_iframe(driver: webdriver.Chrome) -> bool:
+    """Bascule vers l'iframe contenant les mesures"""
+    try:
+        # Attendre que l'iframe voulue apparaisse (20s par défaut)
+        if not adaptive_wait(
+            "iframe",
+            lambda timeout: wait_for_dom(driver, "iframeSrc", "mes-mesures", "donnees-de-mesures", timeout=timeout),
+        ):
+            logger.warning("⚠️ Iframe des mesures non trouvée (timeout)")
+            return False
+
+        # Chercher l'iframe avec "mes-mesures" ou "donnees-de-mesures"
+        iframes = driver.find_elements(By.CSS_SELECTOR, "iframe[src*='mes-mesures'], iframe[src*='donnees-de-mesures']")
+        if iframes:
+            driver.switch_to.frame(iframes[0])
+            logger.info("✅ Basculé vers iframe des mesures")
+
+            # Attendre que le DOM de l'iframe soit complètement chargé (l'attente du bouton Heures prend le relais)
+            adaptive_wait(
+                "iframe_ready",
+                lambda timeout: _wait_until(
+                    driver, timeout, lambda d: d.execute_script("return document.readyState") == "complete"
+                ),
+            )
+
+            # Attendre que le contenu Angular soit chargé (bouton Heures dispo)
+            if adaptive_wait("heures", lambda timeout: wait_for_dom(driver, "visibleText", "span", "Heures", timeout=timeout)):
+                logger.info("⏳ Contenu iframe chargé")
+            else:
+                time.sleep(WAIT_TIMEOUTS.fallback("heures"))  # Fallback
+                logger.info("⏳ Attente chargement contenu iframe...")
+
+            return True
+
+        logger.warning("⚠️ Iframe des mesures non trouvée (après attente)")
+        return False
+
+    except Exception as e:
+        logger.error(f"❌ Erreur basculement iframe: {e}")
+        return False
+
+
+def select_granularity(driver: webdriver.Chrome, granularity: str = "hours") -> bool:
+    """
+    Sélectionne le pas de mesure ('Heures', 'Jours' ou 'Mois')
+
+    Args:
+        driver: Driver positionné dans l'iframe des mesures
+        granularity: "hours", "days" ou "months" (clé de GRANULARITY_LABELS)
+    """
+    label_text = GRANULARITY_LABELS[granularity]
+    try:
+        # Chercher le span portant le libellé du pas
+        span = find_in_snapshot(snapshot_elements(driver, "span"), label_text, exact=True)
+        if span:
+            # Cliquer sur le label parent
+            driver.execute_script("arguments[0].parentElement.click();", span.element)
+            logger.info(f"✅ Mode '{label_text}' sélectionné")
+            # Attendre que le calendrier soit prêt
+            calendar_button = (By.XPATH, "//button[@aria-label='Ouvrir le calendrier']")
+            if not adaptive_wait(
+                "calendar_button",
+                lambda timeout: _wait_until(driver, timeout, EC.presence_of_element_located(calendar_button)),
+            ):
+                time.sleep(WAIT_TIMEOUTS.fallback("calendar_button"))  # Fallback
+            return True
+
+        logger.warning(f"⚠️ Bouton '{label_text}' non trouvé")
+        return False
+
+    except Exception as e:
+        logger.error(f"❌ Erreur sélection mode {label_text}: {e}")
+        return False
+
+
+# Boutons du calendrier trouvés (et cliqués) en une seule requête par essai (moteurs Selenium et async)
+# arguments: type ("open", "header", "year", "month", "day", "monthOrYear"), valeur, cliquer (bool),
+# mois affiché attendu [mois, année] (jour uniquement) : "sameYear" ou "elsewhere" si l'en-tête indique
+# un autre mois de la même année ou d'une autre année
+CALENDAR_BUTTON_JS = """
+const [kind, value, click, shown] = arguments;
+const visible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const text = (el) => (el.textContent || "").trim();
+const hasYear = (s) => /\\b\\d{4}\\b/.test(s || "");
+const buttons = () => Array.from(document.querySelectorAll("button"));
+if (shown) {
+    const header = buttons().find((b) => visible(b) && hasYear(b.getAttribute("aria-label")));
+    if (!header) return document.querySelector("td.days button") ? "elsewhere" : false;
+    const month = (hasYear(text(header)) ? text(header) : header.getAttribute("aria-label")).toUpperCase();
+    if (!month.includes(shown[1])) return "elsewhere";
+    if (!month.includes(shown[0])) return "sameYear";
+}
+if (kind === "monthOrYear") {
+    // Vue des mois ouverte sur l'année affichée : clic du mois, sinon vue des années : clic de l'année
+    const [monthName, year] = value.split("|");
+    const usable = (b) => visible(b) && !b.disabled;
+    const month = buttons().find((b) => usable(b) && !hasYear(text(b)) && text(b).toUpperCase().includes(monthName));
+    const target = month || buttons().find((b) => usable(b) && text(b) === year);
+    if (!target) return false;
+    if (click) target.click();
+    return month ? "month" : "year";
+}
+let candidates = [];
+if (kind === "open") {
+    candidates = Array.from(document.querySelectorAll(
+        "button[aria-label='Ouvrir le calendrier'], lnc-icon[icon='calendar_today'] button"));
+} else if (kind === "header") {
+    candidates = buttons().filter((b) => hasYear(b.getAttribute("aria-label")));
+} else if (kind === "year") {
+    candidates = buttons().filter((b) => text(b) === value);
+} else if (kind === "month") {
+    candidates = buttons().filter((b) => !hasYear(text(b)) && text(b).toUpperCase().includes(value));
+} else if (kind === "day") {
+    candidates = Array.from(document.querySelectorAll("td.days button")).filter((b) => {
+        const label = text(b.querySelector("span.button-content") || b);
+        return label === value || label === value.padStart(2, "0");
+    });
+}
+const target = candidates.find((b) => visible(b) && !b.disabled);
+if (!target) return false;
+if (click) target.click();
+return true;
+"""
+
+
+CALENDAR_MONTHS = ["JAN", "FÉV", "MARS", "AVR", "MAI", "JUIN", "JUIL", "AOÛT", "SEPT", "OCT", "NOV", "DÉC"]
+
+
+def click_calendar_button(driver: webdriver.Chrome, kind: str, value: str = "", timeout: float = 2) -> bool:
+    """
+    Clique un bouton du calendrier dès qu'il est visible
+
+    La recherche, le test de visibilité et le clic sont faits dans le navigateur :
+    une seule requête WebDriver par essai au lieu d'une par bouton et par propriété.
+
+    Args:
+        driver: Driver positionné dans l'iframe des mesures
+        kind: "open" (bouton calendrier), "header" (mois/année), "year", "month", "day"
+            ou "monthOrYear" (mois si la vue des mois est affichée, sinon année)
+        value: Année, abréviation du mois (CALENDAR_MONTHS), jour, ou "MOIS|ANNÉE" selon le type
+        timeout: Attente maximale de l'apparition du bouton (secondes)
+
+    Returns:
+        True si le bouton a été cliqué ("month" ou "year" pour monthOrYear), False sinon
+    """
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script(CALENDAR_BUTTON_JS, kind, str(value), True)
+        )
+    except TimeoutException:
+        return False
+
+
+def click_shown_day(driver: webdriver.Chrome, target_date: datetime, timeout: float = 3) -> Union[bool, str, None]:
+    """
+    Clique le jour si le calendrier affiche déjà le mois de la date
+
+    Le mois affiché est lu dans l'en-tête du calendrier par le même script que le clic :
+    aucune requête supplémentaire, et pas d'état à tenir à jour côté Python (le portail
+    peut rouvrir le calendrier sur un autre mois).
+
+    Returns:
+        True si le jour a été cliqué, "same_year" si un autre mois de la même année est affiché,
+        None si une autre année est affichée, False si le jour n'apparaît pas
+    """
+    shown = [CALENDAR_MONTHS[target_date.month - 1], str(target_date.year)]
+    try:
+        clicked = WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script(CALENDAR_BUTTON_JS, "day", str(target_date.day), True, shown)
+        )
+    except TimeoutException:
+        return False
+    if clicked == "sameYear":
+        return "same_year"
+    return None if clicked == "elsewhere" else True
+
+
+def select_calendar_date(driver: webdriver.Chrome, target_date: datetime, label: str = "date") -> bool:
+    """Sélectionne une date dans le calendrier ouvert, en ne naviguant que les niveaux qui changent (année, mois, jour)"""
+    logger.info(f"   📅 Sélection {label}: {target_date.strftime('%d/%m/%Y')}")
+
+    # Mois déjà affiché (date de fin du même mois, période adjacente) : le clic du jour suffit
+    with stage_timer("calendar_day"):
+        shown_day = click_shown_day(driver, target_date)
+    if shown_day is True:
+        logger.info(f"   ⏩ Jour sélectionné: {target_date.day} (mois déjà affiché)")
+        return True
+
+    target_month = CALENDAR_MONTHS[target_date.month - 1]
+    month_selected = False
+    with stage_timer("calendar_year"):
+        # Étape 1: ouvrir la vue mois/années (en-tête mois/année)
+        if click_calendar_button(driver, "header"):
+            logger.info("   1️⃣ Vue mois/années ouverte")
+
+        if shown_day == "same_year":
+            # Même année : le mois directement si la vue des mois est affichée, sinon l'année d'abord
+            level = click_calendar_button(driver, "monthOrYear", f"{target_month}|{target_date.year}")
+            if not level:
+                logger.warning(f"   ⚠️ Mois {target_month} non trouvé")
+                return False
+            month_selected = level == "month"
+        elif not click_calendar_button(driver, "year", target_date.year):
+            # Étape 2: sélectionner l'année
+            logger.warning(f"   ⚠️ Année {target_date.year} non trouvée")
+            return False
+        if not month_selected:
+            logger.info(f"   2️⃣ Année sélectionnée: {target_date.year}")
+
+    with stage_timer("calendar_month"):
+        # Étape 3: sélectionner le mois
+        if not month_selected and not click_calendar_button(driver, "month", target_month):
+            logger.warning(f"   ⚠️ Mois {target_month} non trouvé")
+            return False
+        logger.info(f"   3️⃣ Mois sélectionné: {target_month}")
+
+    with stage_timer("calendar_day"):
+        # Étape 4: sélectionner le jour (attend le rendu des jours du mois)
+        if not click_calendar_button(driver, "day", target_date.day, timeout=3):
+            logger.warning(f"   ⚠️ Jour {target_date.day} non trouvé")
+            return False
+        logger.info(f"   4️⃣ Jour sélectionné: {target_date.day}")
+
+    return True
+
+
+def select_date_range(driver: webdriver.Chrome, start_date: datetime, end_date: datetime) -> bool:
+    """Sélectionne la plage de dates via le calendrier"""
+    try:
+        logger.info(f"🎯 Sélection période: {start_date.strftime('%d/%m/%Y')} → {end_date.strftime('%d/%m/%Y')}")
+
+        with stage_timer("calendar_open"):
+            # Trouver et cliquer sur le bouton calendrier
+            if not click_calendar_button(driver, "open", timeout=4):
+                logger.error("❌ Bouton calendrier non trouvé")
+                return False
+            logger.info("✅ Calendrier ouvert")
+
+        # Sélectionner date de début puis date de fin
+        if not select_calendar_date(driver, start_date, "date début"):
+            return False
+
+        if not select_calendar_date(driver, end_date, "date fin"):
+            return False
+
+        logger.info("✅ Période sélectionnée avec succès")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Erreur sélection période: {e}")
+        return False
+
+
+def click_visualiser(driver: webdriver.Chrome) -> bool:
+    """Clique sur Visualiser (chargement des données de la période sélectionnée)"""
+    button = find_in_snapshot(snapshot_elements(driver, "button"), "visualiser", ignore_case=True)
+    if button:
+        driver.execute_script("arguments[0].click();", button.element)
+        logger.info("✅ Visualisation lancée")
+        return True
+
+    logger.error("❌ Bouton 'Visualiser' non trouvé")
+    return False
+
+
+def visualize_and_download(driver: webdriver.Chrome, download_dir: str = None) -> Optional[str]:
+    """
+    Clique sur Visualiser puis Télécharger et attend la fin du téléchargement
+
+    Args:
+        driver: Driver Chrome positionné dans l'iframe des mesures
+        download_dir: Répertoire de téléchargement du navigateur (défaut: ./downloads)
+
+    Returns:
+        Chemin du fichier téléchargé, ou None en cas d'échec
+    """
+    download_dir = download_dir or DOWNLOAD_DIR
+    try:
+        with stage_timer("visualize"):
+            # Cliquer sur Visualiser
+            if not click_visualiser(driver):
+                return None
+
+            # Attendre que le bouton Télécharger soit cliquable (données chargées)
+            if not adaptive_wait(
+                "download_button", lambda timeout: wait_for_dom(driver, "enabledButton", "télécharger", timeout=timeout)
+            ):
+                time.sleep(WAIT_TIMEOUTS.fallback("download_button"))  # Fallback
+
+        # Cliquer sur Télécharger
+        button = find_in_snapshot(snapshot_elements(driver, "button"), "télécharger", ignore_case=True, enabled=True)
+        if button:
+            known_files = list_download_files(download_dir)
+            with stage_timer("download"):
+                driver.execute_script("arguments[0].click();", button.element)
+                logger.info("✅ Téléchargement lancé")
+                return adaptive_wait("download", lambda timeout: wait_for_download(download_dir, known_files, timeout=timeout))
+
+        logger.warning("⚠️ Bouton 'Télécharger' non trouvé ou désactivé")
+        return None
+
+    except Exception as e:
+        logger.error(f"❌ Erreur visualisation/téléchargement: {e}")
+        return None
+
+
+def is_login_required(driver: webdriver.Chrome) -> bool:
+    """Indique si le formulaire de connexion est affiché (session absente ou expirée)"""
+    return len(driver.find_elements(By.ID, "idToken1")) > 0
+
+
+def open_measures_page(driver: webdriver.Chrome, email: str, password: str, granularity: str = "hours") -> bool:
+    """
+    Amène le navigateur jusqu'à l'iframe des mesures, pas de mesure sélectionné ('Heures' par défaut)
+
+    La connexion (email, captcha, mot de passe) n'est effectuée que si le portail
+    affiche le formulaire de login : une session encore valide est réutilisée telle quelle.
+
+    Args:
+        driver: Driver Chrome
+        email: Identifiant du compte
+        password: Mot de passe du compte
+        granularity: Pas de mesure ("hours", "days" ou "months")
+
+    Returns:
+        bool: True si la page des mesures est prête
+    """
+    driver.switch_to.default_content()
+
+    # Accéder à la page
+    with stage_timer("page_load"):
+        driver.get(BASE_URL)
+        logger.info(f"📍 Page chargée: {BASE_URL}")
+
+        # Attendre que la page soit chargée (bouton cookies, formulaire, ou menu si la session est valide)
+        if not adaptive_wait(
+            "page_ready",
+            lambda timeout: wait_for_dom(driver, "pageReady", PAGE_READY_SELECTOR, PAGE_READY_BUTTON, timeout=timeout),
+        ):
+            time.sleep(WAIT_TIMEOUTS.fallback("page_ready"))  # Fallback
+
+    # Accepter les cookies
+    with stage_timer("cookies"):
+        accept_cookies(driver)
+
+    if is_login_required(driver):
+        with stage_timer("login"):
+            # Login étape 1 (email)
+            if not login_step1_email(driver, email):
+                return False
+
+            # Login étape 2 (password)
+            if not login_step2_password(driver, password):
+                return False
+    else:
+        logger.info("♻️ Session existante réutilisée, connexion ignorée")
+
+    # Accepter cookies post-login et naviguer
+    with stage_timer("navigation"):
+        if not navigate_to_consumption(driver):
+            return False
+
+    # Basculer vers l'iframe
+    with stage_timer("iframe"):
+        if not switch_to_iframe(driver):
+            return False
+
+    # Sélectionner le pas de mesure (Heures par défaut)
+    with stage_timer("heures_mode"):
+        return select_granularity(driver, granularity)
+
+
+def close_driver(driver: webdriver.Chrome) -> None:
+    """Ferme proprement le navigateur et le processus chromedriver (s'il n'est pas partagé)"""
+    try:
+        # Désactiver temporairement les logs de Selenium
+        selenium_logger = logging.getLogger("selenium")
+        original_level = selenium_logger.level
+        selenium_logger.setLevel(logging.CRITICAL)
+
+        try:
+            # Fermer toutes les fenêtres
+            if driver.window_handles:
+                driver.close()
+            time.sleep(0.3)
+        except Exception:
+            pass
+
+        try:
+            # Terminer le driver et le processus
+            driver.quit()
+        except Exception:
+            pass
+
+        try:
+            # Forcer la fermeture du service si encore actif (sauf chromedriver partagé, arrêté par SharedDriverService.stop)
+            if hasattr(driver, "service") and driver.service.process and not isinstance(driver, AttachedChrome):
+                if driver.service.process.poll() is None:
+                    driver.service.process.kill()
+        except Exception:
+            pass
+
+        # Restaurer le niveau de log
+        selenium_logger.setLevel(original_level)
+
+        logger.info("✅ Navigateur fermé proprement")
+
+    except Exception:
+        # Ignorer toutes les erreurs de fermeture
+        logger.info("✅ Navigateur fermé")
+
+
+class BrowserSession:
+    """
+    Session navigateur persistante réutilisée entre les cycles du mode boucle
+
+    Le driver reste ouvert d'un cycle à l'autre : tant que le portail ne réaffiche pas
+    le formulaire de login, la connexion et le captcha sont évités. Un navigateur
+    mort ou une page inutilisable entraîne un redémarrage complet.
+    """
+
+    def __init__(
+        self,
+        headless: bool = False,
+        download_dir: str = None,
+        profile_dir: Optional[str] = None,
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        capture: bool = False,
+    ):
+        """
+        Args:
+            headless: Mode sans interface graphique
+            download_dir: Répertoire de téléchargement (défaut: ./downloads)
+            profile_dir: Profil Chrome persistant (cookies conservés entre deux exécutions)
+            email: Identifiant du compte (défaut: ACCOUNT_EMAIL)
+            password: Mot de passe du compte (défaut: ACCOUNT_PASSWORD)
+            capture: Navigateur lancé pour le moteur capture (journal réseau activé)
+        """
+        self.headless = headless
+        self.download_dir = download_dir or DOWNLOAD_DIR
+        self.profile_dir = profile_dir
+        self.email, self.password = resolve_credentials(email, password)
+        self.capture = capture
+        self.driver = None
+
+    def is_alive(self) -> bool:
+        """Vérifie que le navigateur répond encore"""
+        if self.driver is None:
+            return False
+        try:
+            self.driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    def prepare(self) -> Optional[webdriver.Chrome]:
+        """
+        Retourne un driver positionné sur la page des mesures
+
+        Returns:
+            Le driver prêt, ou None si la page des mesures est inaccessible
+        """
+        if self.is_alive():
+            if open_measures_page(self.driver, self.email, self.password):
+                return self.driver
+            logger.warning("⚠️ Session réutilisée inutilisable, redémarrage du navigateur")
+
+        self.close()
+        self.driver = setup_driver(
+            download_dir=self.download_dir, headless=self.headless, profile_dir=self.profile_dir, capture=self.capture
+        )
+        if open_measures_page(self.driver, self.email, self.password):
+            return self.driver
+        return None
+
+    def close(self) -> None:
+        """Ferme le navigateur s'il est ouvert"""
+        if self.driver is not None:
+            close_driver(self.driver)
+            self.driver = None
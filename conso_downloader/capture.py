@@ -0,0 +1,131 @@
+"""
+Moteur capture : réponses de l'API de mesures lues en mémoire via le journal réseau de ChromeDriver
+"""
+
+import base64
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Iterator, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from .browser import click_visualiser
+from .metrics import adaptive_wait, stage_timer
+from .planning import period_file_name
+from .settings import CAPTURE_CONTENT_TYPES, CAPTURE_POLL_INTERVAL, CAPTURE_URL_PATTERN, DOWNLOAD_TIMEOUT
+from .store import CapturedResponse, iter_export_points
+
+logger = logging.getLogger(__name__)
+
+
+def _network_events(driver: webdriver.Chrome) -> Iterator[dict]:
+    """Évènements Network.* accumulés dans le journal de performance depuis le dernier appel"""
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        if message.get("method", "").startswith("Network."):
+            yield message
+
+
+def _is_capturable(response: dict) -> bool:
+    """Réponse candidate : succès, URL de l'API de mesures, contenu JSON/CSV/Excel"""
+    mime_type = (response.get("mimeType") or "").lower()
+    return (
+        response.get("status") == 200
+        and bool(CAPTURE_URL_PATTERN.search(response.get("url") or ""))
+        and any(kind in mime_type for kind in CAPTURE_CONTENT_TYPES)
+    )
+
+
+def _read_response_body(driver: webdriver.Chrome, request_id: str, response: dict) -> Optional[CapturedResponse]:
+    """Corps d'une réponse via Network.getResponseBody (None s'il ne contient aucun point de mesure)"""
+    try:
+        result = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+    except WebDriverException as e:
+        logger.debug(f"Corps de réponse indisponible: {type(e).__name__}")
+        return None
+
+    body = base64.b64decode(result["body"]) if result.get("base64Encoded") else result["body"].encode("utf-8")
+    captured = CapturedResponse(response["url"], response.get("mimeType", ""), body)
+    # Configuration, libellés... : même URL mais pas les données du graphique
+    try:
+        if next(iter_export_points(captured), None) is None:
+            return None
+    except Exception:
+        return None
+    return captured
+
+
+def wait_for_captured_response(driver: webdriver.Chrome, timeout: float = DOWNLOAD_TIMEOUT) -> Optional[CapturedResponse]:
+    """
+    Attend la réponse de mesures chargée par le graphique et la lit en mémoire
+
+    Une réponse n'est lue qu'une fois entièrement reçue (Network.loadingFinished).
+
+    Returns:
+        La réponse capturée, ou None si rien n'est arrivé à temps
+    """
+    deadline = time.monotonic() + timeout
+    candidates = {}
+
+    while True:
+        for event in _network_events(driver):
+            params = event.get("params", {})
+            if event["method"] == "Network.responseReceived" and _is_capturable(params.get("response", {})):
+                candidates[params["requestId"]] = params["response"]
+            elif event["method"] == "Network.loadingFinished" and params.get("requestId") in candidates:
+                captured = _read_response_body(driver, params["requestId"], candidates.pop(params["requestId"]))
+                if captured is not None:
+                    return captured
+
+        if time.monotonic() >= deadline:
+            logger.warning(f"⚠️ Aucune réponse de mesures capturée après {timeout:.0f}s")
+            return None
+        time.sleep(CAPTURE_POLL_INTERVAL)
+
+
+def capture_period_data(driver: webdriver.Chrome) -> Optional[CapturedResponse]:
+    """
+    Clique sur Visualiser et récupère en mémoire les données chargées par le graphique
+
+    Ni bouton Télécharger, ni fichier .crdownload : les octets de la réponse de l'API
+    reviennent directement à Python (journal de performance + Network.getResponseBody).
+
+    Args:
+        driver: Driver lancé avec setup_driver(capture=True), positionné dans l'iframe des mesures
+
+    Returns:
+        La réponse capturée, ou None en cas d'échec
+    """
+    try:
+        driver.get_log("performance")  # Évènements des périodes précédentes ignorés
+        with stage_timer("visualize"):
+            if not click_visualiser(driver):
+                return None
+        with stage_timer("capture"):
+            captured = adaptive_wait("capture", lambda timeout: wait_for_captured_response(driver, timeout))
+    except WebDriverException as e:
+        logger.warning(f"⚠️ Capture réseau indisponible: {type(e).__name__}")
+        logger.debug(f"Détails: {str(e)}")
+        return None
+
+    if captured is not None:
+        logger.info(f"📥 Données capturées en mémoire: {captured.name} ({len(captured.body)} octets)")
+    return captured
+
+
+def archive_captured_response(
+    captured: CapturedResponse, start_date: datetime, end_date: datetime, download_dir: str, granularity: str = "hours"
+) -> str:
+    """Écrit la réponse capturée telle quelle (archive brute) et retourne son chemin"""
+    os.makedirs(download_dir, exist_ok=True)
+    file_path = os.path.join(download_dir, period_file_name(start_date, end_date, captured.extension, granularity))
+    with open(file_path, "wb") as f:
+        f.write(captured.body)
+    return file_path
@@ -0,0 +1,392 @@
+"""
+Interface en ligne de commande
+"""
+
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from . import settings
+from .planning import is_day_published, load_manifest
+from .scheduler import PublicationScheduler
+from .settings import (
+    BACKFILL_REQUESTS_PER_HOUR,
+    DOWNLOAD_DIR,
+    GRANULARITIES,
+    HOURLY_HISTORY_DAYS,
+    PORTAL_TIMEZONE,
+    PUBLICATION_WINDOW,
+    RESOURCE_BLOCKING_PROFILES,
+    configure_logging,
+    require_credentials,
+    require_secure_base_url,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _start_profiling(dump_path: str) -> None:
+    """
+    --profile : rapport des commandes WebDriver par fonction à la fin du programme
+
+    Args:
+        dump_path: Fichier de statistiques cProfile (thread principal), vide pour le seul rapport WebDriver
+    """
+    import atexit
+
+    from .rpc_profiler import enable_rpc_profiler
+
+    rpc_profiler = enable_rpc_profiler()
+    cpu_profiler = None
+    if dump_path:
+        import cProfile
+
+        cpu_profiler = cProfile.Profile()
+        cpu_profiler.enable()
+
+    def report():
+        if cpu_profiler is not None:
+            cpu_profiler.disable()
+            cpu_profiler.dump_stats(dump_path)
+            logger.info(f"📄 Statistiques cProfile: {dump_path} (python -m pstats {dump_path})")
+        logger.info(f"\n{rpc_profiler.report()}")
+
+    atexit.register(report)
+
+
+def main():
+    """Point d'entrée principal"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m conso_downloader", description="Téléchargeur automatique de données Enedis"
+    )
+    parser.add_argument("--start-date", type=str, help="Date de début (format: DD/MM/YYYY)")
+    parser.add_argument("--end-date", type=str, help="Date de fin (format: DD/MM/YYYY)")
+    parser.add_argument(
+        "--loop",
+        action="store_true",
+        help="Mode boucle: relevés pendant la fenêtre de publication de la veille, attente de la suivante ensuite",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        help="Mode boucle à intervalle fixe en minutes, sans tenir compte de la publication des données",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Mode sans interface (navigateur invisible)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Ne télécharge que les journées absentes ou incomplètes dans le manifeste",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["ui", "http", "capture", "async"],
+        default="ui",
+        help="Moteur de récupération: ui (calendrier), http (API directe, nécessite MEASURES_API_URL), "
+        "capture (calendrier, données lues en mémoire via CDP) ou async (--accounts uniquement: "
+        "un seul Chrome, un contexte isolé par compte, nécessite playwright)",
+    )
+    parser.add_argument(
+        "--archive-raw",
+        action="store_true",
+        help="Moteur capture: conserve aussi les réponses brutes (toujours le cas sans --store)",
+    )
+    parser.add_argument(
+        "--granularity",
+        choices=[*GRANULARITIES, "mixed"],
+        default="hours",
+        help="Pas de mesure: hours (courbe 30 min, périodes de 7 jours), days, months (une période par an) "
+        "ou mixed (--hourly-days derniers jours au pas 30 min, historique au pas journalier)",
+    )
+    parser.add_argument(
+        "--hourly-days",
+        type=int,
+        default=HOURLY_HISTORY_DAYS,
+        help=f"Plan mixed: jours récents récupérés au pas 30 minutes (défaut: {HOURLY_HISTORY_DAYS})",
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Rattrapage d'historique sans limite de durée (file persistante, reprise après arrêt ; "
+        "sans dates : reprise de la file existante)",
+    )
+    parser.add_argument(
+        "--requests-per-hour",
+        type=int,
+        default=BACKFILL_REQUESTS_PER_HOUR,
+        help=f"Rattrapage: périodes demandées au portail par heure (défaut: {BACKFILL_REQUESTS_PER_HOUR})",
+    )
+    parser.add_argument("--http-workers", type=int, default=4, help="Requêtes simultanées du moteur http (défaut: 4)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Navigateurs connectés en parallèle pour les longues périodes (moteur ui, défaut: 1)",
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        help="Jeu de données Parquet (partitionné par mois) alimenté après chaque téléchargement",
+    )
+    parser.add_argument(
+        "--accounts",
+        type=str,
+        help="Fichier JSON des comptes (mode multi-comptes, un sous-répertoire par compte)",
+    )
+    parser.add_argument(
+        "--batch-workers",
+        type=int,
+        default=4,
+        help="Comptes traités simultanément en mode multi-comptes (défaut: 4)",
+    )
+    parser.add_argument(
+        "--block-resources",
+        choices=sorted(RESOURCE_BLOCKING_PROFILES),
+        help="Ressources non chargées: static (images, polices) ou full (+ traceurs, TagCommander) (défaut: none)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help="Fichier OpenMetrics des durées d'étapes, réécrit après chaque exécution (collecteur textfile)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Expose les métriques sur http://127.0.0.1:PORT/metrics (mode boucle)",
+    )
+    parser.add_argument(
+        "--browser-profile",
+        type=str,
+        help="Répertoire de profil Chrome persistant (session conservée, reconnexion seulement si expirée)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="FICHIER.prof",
+        help="Compte et chronomètre les commandes WebDriver par fonction (rapport en fin d'exécution) ; "
+        "avec un fichier, y écrit aussi les statistiques cProfile",
+    )
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="Résout Chrome et chromedriver (chemins et versions mis en cache jusqu'à la mise à jour de Chrome) puis quitte",
+    )
+
+    args = parser.parse_args()
+
+    configure_logging()
+    require_secure_base_url()
+
+    if args.block_resources:
+        # Variable d'environnement : héritée aussi par les processus du pool --workers
+        settings.RESOURCE_BLOCKING = os.environ["BLOCK_RESOURCES"] = args.block_resources
+
+    if args.profile is not None:
+        _start_profiling(args.profile)
+
+    # Métriques, navigateur (Selenium) et moteurs : importés seulement pour une exécution, pas pour --help
+    from .metrics import start_metrics_server, write_metrics_file
+
+    # Parser les dates si fournies
+    start_date = None
+    end_date = None
+
+    if args.start_date:
+        start_date = datetime.strptime(args.start_date, "%d/%m/%Y")
+    if args.end_date:
+        end_date = datetime.strptime(args.end_date, "%d/%m/%Y")
+
+    if args.preflight:
+        from .driver_service import prepare_driver
+
+        binaries = prepare_driver(shared=False)
+        if binaries is None:
+            sys.exit(1)
+        logger.info(f"🌐 Chrome {binaries.browser_version}: {binaries.browser_path}")
+        logger.info(f"🔧 chromedriver {binaries.driver_version}: {binaries.driver_path}")
+        sys.exit(0)
+
+    # Binaires résolus une fois, au premier lancement de Chrome : rien à résoudre si aucune période n'est à télécharger
+    # (le moteur async utilise playwright). Variable d'environnement : héritée aussi par les processus du pool --workers
+    if args.engine != "async":
+        settings.DRIVER_PREPARATION = True
+        os.environ["DRIVER_PREPARATION"] = "1"
+
+    # Mode multi-comptes (une exécution, tous les comptes du fichier)
+    if args.accounts:
+        from .accounts import load_accounts, run_batch
+
+        try:
+            accounts = load_accounts(args.accounts)
+        except ValueError as e:
+            logger.error(f"❌ {e}")
+            sys.exit(1)
+        success = run_batch(
+            accounts,
+            start_date,
+            end_date,
+            max_workers=args.batch_workers,
+            headless=args.headless,
+            engine=args.engine,
+            http_workers=args.http_workers,
+            incremental=args.incremental,
+            store_dir=args.store,
+            archive_raw=args.archive_raw,
+            granularity=args.granularity,
+            hourly_days=args.hourly_days,
+        )
+        if args.metrics_file:
+            write_metrics_file(args.metrics_file)
+        sys.exit(0 if success else 1)
+
+    if args.engine == "async":
+        logger.error("❌ Le moteur async est réservé au mode multi-comptes (--accounts)")
+        sys.exit(1)
+
+    require_credentials()
+
+    # Rattrapage d'historique (file persistante, exécution jusqu'à épuisement de la file)
+    if args.backfill:
+        from .backfill import run_backfill
+
+        success = run_backfill(
+            start_date,
+            end_date,
+            granularity=args.granularity,
+            hourly_days=args.hourly_days,
+            requests_per_hour=args.requests_per_hour,
+            workers=args.http_workers if args.engine == "http" else args.workers,
+            headless=args.headless,
+            engine=args.engine,
+            store_dir=args.store,
+            archive_raw=args.archive_raw,
+        )
+        if args.metrics_file:
+            write_metrics_file(args.metrics_file)
+        sys.exit(0 if success else 1)
+
+    from .browser import BrowserSession
+    from .download import download_consumption_data
+
+    # Mode normal (une seule exécution)
+    if not args.loop:
+        # Profil persistant : la session d'une exécution précédente peut éviter la connexion
+        session = None
+        if args.browser_profile:
+            session = BrowserSession(
+                headless=args.headless,
+                download_dir=DOWNLOAD_DIR,
+                profile_dir=args.browser_profile,
+                capture=args.engine == "capture",
+            )
+        try:
+            success = download_consumption_data(
+                start_date,
+                end_date,
+                headless=args.headless,
+                incremental=args.incremental,
+                session=session,
+                engine=args.engine,
+                http_workers=args.http_workers,
+                workers=args.workers,
+                store_dir=args.store,
+                archive_raw=args.archive_raw,
+                granularity=args.granularity,
+                hourly_days=args.hourly_days,
+            )
+        finally:
+            if session:
+                session.close()
+        if args.metrics_file:
+            write_metrics_file(args.metrics_file)
+        sys.exit(0 if success else 1)
+
+    # Mode boucle : le navigateur reste ouvert entre deux cycles d'une même fenêtre de publication
+    if args.interval:
+        logger.info(f"🔄 Mode boucle activé (intervalle: {args.interval} minutes)")
+    else:
+        logger.info(f"🔄 Mode boucle activé (fenêtre de publication: {PUBLICATION_WINDOW[0]}h-{PUBLICATION_WINDOW[1]}h)")
+        if not args.store:
+            # Sans nombre de points, la veille n'est reconnue complète qu'après DATA_PUBLICATION_DELAY :
+            # avant, chaque relevé de la fenêtre est une exécution complète (connexion et téléchargement)
+            logger.warning(
+                "⚠️ Sans --store, la veille n'est reconnue publiée qu'après midi : "
+                "chaque relevé rouvre le portail d'ici là (--store recommandé avec --loop)"
+            )
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    session = BrowserSession(
+        headless=args.headless,
+        download_dir=DOWNLOAD_DIR,
+        profile_dir=args.browser_profile,
+        capture=args.engine == "capture",
+    )
+    scheduler = PublicationScheduler()
+    # Plan mixte : la veille est toujours récupérée au pas 30 minutes
+    watched_granularity = "hours" if args.granularity == "mixed" else args.granularity
+
+    def yesterday_published() -> bool:
+        yesterday = datetime.now(ZoneInfo(PORTAL_TIMEZONE)).date() - timedelta(days=1)
+        return is_day_published(load_manifest(), yesterday, watched_granularity)
+
+    while True:
+        try:
+            # Veille déjà sur disque (exécution précédente) : pas de navigateur lancé pour rien
+            if args.interval or not yesterday_published():
+                logger.info(f"\n{'='*70}")
+                logger.info(f"🕐 Exécution: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                logger.info(f"{'='*70}\n")
+
+                download_consumption_data(
+                    start_date,
+                    end_date,
+                    headless=args.headless,
+                    incremental=args.incremental,
+                    session=session,
+                    engine=args.engine,
+                    http_workers=args.http_workers,
+                    store_dir=args.store,
+                    archive_raw=args.archive_raw,
+                    granularity=args.granularity,
+                    hourly_days=args.hourly_days,
+                )
+                if args.metrics_file:
+                    write_metrics_file(args.metrics_file)
+
+            if args.interval:
+                logger.info(f"\n⏰ Prochaine exécution dans {args.interval} minutes...")
+                time.sleep(args.interval * 60)
+                continue
+
+            delay, idle = scheduler.next_delay(datetime.now(ZoneInfo(PORTAL_TIMEZONE)), yesterday_published())
+            next_run = (datetime.now() + timedelta(seconds=delay)).strftime("%Y-%m-%d %H:%M")
+            if idle:
+                # Rien avant la prochaine fenêtre : le navigateur est libéré pendant l'attente
+                session.close()
+                logger.info(f"\n💤 Prochaine fenêtre de publication: {next_run}")
+            else:
+                logger.info(f"\n⏰ Données de la veille pas encore publiées, nouveau relevé à {next_run}")
+            time.sleep(delay)
+
+        except KeyboardInterrupt:
+            logger.info("\n🛑 Arrêt demandé par l'utilisateur")
+            session.close()
+            break
+        except Exception as e:
+            logger.error(f"❌ Erreur dans la boucle: {e}")
+            delay = (
+                args.interval * 60
+                if args.interval
+                else scheduler.next_delay(datetime.now(ZoneInfo(PORTAL_TIMEZONE)), False)[0]
+            )
+            logger.info(f"⏰ Nouvelle tentative dans {delay / 60:.0f} minutes...")
+            time.sleep(delay)
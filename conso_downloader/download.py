@@ -0,0 +1,536 @@
+"""
+Téléchargement d'une plage de dates : moteurs ui, capture et http, pool de navigateurs --workers
+"""
+
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional, Union
+
+from selenium import webdriver
+
+from .browser import (
+    BrowserSession,
+    close_driver,
+    open_measures_page,
+    select_date_range,
+    select_granularity,
+    setup_driver,
+    visualize_and_download,
+)
+from .capture import CapturedResponse, archive_captured_response, capture_period_data
+from .http_engine import download_periods_http
+from .metrics import METRICS, WAIT_TIMEOUTS
+from .planning import (
+    clear_run_journal,
+    download_with_retries,
+    journal_plan,
+    load_manifest,
+    load_run_journal,
+    mark_journal_window,
+    mark_period_downloaded,
+    new_run_journal,
+    plan_periods,
+    save_manifest,
+    save_run_journal,
+)
+from .settings import (
+    DOWNLOAD_DIR,
+    GRANULARITY_LABELS,
+    GRANULARITY_MAX_DAYS,
+    HOURLY_HISTORY_DAYS,
+    WORKER_LOGIN_STAGGER,
+    resolve_credentials,
+)
+from .store import ingest_export
+from .utils import validate_date_range
+
+logger = logging.getLogger(__name__)
+
+
+def download_periods_ui(
+    driver: webdriver.Chrome,
+    periods: list,
+    download_dir: str = None,
+    on_success: Optional[Callable[[datetime, datetime, Union[str, CapturedResponse]], None]] = None,
+    capture: bool = False,
+) -> list:
+    """
+    Télécharge les périodes une à une via le calendrier et le bouton Télécharger
+
+    Args:
+        driver: Driver positionné dans l'iframe des mesures, pas de mesure sélectionné
+        periods: Liste de tuples (start, end)
+        download_dir: Répertoire de téléchargement du navigateur (défaut: ./downloads)
+        on_success: Appelé avec (start, end, chemin ou réponse capturée) après chaque période téléchargée
+        capture: Données lues en mémoire après Visualiser (repli sur Télécharger si la capture échoue)
+
+    Returns:
+        Liste de tuples (start, end, résultat) dans l'ordre des périodes ; résultat : chemin du fichier,
+        réponse capturée (moteur capture) ou None en cas d'échec
+    """
+    download_dir = download_dir or DOWNLOAD_DIR
+    results = []
+
+    for i, (period_start, period_end) in enumerate(periods, 1):
+        logger.info(f"\n{'='*70}")
+        logger.info(f"📥 PÉRIODE {i}/{len(periods)}: {period_start.strftime('%d/%m/%Y')} → {period_end.strftime('%d/%m/%Y')}")
+        logger.info(f"{'='*70}")
+
+        file_path = None
+        try:
+            # Sélectionner la période dans le calendrier
+            if not select_date_range(driver, period_start, period_end):
+                logger.error(f"❌ Échec sélection période {i}")
+            else:
+                if capture:
+                    # Visualiser et lire la réponse de l'API en mémoire
+                    file_path = capture_period_data(driver)
+                    if not file_path:
+                        logger.warning("⚠️ Capture impossible, repli sur le bouton Télécharger")
+                if not file_path:
+                    # Visualiser et télécharger
+                    file_path = visualize_and_download(driver, download_dir)
+                if not file_path:
+                    logger.error(f"❌ Échec téléchargement période {i}")
+        except Exception as e:
+            logger.error(f"❌ Erreur période {i}: {e}")
+            file_path = None
+
+        results.append((period_start, period_end, file_path))
+        if not file_path:
+            continue
+
+        if on_success:
+            on_success(period_start, period_end, file_path)
+        logger.info(f"✅ Période {i}/{len(periods)} téléchargée avec succès")
+
+        # Petite pause entre chaque téléchargement
+        if i < len(periods):
+            time.sleep(1)  # Pause réduite entre périodes
+
+    return results
+
+
+def shard_periods(periods: list, workers: int) -> list:
+    """
+    Répartit les périodes en tranches contiguës de tailles équilibrées
+
+    Les tranches contiguës gardent le calendrier de chaque navigateur sur des mois proches.
+
+    Returns:
+        Liste de listes de périodes (au plus `workers` tranches non vides)
+    """
+    workers = max(1, min(workers, len(periods)))
+    base, extra = divmod(len(periods), workers)
+    shards, index = [], 0
+    for worker in range(workers):
+        size = base + (1 if worker < extra else 0)
+        shards.append(periods[index : index + size])
+        index += size
+    return [shard for shard in shards if shard]
+
+
+def _download_worker(
+    worker_id: int,
+    periods: list,
+    headless: bool,
+    download_dir: str,
+    email: Optional[str] = None,
+    password: Optional[str] = None,
+    capture: bool = False,
+    granularity: str = "hours",
+) -> dict:
+    """
+    Processus du pool : navigateur et connexion propres, répertoire de téléchargement dédié
+
+    Returns:
+        {"worker": id, "results": [(start, end, chemin ou None)], "duration": secondes}
+    """
+    started = time.monotonic()
+    # Décaler les connexions pour ne pas présenter N captchas simultanés
+    time.sleep(worker_id * WORKER_LOGIN_STAGGER)
+
+    driver = None
+    results = [(start, end, None) for start, end in periods]
+    try:
+        driver = setup_driver(download_dir=download_dir, headless=headless, capture=capture)
+        if open_measures_page(driver, *resolve_credentials(email, password), granularity):
+            results = download_periods_ui(driver, periods, download_dir, capture=capture)
+        else:
+            logger.error(f"❌ Worker {worker_id}: page des mesures inaccessible")
+    except Exception as e:
+        logger.error(f"❌ Worker {worker_id}: erreur générale {type(e).__name__}")
+        logger.debug(f"Détails: {str(e)}")
+    finally:
+        if driver:
+            close_driver(driver)
+        WAIT_TIMEOUTS.save()
+
+    return {"worker": worker_id, "results": results, "duration": time.monotonic() - started}
+
+
+def _collect_worker_file(file_path: str, download_dir: str) -> str:
+    """Déplace un fichier d'un répertoire de worker vers le répertoire principal (sans écrasement)"""
+    name = os.path.basename(file_path)
+    destination = os.path.join(download_dir, name)
+    root, extension = os.path.splitext(name)
+    suffix = 1
+    while os.path.exists(destination):
+        destination = os.path.join(download_dir, f"{root}_{suffix}{extension}")
+        suffix += 1
+    os.replace(file_path, destination)
+    return destination
+
+
+def download_periods_parallel(
+    periods: list,
+    workers: int,
+    headless: bool = True,
+    download_dir: str = None,
+    email: Optional[str] = None,
+    password: Optional[str] = None,
+    capture: bool = False,
+    granularity: str = "hours",
+) -> list:
+    """
+    Télécharge les périodes avec plusieurs navigateurs connectés en parallèle (pool de processus)
+
+    Chaque worker télécharge dans son propre sous-répertoire (pas de collision de noms),
+    puis les fichiers sont regroupés dans le répertoire principal.
+
+    Args:
+        periods: Liste de tuples (start, end)
+        workers: Nombre de navigateurs simultanés
+        headless: Mode sans interface graphique
+        download_dir: Répertoire principal (défaut: ./downloads)
+        email: Identifiant du compte (défaut: ACCOUNT_EMAIL)
+        password: Mot de passe du compte (défaut: ACCOUNT_PASSWORD)
+        capture: Données lues en mémoire par chaque worker (moteur capture)
+        granularity: Pas de mesure sélectionné par chaque worker
+
+    Returns:
+        Liste de tuples (start, end, résultat) dans l'ordre des périodes ; résultat : chemin du fichier,
+        réponse capturée (moteur capture) ou None en cas d'échec
+    """
+    download_dir = download_dir or DOWNLOAD_DIR
+    shards = shard_periods(periods, workers)
+    logger.info(f"🧵 {len(shards)} navigateur(s) en parallèle pour {len(periods)} période(s)")
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [
+            executor.submit(
+                _download_worker,
+                worker_id,
+                shard,
+                headless,
+                os.path.join(download_dir, f"worker-{worker_id}"),
+                email,
+                password,
+                capture,
+                granularity,
+            )
+            for worker_id, shard in enumerate(shards)
+        ]
+        for worker_id, (future, shard) in enumerate(zip(futures, shards)):
+            try:
+                summaries.append(future.result())
+            except Exception as e:
+                logger.error(f"❌ Worker {worker_id} interrompu: {type(e).__name__}")
+                summaries.append(
+                    {"worker": worker_id, "results": [(start, end, None) for start, end in shard], "duration": 0.0}
+                )
+
+    results = []
+    for summary in summaries:
+        worker_results = [
+            (start, end, _collect_worker_file(path, download_dir) if isinstance(path, str) else path)
+            for start, end, path in summary["results"]
+        ]
+        succeeded = sum(1 for _, _, path in worker_results if path)
+        logger.info(
+            f"   🧵 Worker {summary['worker']}: {succeeded}/{len(worker_results)} période(s) en {summary['duration']:.0f}s"
+        )
+        results.extend(worker_results)
+        try:
+            os.rmdir(os.path.join(download_dir, f"worker-{summary['worker']}"))
+        except OSError:
+            pass  # Répertoire non vide (fichiers inattendus) : conservé pour inspection
+
+    return results
+
+
+def store_downloaded_period(
+    manifest: dict,
+    granularity: str,
+    start_date: datetime,
+    end_date: datetime,
+    file_path: Union[str, CapturedResponse],
+    download_dir: str,
+    store_dir: Optional[str] = None,
+    archive_raw: bool = True,
+) -> None:
+    """
+    Enregistre une période téléchargée : stockage colonnaire, archive brute et manifeste
+
+    Args:
+        manifest: Manifeste chargé via load_manifest (sauvegardé dans download_dir)
+        granularity: Pas de mesure des données
+        start_date: Date de début de la période
+        end_date: Date de fin de la période
+        file_path: Fichier téléchargé ou réponse capturée en mémoire
+        download_dir: Répertoire des fichiers et du manifeste
+        store_dir: Jeu de données Parquet alimenté (None : fichiers seulement)
+        archive_raw: Écrire la réponse capturée sur disque
+    """
+    # Normalisation dans le stockage colonnaire, avec le nombre réel de points par jour
+    intervals_by_day = ingest_export(file_path, store_dir, granularity) if store_dir else None
+    if granularity == "months":
+        # Un point par mois : pas de décompte par journée
+        intervals_by_day = None
+    if isinstance(file_path, CapturedResponse):
+        # Réponse capturée en mémoire : fichier écrit seulement si l'archive brute est demandée
+        file_path = (
+            archive_captured_response(file_path, start_date, end_date, download_dir, granularity) if archive_raw else None
+        )
+    mark_period_downloaded(
+        manifest, start_date, end_date, file_path, intervals_by_day=intervals_by_day, granularity=granularity
+    )
+    save_manifest(manifest, download_dir)
+
+
+def download_consumption_data(  # noqa: C901
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    headless: bool = False,
+    incremental: bool = False,
+    session: Optional[BrowserSession] = None,
+    engine: str = "ui",
+    http_workers: int = 4,
+    workers: int = 1,
+    store_dir: Optional[str] = None,
+    download_dir: Optional[str] = None,
+    email: Optional[str] = None,
+    password: Optional[str] = None,
+    prm: Optional[str] = None,
+    archive_raw: bool = False,
+    granularity: str = "hours",
+    hourly_days: int = HOURLY_HISTORY_DAYS,
+) -> bool:
+    """
+    Télécharge les données de consommation pour la période spécifiée.
+    Découpe automatiquement en périodes de la taille maximale du pas de mesure (7 jours au pas 30 minutes).
+
+    Args:
+        start_date (Optional[datetime]): Date de début (par défaut: J-7)
+        end_date (Optional[datetime]): Date de fin (par défaut: hier)
+        headless (bool): Mode sans interface graphique (défaut: False = visible)
+        incremental (bool): Ne télécharge que les journées absentes du manifeste
+        session (Optional[BrowserSession]): Session persistante à réutiliser (mode boucle)
+        engine (str): "ui" (calendrier + Télécharger), "http" (appels directs à l'API après connexion)
+            ou "capture" (calendrier + Visualiser, réponse de l'API lue en mémoire via CDP)
+        http_workers (int): Nombre de requêtes simultanées du moteur HTTP
+        workers (int): Nombre de navigateurs connectés en parallèle (moteur ui, hors mode boucle)
+        store_dir (Optional[str]): Jeu de données Parquet alimenté après chaque téléchargement
+        download_dir (Optional[str]): Répertoire des fichiers et du manifeste (défaut: ./downloads)
+        email (Optional[str]): Identifiant du compte (défaut: ACCOUNT_EMAIL)
+        password (Optional[str]): Mot de passe du compte (défaut: ACCOUNT_PASSWORD)
+        prm (Optional[str]): Point de livraison interrogé par le moteur HTTP (défaut: PRM)
+        archive_raw (bool): Moteur capture : conserver aussi les réponses brutes dans download_dir
+            (toujours le cas sans store_dir, sinon les données seraient perdues)
+        granularity (str): Pas de mesure : "hours" (courbe 30 minutes), "days", "months"
+            ou "mixed" (hourly_days derniers jours au pas 30 minutes, historique au pas journalier)
+        hourly_days (int): Plan mixte : nombre de jours récents récupérés au pas 30 minutes
+
+    Returns:
+        bool: True si succès complet, False si au moins une erreur
+
+    Raises:
+        ValueError: Si les dates sont invalides
+    """
+
+    # Supprimer les warnings de subprocess (termination des processus)
+    warnings.filterwarnings("ignore", category=ResourceWarning)
+    warnings.filterwarnings("ignore", message=".*subprocess.*")
+
+    # Validation et normalisation des dates
+    try:
+        start_date, end_date = validate_date_range(start_date, end_date)
+    except ValueError as e:
+        logger.error(f"❌ Dates invalides: {e}")
+        return False
+
+    download_dir = download_dir or DOWNLOAD_DIR
+    email, password = resolve_credentials(email, password)
+    # En session persistante, le navigateur télécharge dans le répertoire fixé à son lancement
+    browser_download_dir = session.download_dir if session is not None else download_dir
+    capture = engine == "capture"
+    archive_raw = archive_raw or not store_dir
+
+    manifest = load_manifest(download_dir)
+
+    # Reprise d'une exécution interrompue (mêmes paramètres) : seules les périodes non terminées sont rejouées
+    run = {
+        "start": start_date.date().isoformat(),
+        "end": end_date.date().isoformat(),
+        "granularity": granularity,
+        "hourly_days": hourly_days,
+        "incremental": incremental,
+        "prm": prm,
+    }
+    journal = load_run_journal(run, download_dir)
+    if journal is not None:
+        plan = journal_plan(journal)
+        remaining = sum(len(step_periods) for _, step_periods in plan)
+        logger.info(f"♻️ Reprise de l'exécution du {journal['started_at']}: {remaining} période(s) restante(s)")
+    else:
+        # Découper la période en sous-périodes (taille maximale propre à chaque pas de mesure)
+        plan = plan_periods(manifest, start_date, end_date, granularity, incremental=incremental, hourly_days=hourly_days)
+        journal = new_run_journal(run, plan)
+    if not plan:
+        logger.info(f"✅ {'Mode incrémental: t' if incremental else 'T'}outes les journées demandées sont déjà téléchargées")
+        clear_run_journal(download_dir)
+        return True
+    save_run_journal(journal, download_dir)
+    periods = [period for _, step_periods in plan for period in step_periods]
+
+    total_days = (end_date - start_date).days + 1
+    logger.info(f"🚀 Démarrage du téléchargement: {start_date.strftime('%d/%m/%Y')} → {end_date.strftime('%d/%m/%Y')}")
+    for step, step_periods in plan:
+        logger.info(
+            f"📊 Pas '{GRANULARITY_LABELS[step]}': {len(step_periods)} période(s) de {GRANULARITY_MAX_DAYS[step]} jours max"
+        )
+    logger.info(f"📊 Période totale: {total_days} jours - Découpage en {len(periods)} période(s)")
+    if incremental:
+        missing_days = sum((end - start).days + 1 for start, end in periods)
+        logger.info(f"🧩 Mode incrémental: {missing_days}/{total_days} jour(s) manquant(s)")
+
+    def record_success(
+        step: str, period_start: datetime, period_end: datetime, file_path: Union[str, CapturedResponse]
+    ) -> None:
+        # Manifeste et journal mis à jour après chaque période : un arrêt brutal ne perd rien
+        store_downloaded_period(manifest, step, period_start, period_end, file_path, download_dir, store_dir, archive_raw)
+        mark_journal_window(journal, step, period_start, period_end, "done")
+        save_run_journal(journal, download_dir)
+
+    driver = None
+    results = []
+    selected = None  # Pas de mesure affiché dans l'iframe (moteurs ui et capture)
+    parallel = workers > 1 and engine in ("ui", "capture") and session is None and len(periods) > 1
+
+    def fetch(step: str, step_periods: list) -> list:
+        nonlocal selected
+        if parallel or engine == "http":
+            if parallel:
+                # Pool de navigateurs indépendants, une tranche de périodes chacun
+                step_results = download_periods_parallel(
+                    step_periods,
+                    workers,
+                    headless=headless,
+                    download_dir=download_dir,
+                    email=email,
+                    password=password,
+                    capture=capture,
+                    granularity=step,
+                )
+            else:
+                # Moteur HTTP : toutes les périodes en parallèle via l'API, sans calendrier
+                step_results = download_periods_http(
+                    driver, step_periods, download_dir=download_dir, max_workers=http_workers, prm=prm, granularity=step
+                )
+            for period_start, period_end, file_path in step_results:
+                if file_path:
+                    record_success(step, period_start, period_end, file_path)
+        elif step != selected and not select_granularity(driver, step):
+            step_results = [(period_start, period_end, None) for period_start, period_end in step_periods]
+        else:
+            # Calendrier : chaque période est enregistrée dès son téléchargement
+            selected = step
+            step_results = download_periods_ui(
+                driver,
+                step_periods,
+                browser_download_dir,
+                on_success=lambda *result: record_success(step, *result),
+                capture=capture,
+            )
+
+        for period_start, period_end, file_path in step_results:
+            if not file_path:
+                mark_journal_window(journal, step, period_start, period_end, "failed")
+        save_run_journal(journal, download_dir)
+        return step_results
+
+    def reenter_measures_page(step: str) -> bool:
+        # Page dérivée (iframe rechargée, session expirée, mauvais pas) : retour à un état connu
+        nonlocal selected
+        selected = None
+        if not open_measures_page(driver, email, password, step):
+            return False
+        selected = step
+        return True
+
+    try:
+        if not parallel:
+            if session is not None:
+                # 1-8. Réutiliser la session persistante (reconnexion seulement si expirée)
+                driver = session.prepare()
+                if driver is None:
+                    return False
+            else:
+                # 1. Initialiser le driver UNE SEULE FOIS avec le mode headless
+                driver = setup_driver(download_dir=download_dir, headless=headless, capture=capture)
+
+                # 2-8. Connexion, navigation, iframe et mode Heures
+                if not open_measures_page(driver, email, password):
+                    return False
+            selected = "hours"
+
+        # 9. Périodes de chaque pas de mesure, nouvelles tentatives des périodes en échec
+        for step, step_periods in plan:
+            results.extend(
+                download_with_retries(
+                    step_periods,
+                    lambda periods, step=step: fetch(step, periods),
+                    before_retry=None if parallel or engine == "http" else lambda step=step: reenter_measures_page(step),
+                )
+            )
+
+        success_count = sum(1 for _, _, file_path in results if file_path)
+        error_count = len(results) - success_count
+        METRICS.increment("periods", success_count, result="success")
+        METRICS.increment("periods", error_count, result="error")
+        METRICS.last_run = time.time()
+
+        # 10. Résumé final
+        logger.info("\n" + "=" * 70)
+        logger.info("📊 RÉSUMÉ")
+        logger.info("=" * 70)
+        logger.info(f"✅ Succès: {success_count}/{len(periods)} périodes")
+        logger.info(f"❌ Erreurs: {error_count}/{len(periods)} périodes")
+
+        if error_count == 0:
+            clear_run_journal(download_dir)
+            logger.info("🎉 Téléchargement complet terminé avec succès!")
+            return True
+        elif success_count > 0:
+            logger.warning("⚠️ Téléchargement partiel - certaines périodes ont échoué")
+            logger.info("🧾 Relancer la même commande reprend les périodes en échec (journal de reprise)")
+            return False
+        else:
+            logger.error("❌ Échec complet - aucune période téléchargée")
+            return False
+
+    except Exception as e:
+        logger.error(f"❌ Erreur générale: {type(e).__name__}")
+        logger.debug(f"Détails: {str(e)}")  # Détails seulement en mode debug
+        # Ne PAS afficher le traceback complet en production (risque de fuite d'info)
+        return False
+
+    finally:
+        if driver and session is None:
+            close_driver(driver)
+        WAIT_TIMEOUTS.save()
@@ -0,0 +1,112 @@
+"""
+Détection de la fin d'un téléchargement de Chrome (inotify si disponible, sinon polling)
+"""
+
+import logging
+import os
+import time
+from typing import Optional
+
+from .settings import DOWNLOAD_POLL_INTERVAL, DOWNLOAD_TIMEOUT, PARTIAL_DOWNLOAD_SUFFIXES
+
+try:
+    # Surveillance du répertoire de téléchargement par inotify (Linux, optionnel)
+    from inotify_simple import INotify
+    from inotify_simple import flags as inotify_flags
+except ImportError:
+    INotify = None
+
+logger = logging.getLogger(__name__)
+
+
+def _is_partial_download(name: str) -> bool:
+    """Fichier temporaire de Chrome : téléchargement encore en cours"""
+    if name.startswith("."):
+        # Seuls les fichiers cachés de Chrome comptent : les .tmp du manifeste et du journal n'en sont pas
+        return name.startswith(".com.google.Chrome")
+    return name.endswith(PARTIAL_DOWNLOAD_SUFFIXES)
+
+
+def list_download_files(download_dir: str) -> set:
+    """Liste les fichiers présents dans le répertoire de téléchargement"""
+    try:
+        return {entry.name for entry in os.scandir(download_dir) if entry.is_file()}
+    except FileNotFoundError:
+        return set()
+
+
+def _open_download_watcher(download_dir: str):
+    """Ouvre une surveillance inotify du répertoire (None si indisponible : polling)"""
+    if INotify is None:
+        return None
+    try:
+        watcher = INotify()
+        watcher.add_watch(
+            download_dir,
+            inotify_flags.CREATE | inotify_flags.MODIFY | inotify_flags.MOVED_TO | inotify_flags.CLOSE_WRITE,
+        )
+        return watcher
+    except OSError:
+        return None
+
+
+def _wait_for_directory_change(watcher, timeout: float) -> None:
+    """Bloque jusqu'au prochain évènement du répertoire (ou timeout), ou dort en mode polling"""
+    if watcher is not None:
+        watcher.read(timeout=int(timeout * 1000))
+    else:
+        time.sleep(min(timeout, DOWNLOAD_POLL_INTERVAL))
+
+
+def wait_for_download(
+    download_dir: str,
+    known_files: set,
+    timeout: float = DOWNLOAD_TIMEOUT,
+    settle_time: float = 0.5,
+) -> Optional[str]:
+    """
+    Attend qu'un nouveau fichier soit entièrement téléchargé
+
+    Le téléchargement est terminé quand il n'y a plus de fichier .crdownload
+    et que la taille du nouveau fichier est stable pendant settle_time.
+    Utilise inotify si disponible (réveil immédiat), sinon du polling.
+
+    Args:
+        download_dir: Répertoire de téléchargement
+        known_files: Fichiers présents avant le clic sur Télécharger
+        timeout: Durée maximale d'attente en secondes
+        settle_time: Durée de stabilité de la taille exigée en secondes
+
+    Returns:
+        Chemin du fichier téléchargé, ou None si rien n'est arrivé à temps
+    """
+    deadline = time.monotonic() + timeout
+    watcher = _open_download_watcher(download_dir)
+    stable_file, stable_size, stable_since = None, None, 0.0
+
+    try:
+        while True:
+            new_files = list_download_files(download_dir) - known_files
+            pending = [name for name in new_files if _is_partial_download(name)]
+            # Les fichiers cachés (manifeste, journaux) ne sont jamais des exports
+            completed = [name for name in new_files if not name.startswith(".") and not _is_partial_download(name)]
+            now = time.monotonic()
+
+            if completed and not pending:
+                newest = max(completed, key=lambda name: os.path.getmtime(os.path.join(download_dir, name)))
+                size = os.path.getsize(os.path.join(download_dir, newest))
+                if (newest, size) != (stable_file, stable_size):
+                    stable_file, stable_size, stable_since = newest, size, now
+                elif now - stable_since >= settle_time:
+                    logger.info(f"📄 Fichier reçu: {newest} ({size} octets)")
+                    return os.path.join(download_dir, newest)
+
+            remaining = deadline - now
+            if remaining <= 0:
+                logger.warning(f"⚠️ Téléchargement non terminé après {timeout:.0f}s")
+                return None
+
+            _wait_for_directory_change(watcher, min(remaining, settle_time if stable_file else 1.0))
+    finally:
+        if watcher is not None:
+            watcher.close()
@@ -0,0 +1,281 @@
+"""
+Préparation de Chrome et chromedriver : binaires résolus une seule fois, chromedriver partagé entre sessions
+
+Sans préparation, chaque webdriver.Chrome(options=options) relance Selenium Manager (résolution et
+contrôle de version des binaires) puis démarre son propre processus chromedriver. prepare_driver()
+résout les binaires une fois par version de Chrome (cache invalidé par la date de modification du
+binaire) ; les sessions suivantes du processus s'ouvrent ensuite sur un chromedriver déjà démarré.
+"""
+
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import threading
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
+from selenium.webdriver.common.selenium_manager import SeleniumManager
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from . import settings
+from .planning import _write_json_atomic
+from .settings import CHROME_BINARY, DRIVER_CACHE_FILE, SHARED_DRIVER_SERVICE
+
+logger = logging.getLogger(__name__)
+
+# Noms usuels du binaire Chrome dans le PATH, avant de laisser Selenium Manager le chercher
+CHROME_CANDIDATES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+_VERSION_PATTERN = re.compile(r"(\d+(?:\.\d+)+)")
+
+
+class DriverBinaries(NamedTuple):
+    """Chemins et versions de Chrome et chromedriver"""
+
+    browser_path: str
+    driver_path: str
+    browser_version: Optional[str] = None
+    driver_version: Optional[str] = None
+
+
+def _binary_version(path: str) -> Optional[str]:
+    """Version affichée par `<binaire> --version` (None si illisible)"""
+    try:
+        output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10, check=False).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION_PATTERN.search(output)
+    return match.group(1) if match else None
+
+
+def _major(version: Optional[str]) -> Optional[str]:
+    return version.split(".")[0] if version else None
+
+
+def find_chrome_binary(browser_path: Optional[str] = None) -> Optional[str]:
+    """Binaire Chrome : paramètre, variable CHROME_BINARY, sinon premier nom usuel trouvé dans le PATH"""
+    if browser_path or CHROME_BINARY:
+        return browser_path or CHROME_BINARY
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return os.path.realpath(path)
+    return None
+
+
+def load_driver_cache(cache_file: str = None) -> dict:
+    """Charge le cache des binaires (vide si absent ou illisible)"""
+    cache_file = cache_file or DRIVER_CACHE_FILE
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"⚠️ Cache des binaires illisible, nouvelle résolution: {e}")
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _cached_binaries(cache: dict, browser_path: Optional[str]) -> Optional[DriverBinaries]:
+    """Entrée du cache encore valide : même Chrome, binaire inchangé depuis la résolution, chromedriver présent"""
+    entry = cache.get("chrome")
+    if not entry or (browser_path and os.path.realpath(browser_path) != os.path.realpath(entry["browser_path"])):
+        return None
+    try:
+        if os.stat(entry["browser_path"]).st_mtime != entry["browser_mtime"] or not os.path.isfile(entry["driver_path"]):
+            return None
+    except (OSError, KeyError):
+        return None
+    return DriverBinaries(
+        entry["browser_path"], entry["driver_path"], entry.get("browser_version"), entry.get("driver_version")
+    )
+
+
+def resolve_driver_binaries(browser_path: Optional[str] = None, cache_file: str = None) -> Optional[DriverBinaries]:
+    """
+    Résout les chemins de Chrome et chromedriver, depuis le cache tant que Chrome n'a pas changé
+
+    Args:
+        browser_path: Binaire Chrome à utiliser (défaut: CHROME_BINARY, sinon recherche dans le PATH)
+        cache_file: Fichier de cache (défaut: DRIVER_CACHE_FILE)
+
+    Returns:
+        Les binaires, ou None si Selenium Manager n'a pas pu les résoudre
+    """
+    cache_file = cache_file or DRIVER_CACHE_FILE
+    browser_path = find_chrome_binary(browser_path)
+
+    binaries = _cached_binaries(load_driver_cache(cache_file), browser_path)
+    if binaries is not None:
+        logger.debug(f"♻️ Binaires du cache: Chrome {binaries.browser_version}, chromedriver {binaries.driver_version}")
+        return binaries
+
+    args = ["--browser", "chrome"]
+    if browser_path:
+        args += ["--browser-path", browser_path]
+    try:
+        paths = SeleniumManager().binary_paths(args)
+        browser_path, driver_path = paths["browser_path"], paths["driver_path"]
+        browser_mtime = os.stat(browser_path).st_mtime
+    except Exception as e:
+        logger.warning(f"⚠️ Résolution de Chrome/chromedriver impossible, Selenium Manager à chaque lancement: {e}")
+        return None
+
+    binaries = DriverBinaries(browser_path, driver_path, _binary_version(browser_path), _binary_version(driver_path))
+    if _major(binaries.browser_version) != _major(binaries.driver_version):
+        logger.warning(f"⚠️ Versions différentes: Chrome {binaries.browser_version}, chromedriver {binaries.driver_version}")
+    logger.info(f"🔎 Chrome {binaries.browser_version} et chromedriver {binaries.driver_version} résolus")
+
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        _write_json_atomic(
+            cache_file,
+            {
+                "version": 1,
+                "chrome": {
+                    **binaries._asdict(),
+                    "browser_mtime": browser_mtime,
+                    "resolved_at": datetime.now().isoformat(timespec="seconds"),
+                },
+            },
+        )
+    except OSError as e:
+        logger.warning(f"⚠️ Cache des binaires non enregistré: {e}")
+    return binaries
+
+
+class AttachedChrome(webdriver.Chrome):
+    """
+    Session Chrome ouverte sur un chromedriver déjà démarré
+
+    Mêmes commandes que webdriver.Chrome (CDP, journaux), mais quit() ne ferme que le
+    navigateur : le processus chromedriver reste disponible pour la session suivante.
+    """
+
+    def __init__(self, service: Service, options: Options):
+        self.service = service
+        self.options = options
+        executor = ChromiumRemoteConnection(
+            remote_server_addr=service.service_url,
+            browser_name=DesiredCapabilities.CHROME["browserName"],
+            vendor_prefix="goog",
+            keep_alive=True,
+            ignore_proxy=getattr(options, "_ignore_local_proxy", False),
+        )
+        RemoteWebDriver.__init__(self, command_executor=executor, options=options)
+        self._is_remote = False
+
+    def quit(self) -> None:
+        try:
+            RemoteWebDriver.quit(self)
+        except Exception:
+            pass  # Navigateur déjà fermé
+
+
+class SharedDriverService:
+    """
+    Processus chromedriver unique auquel se rattachent les sessions d'un processus
+
+    Démarré à la première session, redémarré s'il ne répond plus, arrêté par stop()
+    (appelé à la sortie du programme).
+    """
+
+    def __init__(self, driver_path: str):
+        self.driver_path = driver_path
+        self.pid = os.getpid()
+        self._service = None
+        self._lock = threading.Lock()
+
+    def _running_service(self) -> Service:
+        with self._lock:
+            if self._service is None or not self._service.is_connectable():
+                if self._service is not None:
+                    logger.warning("⚠️ chromedriver partagé ne répond plus, redémarrage")
+                    self._service.stop()
+                self._service = Service(executable_path=self.driver_path)
+                self._service.start()
+                logger.info(f"🚀 chromedriver partagé démarré ({self._service.service_url})")
+            return self._service
+
+    def new_driver(self, options: Options) -> webdriver.Chrome:
+        """Ouvre une session Chrome sur le chromedriver partagé"""
+        return AttachedChrome(self._running_service(), options)
+
+    def stop(self) -> None:
+        """Arrête le processus chromedriver"""
+        with self._lock:
+            if self._service is not None:
+                self._service.stop()
+                self._service = None
+
+
+_prepared_binaries = None
+_shared_service = None
+_shared_lock = threading.Lock()
+_preparation_done = False
+_preparation_lock = threading.Lock()
+
+
+def prepare_driver(shared: bool = None, browser_path: Optional[str] = None) -> Optional[DriverBinaries]:
+    """
+    Étape préalable aux lancements de Chrome : binaires résolus (ou relus du cache) une fois
+
+    Les lancements suivants de ce processus utilisent ces chemins sans passer par Selenium Manager.
+    Appelée par new_chrome_driver() au premier lancement si DRIVER_PREPARATION est activé : les
+    processus de --workers héritent de la préparation du parent (fork) ou la refont depuis le cache
+    (spawn), sans chromedriver partagé.
+
+    Args:
+        shared: Sessions rattachées à un chromedriver unique (défaut: SHARED_DRIVER_SERVICE)
+        browser_path: Binaire Chrome à utiliser (défaut: CHROME_BINARY, sinon recherche dans le PATH)
+
+    Returns:
+        Les binaires, ou None (lancements par défaut de Selenium)
+    """
+    global _prepared_binaries, _shared_service, _preparation_done
+
+    binaries = resolve_driver_binaries(browser_path)
+    shared = SHARED_DRIVER_SERVICE if shared is None else shared
+    with _shared_lock:
+        _prepared_binaries = binaries
+        _preparation_done = True
+        if _shared_service is not None:
+            _shared_service.stop()
+        _shared_service = SharedDriverService(binaries.driver_path) if binaries and shared else None
+        if _shared_service is not None:
+            atexit.register(_shared_service.stop)
+    return binaries
+
+
+def new_chrome_driver(options: Options) -> webdriver.Chrome:
+    """
+    Lance Chrome avec les binaires préparés par prepare_driver()
+
+    Session sur le chromedriver partagé dans le processus qui l'a préparé, chromedriver propre
+    (chemin connu, sans Selenium Manager) dans les processus fils, lancement Selenium par défaut
+    sans préparation.
+    """
+    if settings.DRIVER_PREPARATION and not _preparation_done:
+        with _preparation_lock:
+            if not _preparation_done:
+                # Processus fils (--workers) : pas de chromedriver partagé, il survivrait au processus
+                prepare_driver(shared=False if multiprocessing.parent_process() else None)
+    if _prepared_binaries is None:
+        return webdriver.Chrome(options=options)
+
+    options.binary_location = _prepared_binaries.browser_path
+    # Processus fils (--workers) : pas de chromedriver partagé, il survivrait au processus
+    if _shared_service is not None and _shared_service.pid == os.getpid():
+        return _shared_service.new_driver(options)
+    return webdriver.Chrome(options=options, service=Service(executable_path=_prepared_binaries.driver_path))
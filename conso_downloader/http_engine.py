@@ -0,0 +1,188 @@
+"""
+Moteur HTTP direct : appels à l'API de mesures avec les identifiants de la session du navigateur
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium import webdriver
+from urllib3.util.retry import Retry
+
+from .metrics import stage_timer
+from .planning import period_file_name
+from .settings import DOWNLOAD_DIR, GRANULARITY_LABELS, MEASURES_API_URL, PRM, is_secure_url
+from .store import extension_for_content_type, is_data_content_type
+
+logger = logging.getLogger(__name__)
+
+
+# Recherche d'un jeton JWT (Bearer) dans le stockage web de l'application
+_FIND_BEARER_TOKEN_JS = """
+const jwt = /[A-Za-z0-9_-]+\\.[A-Za-z0-9_-]+\\.[A-Za-z0-9_-]+/;
+for (const name of ["sessionStorage", "localStorage"]) {
+    let store;
+    try { store = window[name]; } catch (e) { continue; }
+    for (let i = 0; i < store.length; i++) {
+        const key = store.key(i);
+        if (!/token/i.test(key)) continue;
+        const match = (store.getItem(key) || "").match(jwt);
+        if (match) return match[0];
+    }
+}
+return null;
+"""
+
+
+def capture_session_credentials(driver: webdriver.Chrome) -> dict:
+    """
+    Récupère les éléments d'authentification du navigateur connecté
+
+    À appeler depuis l'iframe des mesures : les cookies et le jeton sont ceux
+    du domaine de l'application Angular qui interroge l'API.
+
+    Returns:
+        dict avec "cookies" (liste Selenium), "token" (Bearer ou None) et "user_agent"
+    """
+    credentials = {
+        "cookies": driver.get_cookies(),
+        "token": driver.execute_script(_FIND_BEARER_TOKEN_JS),
+        "user_agent": driver.execute_script("return navigator.userAgent"),
+    }
+    logger.info(
+        f"🔑 Session capturée: {len(credentials['cookies'])} cookie(s), "
+        f"jeton Bearer {'présent' if credentials['token'] else 'absent'}"
+    )
+    return credentials
+
+
+def build_http_session(credentials: dict, pool_size: int = 4) -> requests.Session:
+    """
+    Construit une session HTTP (pool de connexions + retries) à partir de la session navigateur
+
+    Args:
+        credentials: Résultat de capture_session_credentials
+        pool_size: Nombre de connexions simultanées conservées par hôte
+    """
+    http = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+
+    for cookie in credentials.get("cookies", []):
+        http.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+
+    http.headers["Accept"] = "application/json, text/csv, */*"
+    if credentials.get("user_agent"):
+        http.headers["User-Agent"] = credentials["user_agent"]
+    if credentials.get("token"):
+        http.headers["Authorization"] = f"Bearer {credentials['token']}"
+    return http
+
+
+def fetch_period_http(
+    http: requests.Session,
+    start_date: datetime,
+    end_date: datetime,
+    url_template: str,
+    download_dir: str = None,
+    prm: str = "",
+    timeout: float = 30,
+    granularity: str = "hours",
+) -> Optional[str]:
+    """
+    Télécharge une période directement depuis l'API de mesures
+
+    Returns:
+        Chemin du fichier écrit, ou None en cas d'échec
+    """
+    download_dir = download_dir or DOWNLOAD_DIR
+    url = url_template.format(
+        start=start_date.date(),
+        end=end_date.date(),
+        end_exclusive=end_date.date() + timedelta(days=1),
+        prm=prm,
+        step=GRANULARITY_LABELS[granularity].lower(),
+    )
+    label = f"{start_date.strftime('%d/%m/%Y')} → {end_date.strftime('%d/%m/%Y')}"
+
+    try:
+        with stage_timer("http_fetch"):
+            response = http.get(url, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.error(f"❌ Échec requête API {label}: {type(e).__name__}")
+        logger.debug(f"Détails: {str(e)}")
+        return None
+
+    content_type = response.headers.get("Content-Type", "")
+    if not is_data_content_type(content_type):
+        # Page de connexion ou d'erreur servie en 200 (jeton expiré) : fenêtre en échec, reprise au prochain passage
+        logger.error(f"❌ Réponse API {label} non exploitable ({content_type}), session probablement expirée")
+        return None
+
+    extension = extension_for_content_type(content_type)
+    file_path = os.path.join(download_dir, period_file_name(start_date, end_date, extension, granularity, prm))
+    with open(file_path, "wb") as f:
+        f.write(response.content)
+
+    logger.info(f"✅ Période {label} récupérée via API ({len(response.content)} octets)")
+    return file_path
+
+
+def download_periods_http(
+    driver: webdriver.Chrome,
+    periods: list,
+    url_template: str = None,
+    download_dir: str = None,
+    max_workers: int = 4,
+    prm: str = None,
+    granularity: str = "hours",
+) -> list:
+    """
+    Télécharge plusieurs périodes en parallèle via l'API, sans passer par le calendrier
+
+    Args:
+        driver: Driver connecté, positionné dans l'iframe des mesures
+        periods: Liste de tuples (start, end)
+        url_template: Gabarit d'URL de l'API (défaut: MEASURES_API_URL)
+        download_dir: Répertoire de destination (défaut: ./downloads)
+        max_workers: Nombre de requêtes simultanées
+        prm: Identifiant du point de livraison (défaut: PRM)
+        granularity: Pas de mesure demandé à l'API (variable {step} du gabarit)
+
+    Returns:
+        Liste de tuples (start, end, chemin ou None) dans l'ordre des périodes
+    """
+    url_template = url_template or MEASURES_API_URL
+    if not url_template:
+        logger.error("❌ Moteur HTTP: MEASURES_API_URL non configurée")
+        return [(start, end, None) for start, end in periods]
+    if not is_secure_url(url_template):
+        logger.error("❌ Moteur HTTP: MEASURES_API_URL doit utiliser HTTPS")
+        return [(start, end, None) for start, end in periods]
+
+    download_dir = download_dir or DOWNLOAD_DIR
+    os.makedirs(download_dir, exist_ok=True)
+    prm = PRM if prm is None else prm
+
+    http = build_http_session(capture_session_credentials(driver), pool_size=max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            paths = list(
+                executor.map(
+                    lambda period: fetch_period_http(
+                        http, period[0], period[1], url_template, download_dir, prm, granularity=granularity
+                    ),
+                    periods,
+                )
+            )
+    finally:
+        http.close()
+
+    return [(start, end, path) for (start, end), path in zip(periods, paths)]
@@ -0,0 +1,250 @@
+"""
+Métriques des étapes (OpenMetrics) et délais d'attente adaptatifs
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Tuple
+
+from .settings import (
+    ADAPTIVE_ALPHA,
+    ADAPTIVE_MARGIN,
+    ADAPTIVE_MIN_SAMPLES,
+    METRICS_PREFIX,
+    STAGE_BUCKETS,
+    STAGE_STATS_FILE,
+    WAIT_DEFAULTS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StageMetrics:
+    """
+    Registre des durées d'étapes (histogramme) et des compteurs de périodes
+
+    Partagé par tous les threads du processus. Les navigateurs du pool --workers
+    tournent dans des processus séparés : leurs étapes ne remontent pas ici.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms = {}  # étape -> [compteurs par bucket, somme, nombre]
+        self._counters = {}  # (nom, tuple de labels) -> valeur
+        self.last_run = None
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Enregistre une durée d'étape"""
+        with self._lock:
+            histogram = self._histograms.setdefault(stage, [[0] * len(self.buckets), 0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Incrémente un compteur (ex: periods, result="success")"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        """Copie des histogrammes {étape: {"count", "sum"}} (tests, résumé)"""
+        with self._lock:
+            return {stage: {"count": h[2], "sum": h[1]} for stage, h in self._histograms.items()}
+
+    def render(self) -> str:
+        """Exposition au format texte OpenMetrics"""
+        name = f"{METRICS_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# TYPE {name} histogram",
+            f"# HELP {name} Durée des étapes du pipeline de téléchargement",
+            f"# UNIT {name} seconds",
+        ]
+        with self._lock:
+            for stage in sorted(self._histograms):
+                bucket_counts, total, count = self._histograms[stage]
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{float(bound)}"}} {bucket_count}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+            for counter in sorted({counter for counter, _ in self._counters}):
+                lines.append(f"# TYPE {METRICS_PREFIX}_{counter} counter")
+                for (other, labels), value in sorted(self._counters.items()):
+                    if other == counter:
+                        label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+                        lines.append(f"{METRICS_PREFIX}_{counter}_total{{{label_text}}} {value}")
+
+            if self.last_run is not None:
+                lines.append(f"# TYPE {METRICS_PREFIX}_last_run_timestamp_seconds gauge")
+                lines.append(f"{METRICS_PREFIX}_last_run_timestamp_seconds {self.last_run:.3f}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.last_run = None
+
+
+METRICS = StageMetrics()
+
+
+class AdaptiveTimeouts:
+    """
+    Délais d'attente appris à partir des durées observées lors des exécutions précédentes
+
+    Chaque attente nommée (WAIT_DEFAULTS) conserve une moyenne et une variance mobiles
+    exponentielles, persistées dans un petit fichier JSON. Le délai suivant vaut
+    (moyenne + 3 écarts-types) x marge, borné entre 20 % et 300 % du délai par défaut :
+    il se resserre sur un portail rapide et s'allonge quand le portail ralentit
+    (un dépassement compte comme une mesure égale au délai écoulé).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or STAGE_STATS_FILE
+        self.stats = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self.stats is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.stats = json.load(f).get("waits", {})
+            except (OSError, ValueError, AttributeError):
+                self.stats = {}
+        return self.stats
+
+    def timeout(self, name: str) -> float:
+        """Délai d'attente à utiliser pour l'attente nommée"""
+        default, _ = WAIT_DEFAULTS[name]
+        with self._lock:
+            entry = self._load().get(name)
+        if not entry or entry["count"] < ADAPTIVE_MIN_SAMPLES:
+            return default
+        learned = (entry["mean"] + 3 * entry["var"] ** 0.5) * ADAPTIVE_MARGIN
+        return round(min(max(learned, default * 0.2, 1.0), default * 3), 2)
+
+    def fallback(self, name: str) -> float:
+        """Pause de repli après un dépassement : durée habituelle de l'attente, plafonnée au défaut"""
+        _, default = WAIT_DEFAULTS[name]
+        with self._lock:
+            entry = self._load().get(name)
+        if not default or not entry or entry["count"] < ADAPTIVE_MIN_SAMPLES:
+            return default
+        return round(min(max(entry["mean"], 0.5), default), 2)
+
+    def record(self, name: str, elapsed: float, completed: bool) -> None:
+        """Ajoute une durée observée (attente réussie ou délai dépassé)"""
+        with self._lock:
+            entry = self._load().setdefault(name, {"mean": elapsed, "var": 0.0, "count": 0, "timeouts": 0})
+            if entry["count"]:
+                diff = elapsed - entry["mean"]
+                increment = ADAPTIVE_ALPHA * diff
+                entry["mean"] += increment
+                entry["var"] = (1 - ADAPTIVE_ALPHA) * (entry["var"] + diff * increment)
+            entry["count"] += 1
+            if not completed:
+                entry["timeouts"] += 1
+            self._dirty = True
+
+    def save(self) -> None:
+        """Persiste les statistiques si de nouvelles mesures ont été ajoutées (écriture atomique)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": 1, "waits": self.stats}, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                logger.debug(f"Statistiques d'attente non sauvegardées: {e}")
+
+
+WAIT_TIMEOUTS = AdaptiveTimeouts()
+
+
+def adaptive_wait(name: str, wait: Callable[[float], object]):
+    """
+    Exécute une attente avec son délai appris et enregistre sa durée
+
+    Args:
+        name: Attente nommée (clé de WAIT_DEFAULTS)
+        wait: Fonction recevant le délai (secondes), retournant une valeur vraie si réussie
+
+    Returns:
+        Le résultat de l'attente (faux si le délai est dépassé)
+    """
+    started = time.monotonic()
+    result = wait(WAIT_TIMEOUTS.timeout(name))
+    WAIT_TIMEOUTS.record(name, time.monotonic() - started, bool(result))
+    return result
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Chronomètre le bloc et l'ajoute à l'histogramme (y compris en cas d'exception)"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        METRICS.observe(stage, time.monotonic() - started)
+
+
+def write_metrics_file(path: str) -> None:
+    """
+    Écrit les métriques au format OpenMetrics (collecteur textfile de node_exporter)
+
+    Écriture atomique : le collecteur ne lit jamais un fichier à moitié écrit.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(METRICS.render())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Sert /metrics au format OpenMetrics"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = METRICS.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Pas de log par scrape
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Démarre le point de collecte http://host:port/metrics dans un thread (mode boucle)
+
+    Écoute en local par défaut : à exposer via un reverse proxy si besoin.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"📈 Métriques OpenMetrics: http://{host}:{server.server_address[1]}/metrics")
+    return server
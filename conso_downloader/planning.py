@@ -0,0 +1,419 @@
+"""
+Planification des téléchargements : découpage en périodes, manifeste des journées stockées, journal de reprise
+"""
+
+import json
+import logging
+import os
+import stat
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+from .settings import (
+    DATA_PUBLICATION_DELAY,
+    DOWNLOAD_DIR,
+    GRANULARITIES,
+    GRANULARITY_MAX_DAYS,
+    HOURLY_HISTORY_DAYS,
+    MANIFEST_FILE,
+    PERIOD_RETRIES,
+    PORTAL_TIMEZONE,
+    RETRY_BACKOFF,
+    RUN_JOURNAL_FILE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def split_date_range(start_date: datetime, end_date: datetime, max_days: int = 7) -> list:
+    """
+    Découpe une période en sous-périodes de max_days jours maximum
+
+    Args:
+        start_date: Date de début
+        end_date: Date de fin
+        max_days: Nombre maximum de jours par période (défaut: 7)
+
+    Returns:
+        Liste de tuples (start, end) pour chaque sous-période
+    """
+    periods = []
+    current_start = start_date
+
+    while current_start <= end_date:
+        # Calculer la date de fin pour cette période
+        current_end = min(current_start + timedelta(days=max_days - 1), end_date)
+        periods.append((current_start, current_end))
+
+        # Passer à la période suivante
+        current_start = current_end + timedelta(days=1)
+
+    return periods
+
+
+def granularity_suffix(granularity: str) -> str:
+    """Suffixe des fichiers d'agrégats (la courbe 30 minutes garde le nom historique)"""
+    return "" if granularity == "hours" else f"_{granularity}"
+
+
+def period_file_name(
+    start_date: datetime, end_date: datetime, extension: str, granularity: str = "hours", prm: str = ""
+) -> str:
+    """Nom de fichier propre à une période (moteurs HTTP, capture et asynchrone)"""
+    suffix = (f"_{prm}" if prm else "") + granularity_suffix(granularity)
+    return f"conso_{start_date:%Y%m%d}_{end_date:%Y%m%d}{suffix}.{extension}"
+
+
+def load_manifest(download_dir: str = None) -> dict:
+    """
+    Charge le manifeste des journées déjà téléchargées
+
+    Args:
+        download_dir: Répertoire de téléchargement (défaut: ./downloads)
+
+    Returns:
+        Manifeste {"version": 1, "days": {"YYYY-MM-DD": {...}}} (vide si absent ou illisible)
+    """
+    path = os.path.join(download_dir or DOWNLOAD_DIR, MANIFEST_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if isinstance(manifest, dict) and isinstance(manifest.get("days"), dict):
+            return manifest
+        logger.warning("⚠️ Manifeste invalide, reconstruction complète")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Manifeste illisible ({type(e).__name__}), reconstruction complète")
+    return {"version": 1, "days": {}}
+
+
+def _write_json_atomic(path: str, data: dict) -> None:
+    """Écrit un fichier JSON de façon atomique (permissions 600)"""
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    try:
+        os.chmod(tmp_path, stat.S_IRUSR | stat.S_IWUSR)  # 600
+    except Exception:
+        pass  # Ignorer si impossible (Windows par exemple)
+    os.replace(tmp_path, path)
+
+
+def save_manifest(manifest: dict, download_dir: str = None) -> None:
+    """Écrit le manifeste de façon atomique (permissions 600)"""
+    download_dir = download_dir or DOWNLOAD_DIR
+    os.makedirs(download_dir, exist_ok=True)
+    _write_json_atomic(os.path.join(download_dir, MANIFEST_FILE), manifest)
+
+
+def mark_period_downloaded(
+    manifest: dict,
+    start_date: datetime,
+    end_date: datetime,
+    file_path: Optional[str] = None,
+    downloaded_at: Optional[datetime] = None,
+    intervals_by_day: Optional[dict] = None,
+    granularity: str = "hours",
+) -> None:
+    """
+    Enregistre dans le manifeste les journées couvertes par une période téléchargée
+
+    Args:
+        manifest: Manifeste chargé via load_manifest
+        start_date: Date de début de la période
+        end_date: Date de fin de la période
+        file_path: Fichier contenant les données (si connu)
+        downloaded_at: Horodatage du téléchargement (défaut: maintenant)
+        intervals_by_day: Nombre de points réellement lus par journée (None si le fichier n'a pas été analysé)
+        granularity: Pas de mesure des données ("hours", "days" ou "months")
+    """
+    downloaded_at = downloaded_at or datetime.now()
+    day = start_date.date()
+    while day <= end_date.date():
+        manifest["days"][day.isoformat()] = {
+            "downloaded_at": downloaded_at.isoformat(timespec="seconds"),
+            "intervals": intervals_by_day.get(day, 0) if intervals_by_day is not None else None,
+            "file": os.path.basename(file_path) if file_path else None,
+            "granularity": granularity,
+        }
+        day += timedelta(days=1)
+
+
+def expected_intervals(day: date) -> int:
+    """Nombre de points au pas 30 minutes d'une journée locale (46 ou 50 aux changements d'heure)"""
+    tz = ZoneInfo(PORTAL_TIMEZONE)
+    day_start = datetime.combine(day, datetime.min.time(), tzinfo=tz)
+    next_day_start = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+    # Soustraction en UTC : entre deux datetimes du même fuseau, Python ignore le changement d'heure
+    duration = next_day_start.astimezone(timezone.utc) - day_start.astimezone(timezone.utc)
+    return int(duration.total_seconds() // 1800)
+
+
+def is_day_complete(manifest: dict, day: date, granularity: str = "hours") -> bool:
+    """
+    Indique si une journée est entièrement présente sur disque au pas demandé
+
+    Une journée téléchargée avant la fin de sa publication (J-1 récupéré trop tôt)
+    est considérée incomplète et sera re-téléchargée. Une journée récupérée à un pas
+    plus fin que celui demandé est complète, l'inverse non.
+    """
+    entry = manifest["days"].get(day.isoformat())
+    if not entry:
+        return False
+
+    # Entrées antérieures aux pas de mesure : courbe 30 minutes
+    entry_granularity = entry.get("granularity", "hours")
+    if GRANULARITIES.index(entry_granularity) > GRANULARITIES.index(granularity):
+        return False
+
+    # Nombre de points inconnu (fichier non analysé) : la journée est supposée complète
+    intervals = entry.get("intervals")
+    expected = expected_intervals(day) if entry_granularity == "hours" else 1
+    if intervals is not None and intervals < expected:
+        return False
+
+    try:
+        downloaded_at = datetime.fromisoformat(entry["downloaded_at"])
+    except (KeyError, TypeError, ValueError):
+        return False
+
+    day_end = datetime.combine(day, datetime.min.time()) + timedelta(days=1)
+    return downloaded_at >= day_end + DATA_PUBLICATION_DELAY
+
+
+def is_day_published(manifest: dict, day: date, granularity: str = "hours") -> bool:
+    """
+    Indique si les données publiées d'une journée ont déjà été récupérées
+
+    Avec le nombre de points connu (--store), une journée complète l'est quelle que soit
+    l'heure du téléchargement ; sinon, même règle que is_day_complete.
+    """
+    entry = manifest["days"].get(day.isoformat())
+    if not entry or entry.get("intervals") is None:
+        return is_day_complete(manifest, day, granularity)
+
+    entry_granularity = entry.get("granularity", "hours")
+    if GRANULARITIES.index(entry_granularity) > GRANULARITIES.index(granularity):
+        return False
+    return entry["intervals"] >= (expected_intervals(day) if entry_granularity == "hours" else 1)
+
+
+def compute_missing_periods(
+    manifest: dict, start_date: datetime, end_date: datetime, max_days: int = 7, granularity: str = "hours"
+) -> list:
+    """
+    Calcule les périodes à télécharger en ignorant les journées déjà complètes
+
+    Args:
+        manifest: Manifeste chargé via load_manifest
+        start_date: Date de début demandée
+        end_date: Date de fin demandée
+        max_days: Nombre maximum de jours par période (défaut: 7)
+        granularity: Pas de mesure demandé ("hours", "days" ou "months")
+
+    Returns:
+        Liste de tuples (start, end) ne couvrant que les journées manquantes ou incomplètes
+    """
+    periods = []
+    gap_start = None
+    day = start_date.date()
+    last_day = end_date.date()
+
+    while day <= last_day:
+        if is_day_complete(manifest, day, granularity):
+            if gap_start is not None:
+                periods.extend(split_date_range(gap_start, _to_datetime(day - timedelta(days=1)), max_days))
+                gap_start = None
+        elif gap_start is None:
+            gap_start = _to_datetime(day)
+        day += timedelta(days=1)
+
+    if gap_start is not None:
+        periods.extend(split_date_range(gap_start, _to_datetime(last_day), max_days))
+
+    return periods
+
+
+def plan_periods(
+    manifest: dict,
+    start_date: datetime,
+    end_date: datetime,
+    granularity: str = "hours",
+    incremental: bool = False,
+    hourly_days: int = HOURLY_HISTORY_DAYS,
+) -> list:
+    """
+    Construit le plan de téléchargement : périodes regroupées par pas de mesure
+
+    Chaque pas utilise sa propre taille de période (GRANULARITY_MAX_DAYS). Le pas "mixed"
+    récupère les hourly_days derniers jours au pas 30 minutes et l'historique plus ancien
+    au pas journalier, en une période au lieu d'une par semaine.
+
+    Args:
+        manifest: Manifeste chargé via load_manifest
+        start_date: Date de début demandée
+        end_date: Date de fin demandée
+        granularity: "hours", "days", "months" ou "mixed"
+        incremental: Ne planifier que les journées absentes ou incomplètes au pas voulu
+        hourly_days: Plan mixte : nombre de jours récents récupérés au pas 30 minutes
+
+    Returns:
+        Liste de tuples (pas, périodes) dans l'ordre chronologique, sans groupe vide
+    """
+    if granularity == "mixed":
+        cutoff = max(start_date, end_date - timedelta(days=hourly_days - 1))
+        ranges = [("days", start_date, cutoff - timedelta(days=1)), ("hours", cutoff, end_date)]
+    else:
+        ranges = [(granularity, start_date, end_date)]
+
+    plan = []
+    for step, range_start, range_end in ranges:
+        if range_start.date() > range_end.date():
+            continue
+        max_days = GRANULARITY_MAX_DAYS[step]
+        if incremental:
+            periods = compute_missing_periods(manifest, range_start, range_end, max_days, step)
+        else:
+            periods = split_date_range(range_start, range_end, max_days)
+        if periods:
+            plan.append((step, periods))
+    return plan
+
+
+def new_run_journal(run: dict, plan: list) -> dict:
+    """
+    Crée le journal d'une exécution : une entrée par période planifiée, à l'état "pending"
+
+    Args:
+        run: Paramètres identifiant l'exécution (dates demandées, pas, PRM...)
+        plan: Plan construit par plan_periods
+    """
+    return {
+        "version": 1,
+        "run": run,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "windows": [
+            {
+                "granularity": step,
+                "start": start.date().isoformat(),
+                "end": end.date().isoformat(),
+                "state": "pending",
+                "attempts": 0,
+            }
+            for step, periods in plan
+            for start, end in periods
+        ],
+    }
+
+
+def load_run_journal(run: dict, download_dir: str = None) -> Optional[dict]:
+    """
+    Charge le journal d'une exécution interrompue ou partiellement en échec
+
+    Returns:
+        Le journal si ses paramètres correspondent à `run`, None sinon (absent, illisible ou autre exécution)
+    """
+    path = os.path.join(download_dir or DOWNLOAD_DIR, RUN_JOURNAL_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            journal = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Journal de reprise illisible ({type(e).__name__}), nouvelle exécution")
+        return None
+    if not isinstance(journal, dict) or journal.get("run") != run or not isinstance(journal.get("windows"), list):
+        return None
+    return journal
+
+
+def save_run_journal(journal: dict, download_dir: str = None) -> None:
+    """Écrit le journal de reprise de façon atomique (permissions 600)"""
+    download_dir = download_dir or DOWNLOAD_DIR
+    os.makedirs(download_dir, exist_ok=True)
+    _write_json_atomic(os.path.join(download_dir, RUN_JOURNAL_FILE), journal)
+
+
+def clear_run_journal(download_dir: str = None) -> None:
+    """Supprime le journal d'une exécution terminée sans erreur"""
+    try:
+        os.remove(os.path.join(download_dir or DOWNLOAD_DIR, RUN_JOURNAL_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def journal_plan(journal: dict) -> list:
+    """
+    Plan des périodes restant à télécharger (en attente ou en échec), regroupées par pas de mesure
+
+    Returns:
+        Liste de tuples (pas, périodes) au format de plan_periods
+    """
+    plan = []
+    for window in journal["windows"]:
+        if window["state"] == "done":
+            continue
+        period = (_to_datetime(date.fromisoformat(window["start"])), _to_datetime(date.fromisoformat(window["end"])))
+        if plan and plan[-1][0] == window["granularity"]:
+            plan[-1][1].append(period)
+        else:
+            plan.append((window["granularity"], [period]))
+    return plan
+
+
+def mark_journal_window(journal: dict, granularity: str, start_date: datetime, end_date: datetime, state: str) -> None:
+    """Enregistre le résultat d'une tentative ("done" ou "failed") pour une période du journal"""
+    for window in journal["windows"]:
+        if (window["granularity"], window["start"], window["end"]) == (
+            granularity,
+            start_date.date().isoformat(),
+            end_date.date().isoformat(),
+        ):
+            window["state"] = state
+            window["attempts"] += 1
+            return
+
+
+def download_with_retries(
+    periods: list,
+    fetch: Callable[[list], list],
+    retries: int = PERIOD_RETRIES,
+    backoff: float = RETRY_BACKOFF,
+    before_retry: Optional[Callable[[], bool]] = None,
+) -> list:
+    """
+    Télécharge des périodes puis retente celles en échec avec un délai exponentiel
+
+    Args:
+        periods: Liste de tuples (start, end)
+        fetch: Télécharge une liste de périodes, retourne [(start, end, résultat ou None)]
+        retries: Nombre maximal de nouvelles tentatives
+        backoff: Délai avant la première nouvelle tentative (doublé ensuite)
+        before_retry: Remet la page dans un état connu (iframe, pas de mesure) ; False = essai sauté
+
+    Returns:
+        Liste de tuples (start, end, résultat ou None) dans l'ordre des périodes
+    """
+    results = fetch(periods)
+    for attempt in range(1, retries + 1):
+        failed = [(start, end) for start, end, result in results if not result]
+        if not failed:
+            break
+        delay = backoff * 2 ** (attempt - 1)
+        logger.warning(f"🔁 {len(failed)} période(s) en échec, nouvelle tentative {attempt}/{retries} dans {delay:.0f}s")
+        time.sleep(delay)
+        if before_retry is not None and not before_retry():
+            logger.warning("⚠️ Page des mesures inaccessible, tentative sautée")
+            continue
+        retried = {(start, end): result for start, end, result in fetch(failed)}
+        results = [(start, end, result or retried.get((start, end))) for start, end, result in results]
+    return results
+
+
+def _to_datetime(day: date) -> datetime:
+    """Convertit une date en datetime à minuit"""
+    return datetime.combine(day, datetime.min.time())
@@ -0,0 +1,127 @@
+"""
+Profilage des commandes WebDriver (--profile) : nombre et durée des allers-retours HTTP par fonction
+
+Chaque appel anodin (is_displayed, text, get_attribute, find_elements...) est une requête
+HTTP vers chromedriver. Le profileur enveloppe command_executor.execute du driver et attribue
+chaque commande à la fonction du paquet qui l'a déclenchée.
+"""
+
+import sys
+import threading
+import time
+from typing import Optional
+
+# Modules dont les fonctions ne sont que des intermédiaires (attentes, chronomètres) : commande attribuée à l'appelant
+_TRANSPARENT_MODULES = (f"{__package__}.metrics", __name__)
+# Fonctions utilitaires dont les commandes sont aussi attribuées à l'appelant
+_TRANSPARENT_FUNCTIONS = ("snapshot_elements",)
+
+
+def _calling_function(frame) -> str:
+    """Première fonction publique du paquet dans la pile (hors lambdas, fonctions privées et intermédiaires)"""
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        name = frame.f_code.co_name
+        if (
+            module.startswith(f"{__package__}.")
+            and module not in _TRANSPARENT_MODULES
+            and not name.startswith(("_", "<"))
+            and name not in _TRANSPARENT_FUNCTIONS
+        ):
+            return name
+        frame = frame.f_back
+    return "<hors paquet>"
+
+
+class RpcProfiler:
+    """
+    Compteurs et durées des commandes WebDriver par (fonction appelante, commande)
+
+    Partagé par tous les threads du processus. Les navigateurs du pool --workers
+    tournent dans des processus séparés : leurs commandes ne remontent pas ici.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # (fonction, commande) -> [nombre, durée totale]
+
+    def record(self, function: str, command: str, seconds: float) -> None:
+        """Enregistre une commande"""
+        with self._lock:
+            entry = self._calls.setdefault((function, command), [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def attach(self, driver) -> None:
+        """Enveloppe l'exécuteur de commandes du driver (sans effet s'il l'est déjà)"""
+        executor = driver.command_executor
+        if getattr(executor, "_rpc_profiler", None) is self:
+            return
+        execute = executor.execute
+
+        def profiled_execute(command, params=None):
+            started = time.perf_counter()
+            try:
+                return execute(command, params)
+            finally:
+                self.record(_calling_function(sys._getframe(1)), command, time.perf_counter() - started)
+
+        executor.execute = profiled_execute
+        executor._rpc_profiler = self
+
+    def summary(self) -> list:
+        """
+        Commandes regroupées par fonction, de la plus coûteuse à la moins coûteuse
+
+        Returns:
+            Liste de {"function", "count", "seconds", "commands": {commande: {"count", "seconds"}}}
+        """
+        functions = {}
+        with self._lock:
+            for (function, command), (count, seconds) in self._calls.items():
+                entry = functions.setdefault(function, {"function": function, "count": 0, "seconds": 0.0, "commands": {}})
+                entry["count"] += count
+                entry["seconds"] += seconds
+                entry["commands"][command] = {"count": count, "seconds": seconds}
+        return sorted(functions.values(), key=lambda entry: entry["seconds"], reverse=True)
+
+    def report(self, top_commands: int = 3) -> str:
+        """Rapport texte trié par durée totale, avec les commandes les plus coûteuses de chaque fonction"""
+        summary = self.summary()
+        count = sum(entry["count"] for entry in summary)
+        seconds = sum(entry["seconds"] for entry in summary)
+        lines = [
+            f"📊 Commandes WebDriver: {count} en {seconds:.2f}s",
+            f"   {'fonction':<32} {'commandes':>9} {'total':>9} {'moyenne':>9}  principales commandes",
+        ]
+        for entry in summary:
+            commands = sorted(entry["commands"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+            details = ", ".join(f"{command} ×{stats['count']}" for command, stats in commands[:top_commands])
+            lines.append(
+                f"   {entry['function']:<32} {entry['count']:>9} {entry['seconds']:>8.2f}s "
+                f"{1000 * entry['seconds'] / entry['count']:>7.1f}ms  {details}"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._calls.clear()
+
+
+# Profileur actif (--profile), None sinon
+RPC_PROFILER: Optional[RpcProfiler] = None
+
+
+def enable_rpc_profiler() -> RpcProfiler:
+    """Active le profilage des drivers lancés ensuite par setup_driver"""
+    global RPC_PROFILER
+
+    if RPC_PROFILER is None:
+        RPC_PROFILER = RpcProfiler()
+    return RPC_PROFILER
+
+
+def profile_driver(driver) -> None:
+    """Profile les commandes du driver si --profile est actif"""
+    if RPC_PROFILER is not None:
+        RPC_PROFILER.attach(driver)
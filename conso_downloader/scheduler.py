@@ -0,0 +1,72 @@
+"""
+Planification du mode boucle selon la publication quotidienne des données de la veille
+"""
+
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+from .settings import POLL_BACKOFF, POLL_BACKOFF_MAX, PUBLICATION_WINDOW, SCHEDULE_JITTER
+
+
+class PublicationScheduler:
+    """
+    Planification du mode boucle selon la publication des données de la veille
+
+    La courbe de J-1 n'est publiée qu'une fois par jour : hors de la fenêtre de publication,
+    ou une fois la veille récupérée, rien n'est relevé avant la fenêtre suivante. Dans la
+    fenêtre, les relevés sont espacés exponentiellement tant que la veille manque. Un
+    décalage aléatoire évite que plusieurs instances interrogent le portail au même instant.
+    """
+
+    def __init__(
+        self,
+        window: Tuple[int, int] = PUBLICATION_WINDOW,
+        backoff: float = POLL_BACKOFF,
+        max_backoff: float = POLL_BACKOFF_MAX,
+        jitter: int = SCHEDULE_JITTER,
+    ):
+        """
+        Args:
+            window: Heures locales (début, fin) de la fenêtre de publication
+            backoff: Délai après le premier relevé sans nouvelle journée (secondes)
+            max_backoff: Délai maximal entre deux relevés (secondes)
+            jitter: Décalage aléatoire maximal de l'ouverture de la fenêtre (secondes)
+        """
+        self.window = window
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.attempt = 0
+
+    def next_delay(self, now: datetime, published: bool) -> Tuple[float, bool]:
+        """
+        Délai avant le prochain relevé
+
+        Args:
+            now: Heure courante (fuseau du portail)
+            published: Données de la veille déjà récupérées
+
+        Returns:
+            (délai en secondes, True si le délai attend la prochaine fenêtre de publication)
+        """
+        start_hour, end_hour = self.window
+        window_start = now.replace(hour=start_hour, minute=0, second=0, microsecond=0)
+        window_end = now.replace(hour=end_hour, minute=0, second=0, microsecond=0)
+
+        if not published and window_start <= now < window_end:
+            delay = min(self.backoff * 2**self.attempt, self.max_backoff)
+            delay += secrets.randbelow(int(delay * 0.1) + 1)
+            self.attempt += 1
+            # Dernier relevé à la fermeture de la fenêtre, puis attente de la suivante
+            return min(delay, _seconds_between(now, window_end)), False
+
+        self.attempt = 0
+        if published or now >= window_start:
+            window_start += timedelta(days=1)
+        return _seconds_between(now, window_start) + secrets.randbelow(self.jitter + 1), True
+
+
+def _seconds_between(start: datetime, end: datetime) -> float:
+    """Durée réelle entre deux heures locales (changement d'heure compris)"""
+    return (end.astimezone(timezone.utc) - start.astimezone(timezone.utc)).total_seconds()
@@ -0,0 +1,231 @@
+"""
+Configuration : variables d'environnement, identifiants, constantes et journalisation
+
+Aucun effet de bord à l'import : les identifiants sont lus à la demande, la journalisation
+est configurée par la ligne de commande et Selenium n'est importé qu'avec le navigateur.
+"""
+
+import logging
+import os
+import re
+import stat
+import sys
+from datetime import timedelta
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = os.getenv("BASE_URL", "https://mon-compte-particulier.enedis.fr/")
+LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+LOG_FILE = "downloader.log"
+
+# Répertoire de téléchargement par défaut et manifeste des données déjà stockées
+DOWNLOAD_DIR = os.path.join(os.getcwd(), "downloads")
+MANIFEST_FILE = ".manifest.json"
+# Journal de reprise de l'exécution en cours (état de chaque période) et nouvelles tentatives des périodes en échec
+RUN_JOURNAL_FILE = ".run_journal.json"
+PERIOD_RETRIES = int(os.getenv("PERIOD_RETRIES", "2"))
+RETRY_BACKOFF = 10  # Secondes avant la première nouvelle tentative, doublées à chaque essai
+# Rattrapage d'historique pluriannuel (--backfill) : file SQLite des périodes, budget de requêtes par heure
+BACKFILL_DB_FILE = ".backfill.sqlite"
+BACKFILL_REQUESTS_PER_HOUR = int(os.getenv("BACKFILL_REQUESTS_PER_HOUR", "30"))
+BACKFILL_MAX_ATTEMPTS = 5  # Exécutions en échec avant d'abandonner une période
+PORTAL_TIMEZONE = "Europe/Paris"  # Fuseau des horodatages du portail
+# Noms de colonnes reconnus dans les exports (CSV/XLSX) et les réponses JSON de l'API
+EXPORT_TIME_COLUMNS = ("horodate", "date", "date_heure", "timestamp")
+EXPORT_VALUE_COLUMNS = ("valeur", "value", "puissance", "consommation")
+# Marge après la fin d'une journée avant de considérer ses données comme publiées en totalité
+DATA_PUBLICATION_DELAY = timedelta(hours=12)
+# Mode boucle : fenêtre quotidienne de publication de la veille (heures locales du portail, début et fin),
+# relevés espacés exponentiellement tant que la veille manque, décalage aléatoire entre instances (secondes)
+PUBLICATION_WINDOW = (int(os.getenv("PUBLICATION_START_HOUR", "6")), int(os.getenv("PUBLICATION_END_HOUR", "20")))
+POLL_BACKOFF = 15 * 60  # Premier délai entre deux relevés dans la fenêtre, doublé à chaque relevé sans nouvelle journée
+POLL_BACKOFF_MAX = 3 * 3600
+SCHEDULE_JITTER = int(os.getenv("SCHEDULE_JITTER", "900"))
+# Pas de mesure proposés par le portail (du plus fin au plus grossier) : libellé du sélecteur et
+# taille maximale d'une période en jours (surchargeable par MAX_DAYS_HOURS, MAX_DAYS_DAYS, MAX_DAYS_MONTHS)
+GRANULARITY_LABELS = {"hours": "Heures", "days": "Jours", "months": "Mois"}
+GRANULARITIES = tuple(GRANULARITY_LABELS)
+GRANULARITY_MAX_DAYS = {
+    granularity: int(os.getenv(f"MAX_DAYS_{granularity.upper()}", default))
+    for granularity, default in (("hours", "7"), ("days", "366"), ("months", "366"))
+}
+# Plan mixte (--granularity mixed) : derniers jours au pas 30 minutes, historique plus ancien au pas journalier
+HOURLY_HISTORY_DAYS = 30
+# Détection de fin de téléchargement (fichiers temporaires Chrome, délai maximal, polling de repli)
+PARTIAL_DOWNLOAD_SUFFIXES = (".crdownload", ".tmp", ".part")
+DOWNLOAD_TIMEOUT = 60
+DOWNLOAD_POLL_INTERVAL = 0.2
+# Décalage entre les connexions des navigateurs du pool (--workers), en secondes
+WORKER_LOGIN_STAGGER = 5
+# Options du mode multi-comptes prises en charge par le moteur async (un contexte de navigation par compte)
+ASYNC_ENGINE_OPTIONS = ("headless", "incremental", "store_dir", "granularity", "hourly_days")
+# Préparation du navigateur : chemins et versions de Chrome et chromedriver résolus une seule fois par Selenium Manager,
+# conservés jusqu'à la mise à jour de Chrome ; un chromedriver partagé par toutes les sessions d'un même processus
+DRIVER_CACHE_FILE = os.getenv("DRIVER_CACHE_FILE") or os.path.join(DOWNLOAD_DIR, ".driver_cache.json")
+CHROME_BINARY = os.getenv("CHROME_BINARY")
+SHARED_DRIVER_SERVICE = os.getenv("SHARED_DRIVER_SERVICE", "1") != "0"
+# Préparation au premier lancement de Chrome du processus (activée par la ligne de commande)
+DRIVER_PREPARATION = os.getenv("DRIVER_PREPARATION") == "1"
+# Blocage des ressources inutiles au téléchargement (CDP Network.setBlockedURLs)
+# Profil choisi par --block-resources ou BLOCK_RESOURCES, motifs supplémentaires dans BLOCKED_URLS (séparés par ",")
+_STATIC_EXTENSIONS = ("png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "woff", "woff2", "ttf", "otf", "eot", "mp4", "webm")
+_STATIC_PATTERNS = tuple(pattern for ext in _STATIC_EXTENSIONS for pattern in (f"*.{ext}", f"*.{ext}?*"))
+_TRACKER_PATTERNS = (
+    "*tagcommander*",
+    "*trustcommander*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*facebook.net*",
+    "*hotjar.com*",
+    "*contentsquare.net*",
+    "*abtasty.com*",
+)
+RESOURCE_BLOCKING_PROFILES = {
+    "none": (),
+    "static": _STATIC_PATTERNS,  # images, polices, vidéos
+    "full": _STATIC_PATTERNS + _TRACKER_PATTERNS,  # + mesure d'audience et TagCommander (popup cookies)
+}
+# Jamais bloqué : un motif contenant l'un de ces fragments est ignoré (login, captcha, iframe des mesures)
+RESOURCE_BLOCKING_ALLOW_LIST = ("captcha", "idtoken", "auth", "login", "mes-mesures", "donnees-de-mesures", "api")
+RESOURCE_BLOCKING = os.getenv("BLOCK_RESOURCES", "none")
+# Popups de consentement connues (bouton "Tout accepter") et cookie mémorisant le consentement
+CONSENT_POPIN_BUTTONS = ("popin_tc_privacy_button_3",)
+CONSENT_COOKIE = "TC_PRIVACY"
+# Page d'accueil chargée : popup de consentement ou formulaire de connexion, sinon bouton du menu (déjà connecté)
+PAGE_READY_SELECTOR = "#popin_tc_privacy_button_3, #idToken1"
+PAGE_READY_BUTTON = "ma consommation"
+# Attentes événementielles (MutationObserver) : durée maximale d'un script asynchrone et pause
+# avant de relancer une attente interrompue par un changement de page
+DOM_WAIT_SCRIPT_TIMEOUT = 60
+DOM_WAIT_RETRY_INTERVAL = 0.1
+# Délais adaptatifs : (délai par défaut, pause de repli après dépassement) par attente nommée, en secondes
+WAIT_DEFAULTS = {
+    "page_ready": (5, 3),
+    "captcha": (30, 2),
+    "password_field": (5, 3),
+    "post_login": (8, 5),
+    "menu_links": (3, 2),
+    "iframe_present": (5, 3),
+    "iframe": (20, 0),
+    "iframe_ready": (10, 0),
+    "heures": (8, 5),
+    "calendar_button": (3, 2),
+    "download_button": (10, 8),
+    "download": (DOWNLOAD_TIMEOUT, 0),
+    "capture": (DOWNLOAD_TIMEOUT, 0),
+}
+STAGE_STATS_FILE = os.getenv("STAGE_STATS_FILE") or os.path.join(DOWNLOAD_DIR, ".stage_stats.json")
+ADAPTIVE_ALPHA = 0.2  # Poids de la dernière mesure dans la moyenne mobile exponentielle
+ADAPTIVE_MIN_SAMPLES = 5  # Mesures nécessaires avant de remplacer le délai par défaut
+ADAPTIVE_MARGIN = 1.5  # Marge appliquée à moyenne + 3 écarts-types
+# Histogramme des durées d'étapes (secondes) exporté au format OpenMetrics
+METRICS_PREFIX = "enedis"
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+# Moteur HTTP direct : URL de l'API de mesures appelée par l'application Angular de l'iframe
+# Gabarit avec {start}, {end}, {end_exclusive} (dates, format personnalisable: {start:%d-%m-%Y}), {prm}
+# et {step} (pas de mesure : heures, jours ou mois)
+MEASURES_API_URL = os.getenv("MEASURES_API_URL")
+PRM = os.getenv("PRM", "")
+# Moteur capture : réponses chargées par le graphique (bouton Visualiser) lues en mémoire via CDP
+CAPTURE_URL_PATTERN = re.compile(os.getenv("CAPTURE_URL_PATTERN", r"mesures|consommation|courbe"), re.IGNORECASE)
+CAPTURE_CONTENT_TYPES = ("json", "csv", "spreadsheet", "excel")
+CAPTURE_POLL_INTERVAL = 0.2
+CAPTURE_BUFFER_SIZE = 50 * 1024 * 1024  # Corps de réponses conservés par Chrome pour Network.getResponseBody
+
+
+# Liste de User-Agents réalistes pour rotation
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
+]
+
+
+def resolve_credentials(email: Optional[str] = None, password: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Identifiants fournis, complétés par ceux du compte unique
+
+    Priorité 1 : variables d'environnement ACCOUNT_EMAIL / ACCOUNT_PASSWORD (plus sécurisé).
+    Priorité 2 : fichier config.py (EMAIL, PASSWORD), importé seulement si nécessaire.
+
+    Returns:
+        Tuple (email, password), None pour un identifiant introuvable
+    """
+    if email and password:
+        return email, password
+
+    default_email = os.getenv("ACCOUNT_EMAIL")
+    default_password = os.getenv("ACCOUNT_PASSWORD")
+    if not default_email or not default_password:
+        try:
+            import config
+
+            default_email = default_email or getattr(config, "EMAIL", None)
+            default_password = default_password or getattr(config, "PASSWORD", None)
+        except ImportError:
+            pass  # Pas de config.py : variables d'environnement uniquement
+
+    return email or default_email, password or default_password
+
+
+def require_credentials() -> None:
+    """Quitte avec une erreur si les identifiants du compte unique ne sont pas configurés"""
+    email, password = resolve_credentials()
+    if not email or not password:
+        print("❌ ERREUR: Identifiants non configurés!")
+        print("Définissez les variables d'environnement ACCOUNT_EMAIL et ACCOUNT_PASSWORD")
+        print("Ou créez un fichier config.py avec EMAIL et PASSWORD")
+        print("Ou utilisez --accounts pour le mode multi-comptes")
+        sys.exit(1)
+
+
+def is_secure_url(url: str) -> bool:
+    """HTTPS obligatoire, HTTP toléré uniquement en local (serveurs de test)"""
+    parsed = urlparse(url or "")
+    if parsed.scheme == "https":
+        return True
+    return parsed.scheme == "http" and parsed.hostname in LOOPBACK_HOSTS
+
+
+def require_secure_base_url(url: str = None) -> None:
+    """Quitte avec une erreur si l'URL du portail n'est pas en HTTPS (HTTP accepté uniquement en local)"""
+    url = url or BASE_URL
+    if url and not is_secure_url(url):
+        print("❌ ERREUR: BASE_URL doit utiliser HTTPS pour la sécurité!")
+        print(f"URL fournie: {url}")
+        sys.exit(1)
+
+
+def configure_logging(log_file: str = LOG_FILE) -> None:
+    """
+    Journalisation console + fichier avec rotation automatique (10 MB max, 3 sauvegardes)
+
+    Appelée par la ligne de commande uniquement : importer le paquet ne crée aucun fichier.
+    """
+    from logging.handlers import RotatingFileHandler
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            RotatingFileHandler(log_file, maxBytes=10_000_000, backupCount=3),
+            logging.StreamHandler(),
+        ],
+    )
+
+    # Définir les permissions du fichier log (600 = lecture/écriture propriétaire uniquement)
+    if os.path.exists(log_file):
+        try:
+            os.chmod(log_file, stat.S_IRUSR | stat.S_IWUSR)  # 600
+            logger.debug("🔒 Permissions log définies: 600 (propriétaire uniquement)")
+        except Exception:
+            pass  # Ignorer si impossible (Windows par exemple)
+
+    # Désactiver les warnings et erreurs de fermeture de Selenium/urllib3
+    logging.getLogger("urllib3").setLevel(logging.ERROR)
+    logging.getLogger("selenium.webdriver.remote.remote_connection").setLevel(logging.ERROR)
@@ -0,0 +1,312 @@
+"""
+Lecture des exports (CSV, XLSX, JSON) et stockage colonnaire Parquet
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
+
+from .settings import EXPORT_TIME_COLUMNS, EXPORT_VALUE_COLUMNS, PORTAL_TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+
+def is_data_content_type(content_type: str) -> bool:
+    """Faux pour une page web (connexion, erreur) renvoyée à la place des mesures"""
+    return "html" not in (content_type or "").lower()
+
+
+def extension_for_content_type(content_type: str) -> str:
+    """Déduit l'extension du fichier à partir du Content-Type de la réponse"""
+    content_type = (content_type or "").lower()
+    if "json" in content_type:
+        return "json"
+    if "spreadsheet" in content_type or "excel" in content_type:
+        return "xlsx"
+    return "csv"
+
+
+class CapturedResponse(NamedTuple):
+    """Réponse de l'application des mesures lue en mémoire dans le navigateur (moteur capture)"""
+
+    url: str
+    content_type: str
+    body: bytes
+
+    @property
+    def extension(self) -> str:
+        return extension_for_content_type(self.content_type)
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(urlparse(self.url).path) or "réponse capturée"
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """
+    Convertit un horodatage d'export en datetime UTC
+
+    Les horodatages sans fuseau sont interprétés dans le fuseau du portail (Europe/Paris).
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value or "").strip()
+        if not text:
+            return None
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            for fmt in ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"):
+                try:
+                    parsed = datetime.strptime(text, fmt)
+                    break
+                except ValueError:
+                    continue
+            else:
+                return None
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=ZoneInfo(PORTAL_TIMEZONE))
+    return parsed.astimezone(timezone.utc)
+
+
+def _parse_value(value) -> Optional[float]:
+    """Convertit une valeur d'export (virgule décimale acceptée) en float"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").strip().replace(",", ".")
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _find_header_columns(row: list) -> Optional[Tuple[int, int]]:
+    """Repère les colonnes horodatage/valeur dans une ligne d'en-tête"""
+    labels = [str(cell or "").strip().lower() for cell in row]
+    time_col = next((i for i, label in enumerate(labels) if label in EXPORT_TIME_COLUMNS), None)
+    value_col = next((i for i, label in enumerate(labels) if label in EXPORT_VALUE_COLUMNS), None)
+    if time_col is None or value_col is None:
+        return None
+    return time_col, value_col
+
+
+def _iter_rows_points(rows: Iterator[list]) -> Iterator[Tuple[datetime, float]]:
+    """Produit les points (horodatage UTC, valeur) des lignes qui suivent l'en-tête"""
+    columns = None
+    for row in rows:
+        if columns is None:
+            # Les exports commencent par un bloc d'informations (PRM, unité...) avant l'en-tête
+            columns = _find_header_columns(row)
+            continue
+        if len(row) <= max(columns):
+            continue
+        timestamp = _parse_timestamp(row[columns[0]])
+        value = _parse_value(row[columns[1]])
+        if timestamp is not None and value is not None:
+            yield timestamp, value
+
+
+def _iter_csv_text_points(f) -> Iterator[Tuple[datetime, float]]:
+    """Lecture ligne à ligne d'un flux texte CSV (séparateur ; ou ,)"""
+    sample = f.read(4096)
+    f.seek(0)
+    delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+    yield from _iter_rows_points(csv.reader(f, delimiter=delimiter))
+
+
+def _iter_csv_points(path: str) -> Iterator[Tuple[datetime, float]]:
+    """Lecture ligne à ligne d'un export CSV (séparateur ; ou ,)"""
+    for encoding in ("utf-8-sig", "latin-1"):
+        try:
+            with open(path, encoding=encoding, newline="") as f:
+                yield from _iter_csv_text_points(f)
+            return
+        except UnicodeDecodeError:
+            continue
+
+
+def _iter_xlsx_points(path) -> Iterator[Tuple[datetime, float]]:
+    """Lecture en flux d'un export Excel (openpyxl en mode read_only, chemin ou flux binaire)"""
+    # ImportError propagée : ingest_export signale l'échec au lieu d'enregistrer des journées vides
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield from _iter_rows_points(list(row) for row in sheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def _iter_json_points(path: str) -> Iterator[Tuple[datetime, float]]:
+    """Lecture d'une réponse JSON de l'API enregistrée sur disque"""
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    yield from _iter_json_payload_points(payload)
+
+
+def _iter_json_payload_points(payload) -> Iterator[Tuple[datetime, float]]:
+    """Points d'une réponse JSON de l'API : première liste d'objets {date, valeur} trouvée"""
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list) and node and isinstance(node[0], dict):
+            keys = {key.lower(): key for key in node[0]}
+            time_key = next((keys[k] for k in EXPORT_TIME_COLUMNS if k in keys), None)
+            value_key = next((keys[k] for k in EXPORT_VALUE_COLUMNS if k in keys), None)
+            if time_key and value_key:
+                for item in node:
+                    timestamp = _parse_timestamp(item.get(time_key))
+                    value = _parse_value(item.get(value_key))
+                    if timestamp is not None and value is not None:
+                        yield timestamp, value
+                return
+            stack.extend(node)
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+def _iter_captured_points(captured: CapturedResponse) -> Iterator[Tuple[datetime, float]]:
+    """Points d'une réponse capturée en mémoire (moteur capture), sans passer par le disque"""
+    extension = captured.extension
+    if extension == "json":
+        yield from _iter_json_payload_points(json.loads(captured.body))
+    elif extension == "xlsx":
+        yield from _iter_xlsx_points(io.BytesIO(captured.body))
+    else:
+        try:
+            text = captured.body.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            text = captured.body.decode("latin-1")
+        yield from _iter_csv_text_points(io.StringIO(text, newline=""))
+
+
+def iter_export_points(path: Union[str, CapturedResponse]) -> Iterator[Tuple[datetime, float]]:
+    """
+    Lit un fichier d'export en flux et produit ses points de mesure
+
+    Args:
+        path: Fichier CSV, XLSX ou JSON (moteur HTTP), ou réponse capturée en mémoire
+
+    Returns:
+        Itérateur de tuples (horodatage UTC, valeur)
+    """
+    if isinstance(path, CapturedResponse):
+        return _iter_captured_points(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        return _iter_json_points(path)
+    if extension in (".xlsx", ".xlsm"):
+        return _iter_xlsx_points(path)
+    return _iter_csv_points(path)
+
+
+def _interval_day(timestamp: datetime) -> date:
+    """Journée locale d'un point (l'horodatage marque la fin de l'intervalle de 30 minutes)"""
+    return (timestamp - timedelta(minutes=30)).astimezone(ZoneInfo(PORTAL_TIMEZONE)).date()
+
+
+def _local_day(timestamp: datetime) -> date:
+    """Journée locale d'un agrégat journalier ou mensuel (horodaté au début de la journée ou du mois)"""
+    return timestamp.astimezone(ZoneInfo(PORTAL_TIMEZONE)).date()
+
+
+def granularity_store_dir(store_dir: str, granularity: str) -> str:
+    """Jeu de données d'un pas de mesure (les agrégats journaliers et mensuels sont stockés à part)"""
+    if granularity == "hours":
+        return store_dir
+    return f"{store_dir.rstrip(os.sep)}_{granularity}"
+
+
+def append_points_to_store(points: Iterable[Tuple[datetime, float]], store_dir: str, granularity: str = "hours") -> dict:
+    """
+    Ajoute des points au jeu de données Parquet partitionné par mois
+
+    Chaque mois (UTC) est stocké dans store_dir/month=YYYY-MM/data.parquet. Les points
+    déjà présents (mêmes horodatages, périodes qui se chevauchent) sont remplacés.
+
+    Args:
+        points: Itérable de tuples (horodatage UTC, valeur)
+        store_dir: Racine du jeu de données
+        granularity: Pas des points : fin d'intervalle de 30 minutes ("hours") ou début de journée / de mois
+
+    Returns:
+        Nombre de points distincts par journée locale, toutes partitions touchées confondues
+    """
+    import pandas as pd
+
+    by_month = {}
+    for timestamp, value in points:
+        by_month.setdefault(timestamp.strftime("%Y-%m"), {})[timestamp] = value
+
+    point_day = _interval_day if granularity == "hours" else _local_day
+
+    intervals_by_day = {}
+    for month, month_points in sorted(by_month.items()):
+        partition_dir = os.path.join(store_dir, f"month={month}")
+        os.makedirs(partition_dir, exist_ok=True)
+        partition_file = os.path.join(partition_dir, "data.parquet")
+
+        frame = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(list(month_points.keys()), utc=True),
+                "value": pd.Series(list(month_points.values()), dtype="float64"),
+            }
+        )
+        if os.path.exists(partition_file):
+            frame = pd.concat([pd.read_parquet(partition_file), frame], ignore_index=True)
+        frame = frame.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp").reset_index(drop=True)
+
+        tmp_file = f"{partition_file}.tmp"
+        frame.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, partition_file)
+
+        for timestamp in month_points:
+            day = point_day(timestamp)
+            intervals_by_day[day] = intervals_by_day.get(day, 0) + 1
+
+    return intervals_by_day
+
+
+def ingest_export(file_path: Union[str, CapturedResponse], store_dir: str, granularity: str = "hours") -> Optional[dict]:
+    """
+    Analyse un export téléchargé (ou une réponse capturée en mémoire) et l'ajoute au jeu de données
+
+    Les exports journaliers et mensuels alimentent un jeu de données distinct (granularity_store_dir).
+
+    Returns:
+        Nombre de points par journée locale, ou None si l'analyse a échoué
+    """
+    try:
+        intervals_by_day = append_points_to_store(
+            iter_export_points(file_path), granularity_store_dir(store_dir, granularity), granularity
+        )
+    except ImportError as e:
+        if e.name == "openpyxl":
+            logger.error("❌ openpyxl requis pour analyser les exports .xlsx (pip install openpyxl)")
+        else:
+            logger.error(f"❌ Stockage Parquet indisponible ({e.name} manquant, pip install pyarrow)")
+        return None
+    except Exception as e:
+        name = file_path.name if isinstance(file_path, CapturedResponse) else os.path.basename(file_path)
+        logger.error(f"❌ Analyse de {name} impossible: {type(e).__name__}")
+        logger.debug(f"Détails: {str(e)}")
+        return None
+
+    total = sum(intervals_by_day.values())
+    logger.info(f"🗃️ {total} point(s) ajouté(s) au stockage ({len(intervals_by_day)} jour(s))")
+    return intervals_by_day
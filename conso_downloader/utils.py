@@ -0,0 +1,75 @@
+"""
+Petits utilitaires : User-Agent, masquage des données sensibles, validation des dates
+"""
+
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from .settings import USER_AGENTS
+
+
+def get_random_user_agent() -> str:
+    """Retourne un User-Agent aléatoire pour éviter la détection"""
+    return secrets.choice(USER_AGENTS)
+
+
+def mask_sensitive_data(data: str, mask_type: str = "email") -> str:
+    """
+    Masque les données sensibles pour les logs
+
+    Args:
+        data: Donnée à masquer
+        mask_type: Type de masquage ('email', 'password', 'generic')
+
+    Returns:
+        Donnée masquée
+    """
+    if not data:
+        return "***"
+
+    if mask_type == "email":
+        if "@" in data:
+            local, domain = data.split("@", 1)
+            return f"{local[:2]}***@{domain}"
+        return "***@***"
+    elif mask_type == "password":
+        return "*" * min(len(data), 12)
+    else:
+        return f"{data[:3]}***" if len(data) > 3 else "***"
+
+
+def validate_date_range(
+    start_date: Optional[datetime], end_date: Optional[datetime], max_days: Optional[int] = 365
+) -> Tuple[datetime, datetime]:
+    """
+    Valide et normalise les dates
+
+    Args:
+        start_date: Date de début
+        end_date: Date de fin
+        max_days: Durée maximale de la période (None : illimitée, rattrapage d'historique)
+
+    Returns:
+        Tuple (start_date, end_date) validé
+
+    Raises:
+        ValueError: Si les dates sont invalides
+    """
+    # Calculer les dates par défaut
+    if end_date is None:
+        end_date = datetime.now() - timedelta(days=1)
+    if start_date is None:
+        start_date = end_date - timedelta(days=6)
+
+    # Validation
+    if start_date > end_date:
+        raise ValueError(f"Date de début ({start_date}) postérieure à date de fin ({end_date})")
+
+    if end_date > datetime.now():
+        raise ValueError(f"Date de fin ({end_date}) dans le futur")
+
+    if max_days is not None and (end_date - start_date).days > max_days:
+        raise ValueError(f"Période trop longue (>{max_days} jours): {(end_date - start_date).days} jours")
+
+    return start_date, end_date
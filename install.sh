@@ -79,7 +79,7 @@ echo "Prochaines étapes:"
 echo "1. Activez l'environnement virtuel: source .venv/bin/activate"
 echo "2. Éditez config.py avec vos identifiants Enedis"
 echo "3. Testez la configuration: python test_setup.py"
-echo "4. Premier test: python conso_downloader.py --start \"2024-01-01\" --end \"2024-01-07\" "
+echo "4. Premier test: python -m conso_downloader --start \"2024-01-01\" --end \"2024-01-07\" "
 echo ""
 echo "⚠️  N'oubliez pas d'activer l'environnement virtuel à chaque utilisation:"
 echo "source .venv/bin/activate"
\ No newline at end of file
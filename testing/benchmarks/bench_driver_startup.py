@@ -0,0 +1,88 @@
+"""
+Benchmark du lancement de Chrome : Selenium Manager à chaque session, binaires en cache, chromedriver partagé
+
+Ouvre plusieurs sessions successives avec setup_driver (comme le mode boucle ou le mode
+multi-comptes) et mesure la durée de lancement de chacune selon la préparation :
+    default : webdriver.Chrome(options) seul, Selenium Manager et nouveau chromedriver à chaque session
+    cached  : chemins relus du cache, nouveau chromedriver à chaque session
+    shared  : chemins relus du cache, sessions rattachées à un chromedriver unique
+
+Usage :
+    python testing/benchmarks/bench_driver_startup.py
+    python testing/benchmarks/bench_driver_startup.py --sessions 10 --modes cached shared --json startup.json
+
+Nécessite Chrome (et chromedriver, résolu par Selenium Manager).
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+MODES = ("default", "cached", "shared")
+
+
+def run_mode(mode: str, sessions: int, headless: bool) -> dict:
+    """Lance `sessions` navigateurs successifs et mesure la durée de chaque setup_driver"""
+    from conso_downloader import close_driver, driver_service, setup_driver
+
+    if mode == "default":
+        driver_service._prepared_binaries = None
+        driver_service._shared_service = None
+    else:
+        driver_service.prepare_driver(shared=mode == "shared")  # Première résolution hors mesure (cache)
+
+    durations = []
+    with tempfile.TemporaryDirectory(prefix=f"bench-driver-{mode}-") as download_dir:
+        for _ in range(sessions):
+            started = time.perf_counter()
+            driver = setup_driver(download_dir=download_dir, headless=headless)
+            durations.append(time.perf_counter() - started)
+            close_driver(driver)
+
+    if driver_service._shared_service is not None:
+        driver_service._shared_service.stop()
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "first": round(durations[0], 3),
+        "mean": round(statistics.mean(durations), 3),
+        "median": round(statistics.median(durations), 3),
+        "max": round(max(durations), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du lancement de Chrome selon la préparation du driver")
+    parser.add_argument("--sessions", type=int, default=5, help="Sessions successives par mode (défaut: 5)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="Modes comparés")
+    parser.add_argument("--no-headless", action="store_true", help="Afficher le navigateur")
+    parser.add_argument("--json", type=str, help="Écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = [run_mode(mode, args.sessions, headless=not args.no_headless) for mode in args.modes]
+
+    baseline = results[0]["median"]
+    print(f"\n{'mode':<8} {'1re':>8} {'moyenne':>8} {'médiane':>8} {'max':>8} {'gain':>8}")
+    for result in results:
+        gain = baseline - result["median"]
+        print(
+            f"{result['mode']:<8} {result['first']:>7.2f}s {result['mean']:>7.2f}s {result['median']:>7.2f}s "
+            f"{result['max']:>7.2f}s {gain:>+7.2f}s"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"\n📄 Résultats: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
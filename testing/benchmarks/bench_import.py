@@ -0,0 +1,126 @@
+"""
+Benchmark du temps de démarrage (python -X importtime)
+
+Mesure le coût des imports des commandes qui ne pilotent pas de navigateur (import du paquet,
+plan de téléchargement, aide de la CLI) et vérifie qu'aucune dépendance lourde n'y est chargée :
+un import de Selenium ou de requests remonté au niveau d'un module se voit immédiatement.
+
+Usage :
+    python testing/benchmarks/bench_import.py
+    python testing/benchmarks/bench_import.py --runs 10 --budget-ms 150 --top 15
+    python testing/benchmarks/bench_import.py --json import.json
+
+Code de retour non nul si une dépendance lourde est importée ou si le budget est dépassé.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+
+# Commandes mesurées : (nom, arguments passés à python -X importtime)
+SCENARIOS = [
+    ("import", ["-c", "import conso_downloader"]),
+    ("plan", ["-c", "from conso_downloader import plan_periods, load_manifest"]),
+    ("help", ["-m", "conso_downloader", "--help"]),
+]
+
+# Paquets qui ne doivent être importés que par les commandes qui téléchargent
+HEAVY_PACKAGES = ("selenium", "requests", "urllib3", "playwright", "websockets", "aiohttp")
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Lit la sortie de -X importtime
+
+    Returns:
+        Dictionnaire module -> (durée propre, durée cumulée) en microsecondes
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if not self_us.isdigit():
+            continue  # en-tête
+        modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_scenario(args: list) -> dict:
+    """Lance l'interpréteur sans identifiants ni config.py accessibles et mesure ses imports"""
+    env = {key: value for key, value in os.environ.items() if key not in ("ACCOUNT_EMAIL", "ACCOUNT_PASSWORD")}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    modules = parse_importtime(completed.stderr)
+    package = [name for name in modules if name.split(".")[0] == "conso_downloader"]
+    return {
+        "returncode": completed.returncode,
+        "modules": modules,
+        "package_us": sum(modules[name][0] for name in package),
+        "total_us": sum(self_us for self_us, _ in modules.values()),
+        "heavy": sorted(name for name in modules if name.split(".")[0] in HEAVY_PACKAGES),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du temps d'import de conso_downloader")
+    parser.add_argument("--runs", type=int, default=5, help="Nombre d'exécutions par commande (médiane)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Durée totale d'import maximale par commande")
+    parser.add_argument("--top", type=int, default=10, help="Nombre de modules les plus coûteux affichés")
+    parser.add_argument("--json", type=str, help="Écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+    for name, scenario_args in SCENARIOS:
+        runs = [run_scenario(scenario_args) for _ in range(args.runs)]
+        last = runs[-1]
+        total_ms = statistics.median(run["total_us"] for run in runs) / 1000
+        package_ms = statistics.median(run["package_us"] for run in runs) / 1000
+        ok = last["returncode"] == 0 and not last["heavy"] and (args.budget_ms is None or total_ms <= args.budget_ms)
+        failed |= not ok
+
+        status = "✅" if ok else "❌"
+        print(f"\n{status} {name} ({' '.join(scenario_args)}) - imports {total_ms:.1f} ms, paquet {package_ms:.1f} ms")
+        if last["returncode"] != 0:
+            print(f"   Code de retour: {last['returncode']}")
+        if last["heavy"]:
+            print(f"   Dépendances lourdes importées: {', '.join(last['heavy'])}")
+        heaviest = sorted(last["modules"].items(), key=lambda item: item[1][1], reverse=True)[: args.top]
+        for module, (self_us, cumulative_us) in heaviest:
+            print(f"   {cumulative_us / 1000:8.2f} ms cumulé {self_us / 1000:8.2f} ms propre  {module}")
+
+        results.append(
+            {
+                "name": name,
+                "args": scenario_args,
+                "success": ok,
+                "total_ms": round(total_ms, 2),
+                "package_ms": round(package_ms, 2),
+                "heavy": last["heavy"],
+                "modules": len(last["modules"]),
+            }
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": args.runs, "budget_ms": args.budget_ms, "results": results}, f, indent=2)
+        print(f"\n📄 Résultats: {args.json}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Benchmark de bout en bout du pipeline de téléchargement contre le portail simulé
+
+Exécute le vrai download_consumption_data (Chrome headless) contre testing/benchmarks/mock_portal.py
+pour des plages de 1, 4 et 53 périodes de 7 jours, et mesure la durée de chaque étape
+(lancement du navigateur, connexion, navigation, calendrier, téléchargement...) : les attentes
+et pauses fixes qui s'allongent d'une version à l'autre deviennent visibles.
+
+Usage :
+    python testing/benchmarks/bench_pipeline.py                         # 1, 4 et 53 périodes
+    python testing/benchmarks/bench_pipeline.py --windows 1 4 --profile realistic
+    python testing/benchmarks/bench_pipeline.py --engine http --json bench.json
+    python testing/benchmarks/bench_pipeline.py --engine capture --windows 4      # sans fichier téléchargé
+    python testing/benchmarks/bench_pipeline.py --latency captcha=2 --latency download=1.5
+    python testing/benchmarks/bench_pipeline.py --windows 1 4 --blocking none static full   # gain du blocage
+
+Nécessite Chrome (et chromedriver, résolu par Selenium Manager).
+"""
+
+import argparse
+import functools
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mock_portal import LATENCY_PROFILES, MOCK_EMAIL, MOCK_PASSWORD, MockPortal  # noqa: E402
+
+# Fonctions du paquet mesurées (appelées via les globales de chaque module, donc remplaçables)
+STAGES = [
+    "setup_driver",
+    "open_measures_page",
+    "accept_cookies",
+    "login_step1_email",
+    "login_step2_password",
+    "navigate_to_consumption",
+    "switch_to_iframe",
+    "select_granularity",
+    "select_date_range",
+    "capture_period_data",
+    "visualize_and_download",
+    "wait_for_download",
+    "download_periods_http",
+    "close_driver",
+]
+
+# Date du jour simulée : les plages benchmarkées se terminent la veille
+PORTAL_TODAY = date(2024, 12, 31)
+
+
+def instrument(package, timings: dict) -> list:
+    """
+    Remplace les fonctions de STAGES par des versions chronométrées
+
+    Chaque module du paquet importe les fonctions qu'il appelle : elles sont remplacées
+    partout où elles sont liées, avec une seule version chronométrée par fonction.
+
+    Returns:
+        Les fonctions d'origine (module, nom, fonction), pour restore()
+    """
+    modules = [module for name, module in list(sys.modules.items()) if name.startswith(package.__name__ + ".")]
+    timed_functions = {}
+    originals = []
+    for module in modules:
+        for name in STAGES:
+            original = module.__dict__.get(name)
+            if original is None:
+                continue
+            if name not in timed_functions:
+
+                @functools.wraps(original)
+                def timed(*args, _stage=name, _original=original, **kwargs):
+                    started = time.perf_counter()
+                    try:
+                        return _original(*args, **kwargs)
+                    finally:
+                        timings.setdefault(_stage, []).append(time.perf_counter() - started)
+
+                timed_functions[name] = timed
+
+            originals.append((module, name, original))
+            setattr(module, name, timed_functions[name])
+    return originals
+
+
+def restore(originals: list) -> None:
+    for module, name, original in originals:
+        setattr(module, name, original)
+
+
+def window_range(windows: int) -> tuple:
+    """Plage se terminant la veille de PORTAL_TODAY découpée en `windows` périodes de 7 jours"""
+    days = min(7 * windows, 365)  # 365 jours = 53 périodes, maximum accepté
+    end = datetime.combine(PORTAL_TODAY - timedelta(days=1), datetime.min.time())
+    return end - timedelta(days=days - 1), end
+
+
+def run_scenario(module, portal: MockPortal, windows: int, engine: str, headless: bool, blocking: str = "none") -> dict:
+    """Un run complet (navigateur neuf, connexion, toutes les périodes) dans un répertoire vierge"""
+    download_consumption_data = module.download_consumption_data  # charge tous les modules avant instrument()
+    module.settings.RESOURCE_BLOCKING = blocking
+    start_date, end_date = window_range(windows)
+    download_dir = tempfile.mkdtemp(prefix=f"bench-{windows}-")
+    portal.downloads.clear()
+    timings = {}
+    originals = instrument(module, timings)
+
+    started = time.perf_counter()
+    try:
+        success = download_consumption_data(start_date, end_date, headless=headless, engine=engine, download_dir=download_dir)
+    finally:
+        total = time.perf_counter() - started
+        restore(originals)
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+    return {
+        "windows": windows,
+        "engine": engine,
+        "blocking": blocking,
+        "success": success,
+        "total": round(total, 3),
+        "downloads": len(set(portal.downloads)),
+        "stages": {
+            name: {
+                "calls": len(values),
+                "total": round(sum(values), 3),
+                "mean": round(statistics.mean(values), 3),
+                "max": round(max(values), 3),
+            }
+            for name, values in timings.items()
+        },
+    }
+
+
+def print_report(result: dict) -> None:
+    status = "✅" if result["success"] else "❌"
+    print(
+        f"\n{status} {result['windows']} période(s) - moteur {result['engine']} - blocage {result['blocking']}"
+        f" - {result['total']:.2f}s"
+    )
+    print(f"   périodes servies par le portail: {result['downloads']}")
+    print(f"   {'étape':<26}{'appels':>8}{'total (s)':>12}{'moyenne':>10}{'max':>10}")
+    for name in STAGES:
+        stage = result["stages"].get(name)
+        if stage:
+            print(f"   {name:<26}{stage['calls']:>8}{stage['total']:>12.2f}{stage['mean']:>10.2f}{stage['max']:>10.2f}")
+
+
+def print_blocking_comparison(results: list) -> None:
+    """Écarts de chargement de page et de durée totale par rapport au premier profil de blocage"""
+    reference = {}
+    print(f"\n   {'périodes':<10}{'blocage':<10}{'page_load (s)':>15}{'Δ':>9}{'total (s)':>12}{'Δ':>9}")
+    for result in results:
+        page_load = result["stages"].get("page_load", {}).get("mean", 0.0)
+        base = reference.setdefault(result["windows"], (page_load, result["total"]))
+        print(
+            f"   {result['windows']:<10}{result['blocking']:<10}{page_load:>15.2f}{page_load - base[0]:>+9.2f}"
+            f"{result['total']:>12.2f}{result['total'] - base[1]:>+9.2f}"
+        )
+
+
+def parse_latency(value: str) -> tuple:
+    stage, _, seconds = value.partition("=")
+    if stage not in LATENCY_PROFILES["zero"]:
+        raise argparse.ArgumentTypeError(f"étape inconnue: {stage} ({', '.join(LATENCY_PROFILES['zero'])})")
+    return stage, float(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline complet contre le portail simulé")
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 4, 53], help="Nombres de périodes (défaut: 1 4 53)")
+    parser.add_argument(
+        "--engine", choices=["ui", "http", "capture"], default="ui", help="Moteur de récupération (défaut: ui)"
+    )
+    parser.add_argument("--profile", choices=sorted(LATENCY_PROFILES), default="fast", help="Profil de latences")
+    parser.add_argument("--latency", type=parse_latency, action="append", default=[], help="Surcharge: étape=secondes")
+    parser.add_argument(
+        "--blocking", nargs="+", default=["none"], help="Profils de blocage des ressources à comparer (défaut: none)"
+    )
+    parser.add_argument("--no-headless", action="store_true", help="Afficher le navigateur")
+    parser.add_argument("--json", type=str, help="Écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    latencies = {**LATENCY_PROFILES[args.profile], **dict(args.latency)}
+
+    with MockPortal(latencies, today=PORTAL_TODAY) as portal:
+        # Le paquet lit sa configuration à l'import : pointer vers le portail simulé avant
+        os.environ.update(
+            {
+                "BASE_URL": portal.url,
+                "ACCOUNT_EMAIL": MOCK_EMAIL,
+                "ACCOUNT_PASSWORD": MOCK_PASSWORD,
+                "MEASURES_API_URL": portal.api_url_template,
+                "PRM": "00000000000000",
+            }
+        )
+        import conso_downloader
+
+        print(f"🌐 Portail simulé: {portal.url} (profil {args.profile})")
+        results = []
+        for windows in args.windows:
+            for blocking in args.blocking:
+                result = run_scenario(
+                    conso_downloader, portal, windows, args.engine, headless=not args.no_headless, blocking=blocking
+                )
+                print_report(result)
+                results.append(result)
+
+        if len(args.blocking) > 1:
+            print_blocking_comparison(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"profile": args.profile, "latencies": latencies, "results": results}, f, indent=2)
+        print(f"\n📄 Résultats: {args.json}")
+
+    sys.exit(0 if all(result["success"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,582 @@
+"""
+Portail Enedis simulé pour les benchmarks de bout en bout
+
+Serveur HTTP local reproduisant les éléments manipulés par conso_downloader :
+popup cookies (popin_tc_privacy_button_3), login en deux étapes (idToken1 / idToken3_0 avec
+captcha simulé, idToken2 / idToken4_0), menu "Ma consommation", iframe "mes-mesures" avec
+le mode Heures, le calendrier (vues années / mois / jours), Visualiser / Télécharger et
+l'export CSV. L'API de mesures (/api/mesures) sert le moteur http et le graphique chargé par
+Visualiser (lu en mémoire par le moteur capture).
+
+Les latences (secondes) sont réglables pour chaque étape.
+
+Usage manuel :
+    python testing/benchmarks/mock_portal.py --port 8080 --profile realistic
+    BASE_URL=http://127.0.0.1:8080/ python -m conso_downloader --start-date 01/12/2024 --end-date 07/12/2024
+"""
+
+import argparse
+import base64
+import json
+import secrets
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+
+PORTAL_TIMEZONE = ZoneInfo("Europe/Paris")
+MOCK_EMAIL = "bench@example.com"
+MOCK_PASSWORD = "bench-password"
+MOCK_PRM = "00000000000000"
+# Pas de mesure du sélecteur : type de données, unité et pas en minutes de l'export
+STEP_EXPORTS = {
+    "heures": ("Courbe de charge", "W", 30),
+    "jours": ("Consommation", "Wh", 1440),
+    "mois": ("Consommation", "Wh", ""),
+}
+
+# Latences par étape (secondes)
+#   page: réponse serveur de chaque page HTML      captcha: activation du bouton Suivant
+#   login: vérification du mot de passe            iframe: rendu de l'application Angular
+#   visualise: chargement du graphique             download: génération de l'export
+#   api: réponse de l'API de mesures               assets: images, polices, scripts de mesure d'audience
+LATENCY_PROFILES = {
+    "zero": {"page": 0, "captcha": 0, "login": 0, "iframe": 0, "visualise": 0, "download": 0, "api": 0, "assets": 0},
+    "fast": {
+        "page": 0.02,
+        "captcha": 0.2,
+        "login": 0.1,
+        "iframe": 0.2,
+        "visualise": 0.2,
+        "download": 0.1,
+        "api": 0.05,
+        "assets": 0.1,
+    },
+    "realistic": {
+        "page": 0.4,
+        "captcha": 4.0,
+        "login": 1.0,
+        "iframe": 2.0,
+        "visualise": 1.5,
+        "download": 0.8,
+        "api": 0.3,
+        "assets": 0.8,
+    },
+}
+
+# Ressources annexes des pages (copies locales allégées) : même chemin qu'un CDN, contenu factice
+_ASSETS = {
+    "/assets/portail.css": (
+        "text/css",
+        b"@font-face { font-family: Marianne; src: url(/assets/marianne.woff2) format('woff2'); }\n"
+        b"body { font-family: Marianne, sans-serif; }\n",
+    ),
+    "/assets/marianne.woff2": ("font/woff2", b"wOF2" + b"\0" * 20_000),
+    "/assets/banniere.png": ("image/png", b"\x89PNG\r\n\x1a\n" + b"\0" * 60_000),
+    "/assets/logo-enedis.svg": ("image/svg+xml", b'<svg xmlns="http://www.w3.org/2000/svg" width="1" height="1"/>'),
+    "/tc/tagcommander.js": ("application/javascript", b"window.tC = { privacy: {} };\n"),
+}
+_ASSET_TAGS = """<link rel="stylesheet" href="/assets/portail.css">
+<script src="/tc/tagcommander.js"></script>"""
+_ASSET_IMAGES = """<img src="/assets/banniere.png" alt="" width="1" height="1">
+<img src="/assets/logo-enedis.svg" alt="Enedis" width="1" height="1">"""
+
+_PAGE = Template("""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>$title</title>
+$assets
+<style>
+#popin_tc_privacy { position: fixed; bottom: 0; left: 0; right: 0; background: #fff; border-top: 1px solid #ccc; }
+.calendar table td { padding: 0; }
+</style></head>
+<body>
+$images
+$popin
+$body
+<script>
+function consent() {
+    document.cookie = "TC_PRIVACY=1; path=/";
+    var popin = document.getElementById("popin_tc_privacy");
+    if (popin) popin.remove();
+}
+</script>
+</body></html>
+""")
+
+_POPIN = """<div id="popin_tc_privacy"><p>Ce site utilise des cookies.</p>
+<button id="popin_tc_privacy_button_2">Personnaliser</button>
+<button id="popin_tc_privacy_button_3" onclick="consent()">Tout accepter</button></div>"""
+
+_LOGIN_BODY = Template("""<main id="login">
+<label>Identifiant <input id="idToken1" type="email" autocomplete="username"></label>
+<button id="idToken3_0" type="button" disabled onclick="nextStep()">Suivant</button>
+</main>
+<script>
+var LOGIN = { email: null };
+setTimeout(function () { document.getElementById("idToken3_0").disabled = false; }, $captcha_ms);
+function nextStep() {
+    LOGIN.email = document.getElementById("idToken1").value;
+    document.getElementById("login").innerHTML =
+        '<label>Mot de passe <input id="idToken2" type="password"></label>' +
+        '<button id="idToken4_0" type="button" onclick="submitLogin()">Connexion</button>' +
+        '<p id="error"></p>';
+}
+function submitLogin() {
+    var body = JSON.stringify({ email: LOGIN.email, password: document.getElementById("idToken2").value });
+    fetch("/login", { method: "POST", headers: { "Content-Type": "application/json" }, body: body })
+        .then(function (response) {
+            if (response.ok) { window.location.href = "/"; }
+            else { document.getElementById("error").textContent = "Identifiants incorrects"; }
+        });
+}
+</script>""")
+
+_HOME_BODY = Template("""<header>
+<button type="button" onclick="toggleMenu()">Ma consommation</button>
+<nav id="menu" style="display: none">
+<a href="/suivre-ma-consommation">Suivre ma consommation</a>
+<a href="/mes-contrats">Mes contrats</a>
+</nav>
+</header>
+<main>$content</main>
+<script>
+function toggleMenu() {
+    var menu = document.getElementById("menu");
+    menu.style.display = menu.style.display === "none" ? "block" : "none";
+}
+</script>""")
+
+_MEASURES_APP = Template("""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>Mes mesures</title>
+$assets</head>
+<body>$images<div id="app">Chargement...</div>
+<script>
+var CONFIG = $config;
+var MONTHS = ["janv.", "févr.", "mars", "avr.", "mai", "juin", "juil.", "août", "sept.", "oct.", "nov.", "déc."];
+var today = new Date(CONFIG.today + "T00:00:00");
+var state = {
+    step: null, calendar: false, view: "days",
+    year: today.getFullYear(), month: today.getMonth(),
+    start: null, end: null, loading: false, loaded: null
+};
+
+function pad(n) { return (n < 10 ? "0" : "") + n; }
+function iso(d) { return d.getFullYear() + "-" + pad(d.getMonth() + 1) + "-" + pad(d.getDate()); }
+function rangeKey() {
+    return state.start && state.end ? state.step + "_" + iso(state.start) + "_" + iso(state.end) : null;
+}
+
+function renderCalendar() {
+    var html = '<div class="calendar">';
+    html += '<button type="button" aria-label="Choisir mois et année, ' + MONTHS[state.month] + " " + state.year +
+        '" onclick="showYears()">' + MONTHS[state.month] + " " + state.year + "</button>";
+    if (state.view === "years") {
+        for (var y = today.getFullYear() - 5; y <= today.getFullYear(); y++) {
+            html += '<button type="button" onclick="pickYear(' + y + ')">' + y + "</button>";
+        }
+    } else if (state.view === "months") {
+        for (var m = 0; m < 12; m++) {
+            html += '<button type="button" onclick="pickMonth(' + m + ')">' + MONTHS[m] + "</button>";
+        }
+    } else {
+        var days = new Date(state.year, state.month + 1, 0).getDate();
+        html += "<table><tr>";
+        for (var d = 1; d <= days; d++) {
+            var disabled = new Date(state.year, state.month, d) > today ? " disabled" : "";
+            html += '<td class="days"><button type="button"' + disabled + ' onclick="pickDay(' + d + ')">' +
+                '<span class="button-content">' + d + "</span></button></td>";
+            if (d % 7 === 0) html += "</tr><tr>";
+        }
+        html += "</tr></table>";
+    }
+    return html + "</div>";
+}
+
+function render() {
+    if (!state.step) return;
+    var ready = state.loaded && state.loaded === rangeKey();
+    var html = '<div class="steps">' +
+        '<label onclick="pickStep(\\'heures\\')"><input type="radio" name="pas"><span>Heures</span></label>' +
+        '<label onclick="pickStep(\\'jours\\')"><input type="radio" name="pas"><span>Jours</span></label>' +
+        '<label onclick="pickStep(\\'mois\\')"><input type="radio" name="pas"><span>Mois</span></label></div>';
+    html += '<div class="period"><span id="periode">' +
+        (state.start ? iso(state.start) : "--") + " → " + (state.end ? iso(state.end) : "--") + "</span>" +
+        '<lnc-icon icon="calendar_today"><button type="button" aria-label="Ouvrir le calendrier" ' +
+        'onclick="openCalendar()">📅</button></lnc-icon></div>';
+    if (state.calendar) html += renderCalendar();
+    html += '<button type="button" id="visualiser" onclick="visualiser()">' +
+        (state.loading ? "Chargement..." : "Visualiser") + "</button>";
+    html += '<button type="button" id="telecharger" onclick="telecharger()"' + (ready ? "" : " disabled") +
+        ">Télécharger</button>";
+    document.getElementById("app").innerHTML = html;
+}
+
+function pickStep(step) { state.step = step; render(); }
+function openCalendar() {
+    state.calendar = true;
+    state.view = "days";
+    render();
+}
+function showYears() { state.view = "years"; render(); }
+function pickYear(year) { state.year = year; state.view = "months"; render(); }
+function pickMonth(month) { state.month = month; state.view = "days"; render(); }
+function pickDay(day) {
+    var picked = new Date(state.year, state.month, day);
+    if (!state.start || state.end || picked < state.start) {
+        state.start = picked;
+        state.end = null;
+    } else {
+        state.end = picked;
+        state.calendar = false;
+    }
+    render();
+}
+function visualiser() {
+    var key = rangeKey();
+    if (!key || state.loading) return;
+    state.loading = true;
+    render();
+    // Données du graphique chargées par l'API, comme l'application Angular
+    var next = new Date(state.end.getTime());
+    next.setDate(next.getDate() + 1);
+    fetch("/api/mesures?pas=" + state.step + "&start=" + iso(state.start) + "&end=" + iso(next), {
+        headers: { Authorization: "Bearer " + sessionStorage.getItem("access_token") }
+    }).then(function (response) { return response.json(); }).then(function () {
+        setTimeout(function () {
+            state.loading = false;
+            state.loaded = key;
+            render();
+        }, CONFIG.visualise_ms);
+    });
+}
+function telecharger() {
+    if (!state.loaded || state.loaded !== rangeKey()) return;
+    var link = document.createElement("a");
+    link.href = "/export?pas=" + state.step + "&start=" + iso(state.start) + "&end=" + iso(state.end);
+    link.download = "";
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+}
+
+sessionStorage.setItem("access_token", CONFIG.token);
+setTimeout(function () { state.step = "jours"; render(); }, CONFIG.iframe_ms);
+</script></body></html>
+""")
+
+
+def _fake_jwt() -> str:
+    """Jeton au format JWT (header.payload.signature), non signé"""
+
+    def encode(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    payload = json.dumps({"sub": MOCK_EMAIL, "jti": secrets.token_hex(8)}).encode()
+    return ".".join([encode(b'{"alg":"none"}'), encode(payload), encode(secrets.token_bytes(16))])
+
+
+def iter_interval_readings(start: date, end: date):
+    """
+    Points 30 minutes (horodatage de fin d'intervalle, heure locale) de start à end inclus
+
+    Les journées de changement d'heure comptent 46 ou 50 points, comme sur le portail.
+    """
+    day = start
+    while day <= end:
+        current = datetime(day.year, day.month, day.day, tzinfo=PORTAL_TIMEZONE).astimezone(timezone.utc)
+        next_day = day + timedelta(days=1)
+        stop = datetime(next_day.year, next_day.month, next_day.day, tzinfo=PORTAL_TIMEZONE).astimezone(timezone.utc)
+        while current < stop:
+            current += timedelta(minutes=30)
+            local = current.astimezone(PORTAL_TIMEZONE)
+            yield local, 300 + (local.hour * 37 + local.minute) % 700
+        day = next_day
+
+
+def iter_step_readings(start: date, end: date, step: str = "heures"):
+    """
+    Points au pas demandé : courbe 30 minutes (heures), ou énergie en Wh par jour (jours) ou
+    par mois (mois), horodatée au début de la journée ou du mois en heure locale
+    """
+    if step == "heures":
+        yield from iter_interval_readings(start, end)
+        return
+    totals = {}
+    for timestamp, value in iter_interval_readings(start, end):
+        day = (timestamp - timedelta(minutes=30)).date()
+        key = day if step == "jours" else day.replace(day=1)
+        totals[key] = totals.get(key, 0) + value / 2
+    for key, total in totals.items():
+        yield datetime(key.year, key.month, key.day, tzinfo=PORTAL_TIMEZONE), round(total)
+
+
+def build_export_csv(start: date, end: date, prm: str = MOCK_PRM, step: str = "heures") -> bytes:
+    """Export CSV 'Courbe de charge' (ou consommation journalière / mensuelle) au format du bouton Télécharger"""
+    kind, unit, minutes = STEP_EXPORTS[step]
+    lines = [
+        "Identifiant PRM;Type de donnees;Date de debut;Date de fin;Grandeur physique;Grandeur metier;Etape metier;"
+        "Unite;Pas en minutes",
+        f"{prm};{kind};{start:%d/%m/%Y};{end:%d/%m/%Y};Energie active;Consommation;Comptage Brut;{unit};{minutes}",
+        "Horodate;Valeur",
+    ]
+    lines.extend(f"{timestamp.isoformat()};{value}" for timestamp, value in iter_step_readings(start, end, step))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def build_api_response(start: date, end_exclusive: date, prm: str = MOCK_PRM, step: str = "heures") -> bytes:
+    """Réponse JSON de l'API de mesures (forme Data Connect)"""
+    interval_length = {"heures": "PT30M", "jours": "P1D", "mois": "P1M"}[step]
+    readings = [
+        {"value": str(value), "date": timestamp.strftime("%Y-%m-%d %H:%M:%S"), "interval_length": interval_length}
+        for timestamp, value in iter_step_readings(start, end_exclusive - timedelta(days=1), step)
+    ]
+    payload = {
+        "meter_reading": {
+            "usage_point_id": prm,
+            "start": start.isoformat(),
+            "end": end_exclusive.isoformat(),
+            "reading_type": {"unit": "W", "measurement_kind": "power", "aggregate": "average"},
+            "interval_reading": readings,
+        }
+    }
+    return json.dumps(payload).encode("utf-8")
+
+
+class _PortalHandler(BaseHTTPRequestHandler):
+    """Routes du portail simulé"""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def portal(self) -> "MockPortal":
+        return self.server.portal
+
+    def _cookies(self) -> dict:
+        cookies = {}
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name:
+                cookies[name] = value
+        return cookies
+
+    def _session(self):
+        return self.portal.sessions.get(self._cookies().get("session"))
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _redirect(self, location: str):
+        self._send(302, headers={"Location": location})
+
+    def _page(self, title: str, body: str, popin: bool = True):
+        self.portal.wait("page")
+        show_popin = popin and "TC_PRIVACY" not in self._cookies()
+        html = _PAGE.substitute(
+            title=title, assets=_ASSET_TAGS, images=_ASSET_IMAGES, popin=_POPIN if show_popin else "", body=body
+        )
+        self._send(200, html.encode("utf-8"))
+
+    def do_GET(self):  # noqa: C901
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.portal.record("GET", url.path)
+
+        if url.path in _ASSETS:
+            self.portal.wait("assets")
+            content_type, body = _ASSETS[url.path]
+            return self._send(200, body, content_type, {"Cache-Control": "no-store"})
+
+        if url.path == "/":
+            if self._session() is None:
+                captcha_ms = int(self.portal.latencies["captcha"] * 1000)
+                return self._page("Connexion", _LOGIN_BODY.substitute(captcha_ms=captcha_ms))
+            return self._page("Accueil", _HOME_BODY.substitute(content="<h1>Bienvenue</h1>"))
+
+        if self._session() is None:
+            return self._send(401) if url.path.startswith(("/api/", "/export")) else self._redirect("/")
+
+        if url.path == "/suivre-ma-consommation":
+            iframe = '<iframe src="/mes-mesures/" title="Mes mesures" width="1200" height="700"></iframe>'
+            return self._page("Suivre ma consommation", _HOME_BODY.substitute(content=iframe))
+
+        if url.path == "/mes-mesures/":
+            self.portal.wait("page")
+            config = {
+                "today": self.portal.today.isoformat(),
+                "iframe_ms": int(self.portal.latencies["iframe"] * 1000),
+                "visualise_ms": int(self.portal.latencies["visualise"] * 1000),
+                "token": self._session()["token"],
+            }
+            return self._send(
+                200,
+                _MEASURES_APP.substitute(config=json.dumps(config), assets=_ASSET_TAGS, images=_ASSET_IMAGES).encode("utf-8"),
+            )
+
+        if url.path == "/export":
+            try:
+                start, end = date.fromisoformat(query["start"]), date.fromisoformat(query["end"])
+            except (KeyError, ValueError):
+                return self._send(400)
+            step = query.get("pas", "heures")
+            if step not in STEP_EXPORTS:
+                return self._send(400)
+            self.portal.wait("download")
+            self.portal.record_download(start, end)
+            name = f"Enedis_Conso_{step.capitalize()}_{start:%Y%m%d}-{end:%Y%m%d}_{MOCK_PRM}.csv"
+            return self._send(
+                200,
+                build_export_csv(start, end, step=step),
+                "text/csv; charset=utf-8",
+                {"Content-Disposition": f'attachment; filename="{name}"'},
+            )
+
+        if url.path == "/api/mesures":
+            if self.headers.get("Authorization") != f"Bearer {self._session()['token']}":
+                return self._send(401)
+            try:
+                start, end = date.fromisoformat(query["start"]), date.fromisoformat(query["end"])
+            except (KeyError, ValueError):
+                return self._send(400)
+            step = query.get("pas", "heures")
+            if step not in STEP_EXPORTS:
+                return self._send(400)
+            self.portal.wait("api")
+            self.portal.record_download(start, end - timedelta(days=1))
+            return self._send(200, build_api_response(start, end, query.get("prm") or MOCK_PRM, step), "application/json")
+
+        self._send(404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self.portal.record("POST", url.path)
+        if url.path != "/login":
+            return self._send(404)
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            credentials = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400)
+
+        self.portal.wait("login")
+        if (credentials.get("email"), credentials.get("password")) != (self.portal.email, self.portal.password):
+            return self._send(401)
+
+        session_id = secrets.token_urlsafe(16)
+        with self.portal.lock:
+            self.portal.sessions[session_id] = {"token": _fake_jwt()}
+            self.portal.logins += 1
+        self._send(204, headers={"Set-Cookie": f"session={session_id}; Path=/; HttpOnly"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockPortal:
+    """
+    Portail simulé démarré dans un thread (utilisable comme context manager)
+
+    Attributs utiles après un run : logins (connexions réussies), downloads (périodes
+    servies par l'export ou l'API, graphique de Visualiser compris, dans l'ordre), requests (méthode, chemin).
+    """
+
+    def __init__(
+        self,
+        latencies: dict = None,
+        today: date = None,
+        email: str = MOCK_EMAIL,
+        password: str = MOCK_PASSWORD,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            latencies: Latences par étape en secondes (complète le profil "zero")
+            today: Date du jour affichée par le calendrier (défaut: aujourd'hui)
+            email: Identifiant accepté
+            password: Mot de passe accepté
+            host: Adresse d'écoute (boucle locale)
+            port: Port d'écoute (0 = port libre)
+        """
+        self.latencies = {**LATENCY_PROFILES["zero"], **(latencies or {})}
+        self.today = today or date.today()
+        self.email = email
+        self.password = password
+        self.sessions = {}
+        self.logins = 0
+        self.downloads = []
+        self.requests = []
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _PortalHandler)
+        self._server.daemon_threads = True
+        self._server.portal = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def api_url_template(self) -> str:
+        """Gabarit MEASURES_API_URL correspondant à l'API simulée"""
+        return self.url + "api/mesures?prm={prm}&pas={step}&start={start}&end={end_exclusive}"
+
+    def wait(self, stage: str) -> None:
+        delay = self.latencies.get(stage, 0)
+        if delay:
+            time.sleep(delay)
+
+    def record(self, method: str, path: str) -> None:
+        with self.lock:
+            self.requests.append((method, path))
+
+    def record_download(self, start: date, end: date) -> None:
+        with self.lock:
+            self.downloads.append((start, end))
+
+    def start(self) -> "MockPortal":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-portal", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockPortal":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portail Enedis simulé (benchmarks et développement)")
+    parser.add_argument("--port", type=int, default=8080, help="Port d'écoute (défaut: 8080)")
+    parser.add_argument("--profile", choices=sorted(LATENCY_PROFILES), default="fast", help="Profil de latences")
+    parser.add_argument("--today", type=date.fromisoformat, help="Date du jour du calendrier (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    portal = MockPortal(LATENCY_PROFILES[args.profile], today=args.today, port=args.port).start()
+    print(f"🌐 Portail simulé: {portal.url}")
+    print(f"   ACCOUNT_EMAIL={MOCK_EMAIL} ACCOUNT_PASSWORD={MOCK_PASSWORD} BASE_URL={portal.url}")
+    print(f"   MEASURES_API_URL='{portal.api_url_template}'")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        portal.stop()
+
+
+if __name__ == "__main__":
+    main()
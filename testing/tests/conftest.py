@@ -15,6 +15,17 @@ import pytest
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 
+@pytest.fixture(autouse=True)
+def isolated_wait_stats(tmp_path, monkeypatch):
+    """Délais adaptatifs repartant des valeurs par défaut, sans écrire dans downloads/"""
+    module = sys.modules.get("conso_downloader.metrics")
+    if module is not None:
+        # Instance partagée par tous les modules du paquet : on la réinitialise au lieu de la remplacer
+        monkeypatch.setattr(module.WAIT_TIMEOUTS, "path", str(tmp_path / "stage_stats.json"))
+        monkeypatch.setattr(module.WAIT_TIMEOUTS, "stats", None)
+        monkeypatch.setattr(module.WAIT_TIMEOUTS, "_dirty", False)
+
+
 @pytest.fixture
 def temp_download_dir():
     """Crée un répertoire temporaire pour les téléchargements"""
@@ -35,6 +46,39 @@ def mock_driver():
     return driver
 
 
+@pytest.fixture
+def snapshot_driver():
+    """
+    Fabrique de drivers simulés pour snapshot_elements
+
+    Chaque argument associe un sélecteur CSS à ses éléments : un texte (élément visible et
+    activé) ou un tuple (texte, visible, activé). Les éléments créés sont dans driver.elements.
+    """
+
+    def make(**elements_by_selector):
+        from conso_downloader.browser import _SNAPSHOT_JS
+
+        driver = MagicMock()
+        driver.elements = {}
+        rows_by_selector = {}
+        for selector, elements in elements_by_selector.items():
+            rows = rows_by_selector[selector] = []
+            for element in elements:
+                text, visible, enabled = (element, True, True) if isinstance(element, str) else element
+                rows.append([MagicMock(), visible, enabled, text, ""])
+            driver.elements[selector] = [row[0] for row in rows]
+
+        def execute_script(script, *args):
+            if script == _SNAPSHOT_JS:
+                return rows_by_selector.get(args[0], [])
+            return None
+
+        driver.execute_script.side_effect = execute_script
+        return driver
+
+    return make
+
+
 @pytest.fixture
 def mock_wait():
     """Mock de WebDriverWait"""
@@ -0,0 +1,106 @@
+"""
+Tests des délais d'attente adaptatifs
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import conso_downloader  # noqa: E402
+from conso_downloader import ADAPTIVE_MIN_SAMPLES, WAIT_DEFAULTS, AdaptiveTimeouts  # noqa: E402
+
+
+def _record(timeouts, name, elapsed, count=ADAPTIVE_MIN_SAMPLES, completed=True):
+    for _ in range(count):
+        timeouts.record(name, elapsed, completed)
+
+
+class TestAdaptiveTimeouts:
+    """Tests pour la classe AdaptiveTimeouts"""
+
+    def test_defaults_without_history(self, tmp_path):
+        """Test des délais par défaut sans fichier de statistiques"""
+        timeouts = AdaptiveTimeouts(str(tmp_path / "stats.json"))
+
+        assert timeouts.timeout("captcha") == WAIT_DEFAULTS["captcha"][0]
+        assert timeouts.fallback("heures") == WAIT_DEFAULTS["heures"][1]
+
+    def test_defaults_until_enough_samples(self, tmp_path):
+        """Test que quelques mesures ne suffisent pas à changer le délai"""
+        timeouts = AdaptiveTimeouts(str(tmp_path / "stats.json"))
+        _record(timeouts, "captcha", 2.0, count=ADAPTIVE_MIN_SAMPLES - 1)
+
+        assert timeouts.timeout("captcha") == 30
+
+    def test_fast_portal_shrinks_timeout(self, tmp_path):
+        """Test qu'un portail rapide resserre le délai et la pause de repli"""
+        timeouts = AdaptiveTimeouts(str(tmp_path / "stats.json"))
+        _record(timeouts, "captcha", 4.0)
+        _record(timeouts, "heures", 1.0)
+
+        assert timeouts.timeout("captcha") == 6.0
+        assert timeouts.fallback("heures") == 1.0
+
+    def test_timeout_is_clamped(self, tmp_path):
+        """Test des bornes (20 % et 300 % du délai par défaut)"""
+        timeouts = AdaptiveTimeouts(str(tmp_path / "stats.json"))
+        _record(timeouts, "captcha", 0.1)
+        _record(timeouts, "post_login", 60.0)
+
+        assert timeouts.timeout("captcha") == 6.0
+        assert timeouts.timeout("post_login") == 24
+
+    def test_timeouts_lengthen_the_wait(self, tmp_path):
+        """Test qu'un dépassement compte comme une mesure (portail qui ralentit)"""
+        timeouts = AdaptiveTimeouts(str(tmp_path / "stats.json"))
+        _record(timeouts, "heures", 1.0)
+        fast = timeouts.timeout("heures")
+        _record(timeouts, "heures", fast, count=3, completed=False)
+
+        assert timeouts.timeout("heures") > fast
+        assert timeouts.stats["heures"]["timeouts"] == 3
+
+    def test_save_and_reload(self, tmp_path):
+        """Test de la persistance entre deux exécutions"""
+        path = tmp_path / "stats.json"
+        timeouts = AdaptiveTimeouts(str(path))
+        _record(timeouts, "captcha", 4.0)
+        timeouts.save()
+
+        assert json.loads(path.read_text())["version"] == 1
+        assert AdaptiveTimeouts(str(path)).timeout("captcha") == timeouts.timeout("captcha")
+
+    def test_save_without_new_samples(self, tmp_path):
+        """Test qu'aucun fichier n'est écrit sans nouvelle mesure"""
+        path = tmp_path / "stats.json"
+        AdaptiveTimeouts(str(path)).save()
+
+        assert not path.exists()
+
+    def test_corrupted_file_falls_back_to_defaults(self, tmp_path):
+        """Test qu'un fichier illisible ne bloque pas le téléchargement"""
+        path = tmp_path / "stats.json"
+        path.write_text("{not json")
+
+        assert AdaptiveTimeouts(str(path)).timeout("iframe") == WAIT_DEFAULTS["iframe"][0]
+
+
+class TestAdaptiveWait:
+    """Tests pour la fonction adaptive_wait"""
+
+    def test_passes_learned_timeout_and_records(self):
+        """Test que l'attente reçoit le délai appris et que sa durée est enregistrée"""
+        received = []
+
+        result = conso_downloader.adaptive_wait("menu_links", lambda timeout: received.append(timeout) or "ok")
+
+        assert result == "ok"
+        assert received == [WAIT_DEFAULTS["menu_links"][0]]
+        assert conso_downloader.WAIT_TIMEOUTS.stats["menu_links"]["timeouts"] == 0
+
+    def test_falsy_result_is_recorded_as_timeout(self):
+        """Test qu'une attente échouée est comptée comme dépassement"""
+        assert conso_downloader.adaptive_wait("iframe", lambda timeout: False) is False
+        assert conso_downloader.WAIT_TIMEOUTS.stats["iframe"]["timeouts"] == 1
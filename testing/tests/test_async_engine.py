@@ -0,0 +1,168 @@
+"""
+Tests du moteur async (un seul navigateur, un contexte de navigation isolé par compte)
+"""
+
+import asyncio
+import json
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from types import ModuleType
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    click_calendar_button_async,
+    load_manifest,
+    mark_period_downloaded,
+    run_accounts_async,
+    run_batch,
+    save_manifest,
+)
+
+ACCOUNTS = [
+    {"name": "maison", "email": "john@example.com", "password": "x", "prms": ["111"]},
+    {"name": "garage", "email": "jane@example.com", "password": "y", "prms": []},
+]
+
+
+def _fake_playwright(browser):
+    """Module playwright.async_api factice : async_playwright() ouvre un navigateur simulé"""
+    playwright = MagicMock()
+    playwright.chromium.launch = AsyncMock(return_value=browser)
+    manager = MagicMock()
+    manager.__aenter__ = AsyncMock(return_value=playwright)
+    manager.__aexit__ = AsyncMock(return_value=False)
+    module = ModuleType("playwright.async_api")
+    module.async_playwright = MagicMock(return_value=manager)
+    return module, playwright
+
+
+def _fake_browser():
+    """Navigateur simulé : un contexte (et une page) distinct par appel à new_context"""
+    browser = MagicMock()
+    browser.close = AsyncMock()
+    contexts = []
+
+    async def new_context(**kwargs):
+        context = MagicMock()
+        context.new_page = AsyncMock(return_value=MagicMock())
+        context.close = AsyncMock()
+        contexts.append(context)
+        return context
+
+    browser.new_context = AsyncMock(side_effect=new_context)
+    return browser, contexts
+
+
+class TestRunAccountsAsync:
+    """Tests pour la fonction run_accounts_async"""
+
+    @patch("conso_downloader.async_engine.WORKER_LOGIN_STAGGER", 0)
+    @patch("conso_downloader.async_engine.visualize_and_download_async")
+    @patch("conso_downloader.async_engine.select_date_range_async", return_value=True)
+    @patch("conso_downloader.async_engine.open_measures_page_async")
+    def test_one_browser_one_context_per_account(self, mock_open, mock_select, mock_download, tmp_path):
+        """Test qu'un seul navigateur est lancé et que chaque compte a son contexte, toujours fermé"""
+        browser, contexts = _fake_browser()
+        module, playwright = _fake_playwright(browser)
+        mock_open.return_value = MagicMock()
+
+        async def download(page, frame, download_dir, file_name):
+            path = Path(download_dir) / file_name("csv")
+            path.write_text("")
+            return str(path)
+
+        mock_download.side_effect = download
+        stored_in = []
+
+        def store_period(manifest, step, start, end, file_path, download_dir, store_dir):
+            stored_in.append(threading.current_thread())
+            mark_period_downloaded(manifest, start, end, file_path)
+            save_manifest(manifest, download_dir)
+
+        store = patch("conso_downloader.async_engine.store_downloaded_period", side_effect=store_period)
+
+        with patch.dict(sys.modules, {"playwright.async_api": module}), store:
+            reports = asyncio.run(
+                run_accounts_async(ACCOUNTS, datetime(2024, 1, 1), datetime(2024, 1, 7), str(tmp_path), max_contexts=2)
+            )
+
+        playwright.chromium.launch.assert_awaited_once()
+        browser.close.assert_awaited_once()
+        assert len(contexts) == 2
+        assert all(context.close.await_count == 1 for context in contexts)
+        assert [call.args[1] for call in mock_open.call_args_list] == ["john@example.com", "jane@example.com"]
+        assert [report["success"] for report in reports] == [True, True]
+        assert reports[0]["results"] == {"111": True}
+        assert "2024-01-07" in load_manifest(str(tmp_path / "maison"))["days"]
+        assert (tmp_path / "maison" / "conso_20240101_20240107_111.csv").exists()
+        # Stockage exécuté hors de la boucle d'évènements
+        assert stored_in and threading.main_thread() not in stored_in
+
+    @patch("conso_downloader.async_engine.WORKER_LOGIN_STAGGER", 0)
+    @patch("conso_downloader.async_engine.open_measures_page_async", side_effect=RuntimeError("crash"))
+    def test_context_closed_on_error(self, mock_open, tmp_path):
+        """Test qu'une erreur dans un compte ferme son contexte sans bloquer les autres"""
+        browser, contexts = _fake_browser()
+        module, _ = _fake_playwright(browser)
+
+        with patch.dict(sys.modules, {"playwright.async_api": module}):
+            reports = asyncio.run(run_accounts_async(ACCOUNTS, datetime(2024, 1, 1), datetime(2024, 1, 7), str(tmp_path)))
+
+        assert [report["success"] for report in reports] == [False, False]
+        assert all(context.close.await_count == 1 for context in contexts)
+
+    @patch("conso_downloader.async_engine.logger")
+    def test_missing_playwright(self, mock_logger, tmp_path):
+        """Test que l'absence de playwright donne des comptes en échec avec une indication d'installation"""
+        with patch.dict(sys.modules, {"playwright.async_api": None}):
+            reports = asyncio.run(run_accounts_async(ACCOUNTS, None, None, str(tmp_path)))
+
+        assert [report["success"] for report in reports] == [False, False]
+        assert "pip install playwright" in mock_logger.error.call_args.args[0]
+
+
+class TestRunBatchAsync:
+    """Tests du moteur async dans run_batch"""
+
+    @patch("conso_downloader.accounts.run_account")
+    @patch("conso_downloader.async_engine.run_accounts_async")
+    def test_async_engine_dispatch(self, mock_run_async, mock_run_account, tmp_path):
+        """Test que le moteur async remplace le pool de navigateurs et ne reçoit que ses options"""
+
+        async def run(accounts, *args, **kwargs):
+            return [{"name": a["name"], "email": "***", "success": True, "duration": 1.0} for a in accounts]
+
+        mock_run_async.side_effect = run
+
+        assert run_batch(ACCOUNTS, None, None, str(tmp_path), max_workers=8, engine="async", http_workers=4, headless=True)
+
+        mock_run_account.assert_not_called()
+        assert mock_run_async.call_args.kwargs == {"max_contexts": 2, "headless": True}
+        report = json.loads((tmp_path / "batch_report.json").read_text())
+        assert [account["name"] for account in report["accounts"]] == ["maison", "garage"]
+
+
+class TestClickCalendarButtonAsync:
+    """Tests pour la fonction click_calendar_button_async"""
+
+    @patch("conso_downloader.async_engine.asyncio.sleep", new_callable=AsyncMock)
+    def test_polls_until_clicked(self, mock_sleep):
+        """Test que le bouton est recherché jusqu'à son apparition"""
+        frame = MagicMock()
+        frame.evaluate = AsyncMock(side_effect=[False, False, True])
+
+        assert asyncio.run(click_calendar_button_async(frame, "year", 2024)) is True
+        assert frame.evaluate.await_count == 3
+        assert frame.evaluate.call_args.args[1] == ["year", "2024", True, None]
+
+    def test_other_month_shown(self):
+        """Test qu'un autre mois affiché est signalé sans attendre le délai"""
+        frame = MagicMock()
+        frame.evaluate = AsyncMock(return_value="elsewhere")
+
+        assert asyncio.run(click_calendar_button_async(frame, "day", 5, shown=["JAN", "2024"])) == "elsewhere"
+        frame.evaluate.assert_awaited_once()
@@ -0,0 +1,175 @@
+"""
+Tests du rattrapage d'historique (file SQLite persistante)
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    BACKFILL_DB_FILE,
+    BackfillQueue,
+    load_manifest,
+    mark_period_downloaded,
+    plan_periods,
+    run_backfill,
+    save_manifest,
+    validate_date_range,
+)
+
+EMPTY_MANIFEST = {"version": 1, "days": {}}
+
+
+def _record_download(start, end, download_dir=None, **kwargs):
+    """download_consumption_data simulé : période enregistrée dans le manifeste"""
+    manifest = load_manifest(download_dir)
+    mark_period_downloaded(manifest, start, end)
+    save_manifest(manifest, download_dir)
+    return True
+
+
+def _queue(tmp_path, start=datetime(2021, 1, 4), end=datetime(2021, 1, 31)):
+    queue = BackfillQueue(str(tmp_path / BACKFILL_DB_FILE))
+    queue.enqueue(plan_periods(EMPTY_MANIFEST, start, end))
+    return queue
+
+
+class TestValidateDateRangeBackfill:
+    """Tests de la limite de durée selon le mode"""
+
+    def test_multi_year_range_allowed_without_cap(self):
+        """Test qu'une plage de plusieurs années n'est acceptée que sans limite"""
+        start, end = datetime(2020, 1, 1), datetime(2023, 12, 31)
+
+        with pytest.raises(ValueError):
+            validate_date_range(start, end)
+        assert validate_date_range(start, end, max_days=None) == (start, end)
+
+
+class TestBackfillQueue:
+    """Tests pour la classe BackfillQueue"""
+
+    def test_enqueue_is_idempotent(self, tmp_path):
+        """Test qu'une plage ajoutée deux fois ne duplique pas les périodes"""
+        queue = _queue(tmp_path)
+
+        assert queue.enqueue(plan_periods(EMPTY_MANIFEST, datetime(2021, 1, 4), datetime(2021, 1, 31))) == 0
+        assert queue.counts() == {"pending": 4}
+
+    def test_newest_first_contiguous_batch(self, tmp_path):
+        """Test que les lots partent des périodes les plus récentes et restent contigus"""
+        queue = _queue(tmp_path)
+
+        batch = queue.next_batch(2)
+
+        assert [(window.start, window.end) for window in batch] == [
+            (datetime(2021, 1, 25), datetime(2021, 1, 31)),
+            (datetime(2021, 1, 18), datetime(2021, 1, 24)),
+        ]
+        assert queue.counts() == {"pending": 2, "running": 2}
+
+    def test_batch_stops_at_gap(self, tmp_path):
+        """Test qu'une période déjà terminée coupe le lot (une seule plage par appel)"""
+        queue = _queue(tmp_path)
+        newest = queue.next_batch(1)[0]
+        queue.finish(queue.next_batch(1)[0], success=True)
+        queue.finish(newest, success=False)
+
+        assert [window.start for window in queue.next_batch(3)] == [datetime(2021, 1, 25)]
+
+    def test_running_windows_recovered_after_restart(self, tmp_path):
+        """Test qu'un arrêt brutal remet les périodes en cours dans la file"""
+        queue = _queue(tmp_path)
+        queue.next_batch(4)
+        queue.close()
+
+        assert BackfillQueue(str(tmp_path / BACKFILL_DB_FILE)).counts() == {"pending": 4}
+
+    def test_window_abandoned_after_max_attempts(self, tmp_path):
+        """Test qu'une période toujours en échec finit abandonnée"""
+        queue = _queue(tmp_path, datetime(2021, 1, 25))
+        for _ in range(3):
+            queue.finish(queue.next_batch(1)[0], success=False, max_attempts=3)
+
+        assert queue.counts() == {"failed": 1}
+        assert queue.next_batch(1) == []
+
+    def test_hourly_budget(self, tmp_path):
+        """Test du budget de requêtes sur l'heure glissante"""
+        queue = _queue(tmp_path)
+        queue.record_requests(3)
+
+        assert queue.budget(5) == (2, 0.0)
+        available, wait = queue.budget(3)
+        assert available == 0
+        assert 3590 < wait <= 3600
+
+
+class TestRunBackfill:
+    """Tests pour la fonction run_backfill"""
+
+    @patch("conso_downloader.backfill.BrowserSession")
+    @patch("conso_downloader.backfill.download_consumption_data")
+    def test_multi_year_import(self, mock_download, mock_session_class, tmp_path):
+        """Test d'un import de trois ans, lot par lot, du plus récent au plus ancien"""
+
+        def download(start, end, download_dir=None, **kwargs):
+            manifest = load_manifest(download_dir)
+            mark_period_downloaded(manifest, start, end)
+            save_manifest(manifest, download_dir)
+            return True
+
+        mock_download.side_effect = download
+
+        assert run_backfill(
+            datetime(2021, 1, 1), datetime(2023, 12, 31), granularity="days", download_dir=str(tmp_path), workers=1
+        )
+
+        ranges = [(call.args[0], call.args[1]) for call in mock_download.call_args_list]
+        assert ranges[0][1] == datetime(2023, 12, 31)
+        assert ranges[-1][0] == datetime(2021, 1, 1)
+        assert all(later[0] - timedelta(days=1) == earlier[1] for later, earlier in zip(ranges, ranges[1:]))
+        mock_session_class.return_value.close.assert_called_once()
+
+    @patch("conso_downloader.backfill.BrowserSession")
+    @patch("conso_downloader.backfill.download_consumption_data")
+    def test_single_browser_batch_spans_budget(self, mock_download, mock_session_class, tmp_path):
+        """Test qu'avec un navigateur un lot réunit les périodes contiguës du budget (une préparation de page)"""
+        mock_download.side_effect = _record_download
+
+        assert run_backfill(datetime(2021, 1, 4), datetime(2021, 3, 28), download_dir=str(tmp_path), workers=1)
+
+        assert [call.args[:2] for call in mock_download.call_args_list] == [(datetime(2021, 1, 4), datetime(2021, 3, 28))]
+
+    @patch("conso_downloader.backfill.time")
+    @patch("conso_downloader.backfill.BrowserSession")
+    @patch("conso_downloader.backfill.download_consumption_data")
+    def test_worker_pool_batches_use_budget(self, mock_download, mock_session_class, mock_time, tmp_path):
+        """Test qu'avec un pool de navigateurs les connexions servent tout le budget de l'heure"""
+        clock = [1_700_000_000.0]
+        mock_time.time.side_effect = lambda: clock[0]
+        mock_time.sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds + 1)
+        mock_download.side_effect = _record_download
+
+        assert run_backfill(
+            datetime(2021, 1, 4), datetime(2021, 3, 28), download_dir=str(tmp_path), workers=3, requests_per_hour=10
+        )
+
+        # 12 semaines : un pool pour 10 périodes puis un pour les 2 dernières, au lieu de 4 pools de 3
+        assert [(call.args[1] - call.args[0]).days + 1 for call in mock_download.call_args_list] == [70, 14]
+        mock_session_class.assert_not_called()
+
+    @patch("conso_downloader.backfill.time.sleep")
+    @patch("conso_downloader.backfill.BrowserSession")
+    @patch("conso_downloader.backfill.download_consumption_data", return_value=False)
+    def test_failed_windows_stay_in_queue(self, mock_download, mock_session_class, mock_sleep, tmp_path):
+        """Test qu'une période non enregistrée dans le manifeste est retentée puis abandonnée"""
+        assert not run_backfill(datetime(2021, 1, 25), datetime(2021, 1, 31), download_dir=str(tmp_path))
+
+        assert mock_download.call_count == 5
+        assert BackfillQueue(str(tmp_path / BACKFILL_DB_FILE)).counts() == {"failed": 1}
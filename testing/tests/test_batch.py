@@ -0,0 +1,120 @@
+"""
+Tests du mode multi-comptes (--accounts)
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import load_accounts, run_account, run_batch  # noqa: E402
+
+
+def _write_accounts(tmp_path, accounts):
+    """Écrit un fichier de comptes en 600"""
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps({"accounts": accounts}))
+    os.chmod(path, 0o600)
+    return str(path)
+
+
+class TestLoadAccounts:
+    """Tests pour la fonction load_accounts"""
+
+    def test_password_from_environment(self, tmp_path):
+        """Test de la lecture du mot de passe dans la variable indiquée"""
+        path = _write_accounts(tmp_path, [{"name": "maison", "email": "a@b.c", "password_env": "MAISON_PWD", "prms": [123]}])
+
+        with patch.dict("os.environ", {"MAISON_PWD": "secret"}):
+            accounts = load_accounts(path)
+
+        assert accounts == [{"name": "maison", "email": "a@b.c", "password": "secret", "prms": ["123"]}]
+
+    def test_name_is_sanitized(self, tmp_path):
+        """Test qu'un nom ne peut pas sortir du répertoire de sortie"""
+        path = _write_accounts(tmp_path, [{"name": "../etc", "email": "a@b.c", "password": "x"}])
+
+        assert load_accounts(path)[0]["name"] == ".._etc"
+
+    def test_missing_password_rejected(self, tmp_path):
+        """Test qu'un compte sans mot de passe est refusé"""
+        path = _write_accounts(tmp_path, [{"email": "a@b.c", "password_env": "ABSENT_PWD"}])
+
+        with patch.dict("os.environ", {}, clear=True), pytest.raises(ValueError):
+            load_accounts(path)
+
+    def test_duplicate_names_rejected(self, tmp_path):
+        """Test que deux comptes ne peuvent pas partager un répertoire"""
+        path = _write_accounts(
+            tmp_path, [{"name": "a", "email": "a@b.c", "password": "x"}, {"name": "a", "email": "d@e.f", "password": "y"}]
+        )
+
+        with pytest.raises(ValueError):
+            load_accounts(path)
+
+
+class TestRunAccount:
+    """Tests pour la fonction run_account"""
+
+    @patch("conso_downloader.accounts.download_consumption_data", return_value=True)
+    @patch("conso_downloader.accounts.BrowserSession")
+    def test_http_engine_one_directory_per_prm(self, mock_session_class, mock_download, tmp_path):
+        """Test qu'une session est partagée par tous les PRM du compte"""
+        account = {"name": "maison", "email": "john@example.com", "password": "x", "prms": ["111", "222"]}
+
+        report = run_account(account, None, None, str(tmp_path), engine="http")
+
+        mock_session_class.assert_called_once()
+        mock_session_class.return_value.close.assert_called_once()
+        dirs = [call.kwargs["download_dir"] for call in mock_download.call_args_list]
+        assert dirs == [str(tmp_path / "maison" / "111"), str(tmp_path / "maison" / "222")]
+        assert report["success"] is True
+        assert "john" not in report["email"]
+
+    @patch("conso_downloader.accounts.download_consumption_data", return_value=True)
+    @patch("conso_downloader.accounts.BrowserSession")
+    def test_ui_engine_downloads_default_prm_only(self, mock_session_class, mock_download, tmp_path):
+        """Test que le moteur ui ne télécharge que le PRM affiché"""
+        account = {"name": "maison", "email": "a@b.c", "password": "x", "prms": ["111", "222"]}
+
+        run_account(account, None, None, str(tmp_path))
+
+        mock_download.assert_called_once()
+        assert mock_download.call_args.kwargs["download_dir"] == str(tmp_path / "maison")
+
+
+class TestRunBatch:
+    """Tests pour la fonction run_batch"""
+
+    @patch("conso_downloader.accounts.run_account")
+    def test_report_written_and_failures_counted(self, mock_run_account, tmp_path):
+        """Test du rapport agrégé et du code de retour"""
+        mock_run_account.side_effect = lambda account, *args, **kwargs: {
+            "name": account["name"],
+            "email": "a***@b.c",
+            "success": account["name"] == "ok",
+            "duration": 1.0,
+        }
+        accounts = [{"name": "ok"}, {"name": "ko"}]
+
+        assert run_batch(accounts, datetime(2024, 1, 1), datetime(2024, 1, 7), str(tmp_path), max_workers=2) is False
+
+        report = json.loads((tmp_path / "batch_report.json").read_text())
+        assert [entry["name"] for entry in report["accounts"]] == ["ok", "ko"]
+        delays = sorted(call.kwargs["start_delay"] for call in mock_run_account.call_args_list)
+        assert delays[0] == 0 and delays[1] > 0
+
+    @patch("conso_downloader.accounts.ThreadPoolExecutor", wraps=ThreadPoolExecutor)
+    @patch("conso_downloader.accounts.run_account", return_value={"name": "a", "email": "x", "success": True, "duration": 0})
+    def test_pool_is_bounded(self, mock_run_account, mock_pool, tmp_path):
+        """Test que le pool ne dépasse pas le nombre de comptes"""
+        assert run_batch([{"name": "a"}], None, None, str(tmp_path), max_workers=8) is True
+
+        assert mock_pool.call_args.kwargs["max_workers"] == 1
@@ -0,0 +1,158 @@
+"""
+Tests de la sélection des dates dans le calendrier
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import click_calendar_button, click_shown_day, select_calendar_date, select_date_range  # noqa: E402
+
+
+def _calendar_driver(missing=(), shown=("JAN", "2024")):
+    """
+    Mock d'un driver dont le calendrier trouve tous les boutons sauf ceux de `missing`
+
+    Le calendrier affiche le mois `shown` ; un clic sur une année puis un mois change le mois affiché.
+    """
+    driver = MagicMock()
+    state = {"shown": list(shown), "year": None}
+
+    def execute_script(script, kind, value, click, expected=None):
+        if kind in missing:
+            return False
+        if expected and expected != state["shown"]:
+            return "sameYear" if expected[1] == state["shown"][1] else "elsewhere"
+        if kind == "monthOrYear":
+            # Vue des mois ouverte sur l'année affichée
+            state["shown"] = value.split("|")
+            return "month"
+        if kind == "year":
+            state["year"] = value
+        elif kind == "month":
+            state["shown"] = [value, state["year"]]
+        return True
+
+    driver.execute_script.side_effect = execute_script
+    return driver
+
+
+class TestClickCalendarButton:
+    """Tests pour la fonction click_calendar_button"""
+
+    def test_single_request_when_button_present(self):
+        """Test qu'un bouton visible est cliqué en une seule requête"""
+        driver = _calendar_driver()
+
+        assert click_calendar_button(driver, "year", 2024) is True
+        driver.execute_script.assert_called_once()
+        assert driver.execute_script.call_args.args[1:] == ("year", "2024", True)
+
+    def test_timeout_when_button_absent(self):
+        """Test du timeout quand le bouton n'apparaît pas"""
+        driver = _calendar_driver(missing=("day",))
+
+        assert click_calendar_button(driver, "day", 31, timeout=0.3) is False
+
+
+class TestSelectDateRange:
+    """Tests pour la fonction select_date_range"""
+
+    def test_request_count_per_window(self):
+        """Test du nombre de requêtes WebDriver pour une période du mois affiché (ouverture + 2 jours)"""
+        driver = _calendar_driver()
+
+        assert select_date_range(driver, datetime(2024, 1, 1), datetime(2024, 1, 7)) is True
+        assert driver.execute_script.call_count == 3
+        driver.find_elements.assert_not_called()
+
+    def test_only_changed_month_is_navigated(self):
+        """Test qu'une période à cheval sur deux mois ne navigue que pour la date de fin"""
+        driver = _calendar_driver()
+
+        assert select_date_range(driver, datetime(2024, 1, 29), datetime(2024, 2, 4)) is True
+        values = [call.args[1:3] for call in driver.execute_script.call_args_list]
+        assert values == [
+            ("open", ""),
+            ("day", "29"),
+            ("day", "4"),
+            ("header", ""),
+            ("monthOrYear", "FÉV|2024"),
+            ("day", "4"),
+        ]
+
+    def test_other_year_is_navigated(self):
+        """Test qu'un changement d'année passe par la vue des années"""
+        driver = _calendar_driver(shown=("DÉC", "2023"))
+
+        assert select_calendar_date(driver, datetime(2024, 1, 2)) is True
+        values = [call.args[1:3] for call in driver.execute_script.call_args_list]
+        assert values == [("day", "2"), ("header", ""), ("year", "2024"), ("month", "JAN"), ("day", "2")]
+
+    @patch("conso_downloader.browser.click_shown_day", return_value="same_year")
+    @patch("conso_downloader.browser.click_calendar_button")
+    def test_same_year_falls_back_to_year_view(self, mock_click, mock_shown_day):
+        """Test qu'un en-tête ouvrant la vue des années (et non des mois) mène tout de même au mois"""
+        mock_click.side_effect = lambda driver, kind, *args, **kwargs: "year" if kind == "monthOrYear" else True
+
+        assert select_calendar_date(MagicMock(), datetime(2024, 3, 5)) is True
+        assert [call.args[1] for call in mock_click.call_args_list] == ["header", "monthOrYear", "month", "day"]
+
+    def test_adjacent_windows_stay_on_month(self):
+        """Test que les périodes suivantes du même mois ne renavigent pas"""
+        driver = _calendar_driver(shown=("DÉC", "2023"))
+
+        assert select_date_range(driver, datetime(2024, 1, 1), datetime(2024, 1, 7)) is True
+        driver.execute_script.reset_mock()
+        assert select_date_range(driver, datetime(2024, 1, 8), datetime(2024, 1, 14)) is True
+        assert driver.execute_script.call_count == 3
+
+    def test_any_year_is_supported(self):
+        """Test qu'aucune année n'est codée en dur"""
+        driver = _calendar_driver()
+
+        assert select_calendar_date(driver, datetime(2031, 3, 5)) is True
+        values = [call.args[1:3] for call in driver.execute_script.call_args_list]
+        assert values == [("day", "5"), ("header", ""), ("year", "2031"), ("month", "MARS"), ("day", "5")]
+
+    @patch("conso_downloader.browser.click_calendar_button", side_effect=lambda driver, kind, *args, **kwargs: kind != "open")
+    def test_missing_calendar_button(self, mock_click):
+        """Test quand le bouton calendrier est absent"""
+        assert select_date_range(MagicMock(), datetime(2024, 1, 1), datetime(2024, 1, 7)) is False
+        mock_click.assert_called_once()
+
+    @patch("conso_downloader.browser.click_shown_day", return_value=None)
+    @patch("conso_downloader.browser.click_calendar_button", side_effect=lambda driver, kind, *args, **kwargs: kind != "day")
+    def test_missing_day_fails(self, mock_click, mock_shown_day):
+        """Test qu'un jour introuvable (ex: futur, désactivé) fait échouer la sélection"""
+        assert select_date_range(MagicMock(), datetime(2024, 1, 1), datetime(2024, 1, 7)) is False
+        assert [call.args[1] for call in mock_click.call_args_list] == ["open", "header", "year", "month", "day"]
+
+
+class TestClickShownDay:
+    """Tests pour la fonction click_shown_day"""
+
+    def test_shown_month_is_passed_to_script(self):
+        """Test que le mois attendu est vérifié dans le même script que le clic"""
+        driver = _calendar_driver(shown=("AOÛT", "2024"))
+
+        assert click_shown_day(driver, datetime(2024, 8, 15)) is True
+        driver.execute_script.assert_called_once()
+        assert driver.execute_script.call_args.args[1:] == ("day", "15", True, ["AOÛT", "2024"])
+
+    def test_other_month_returns_immediately(self):
+        """Test qu'un autre mois affiché est signalé sans attendre le délai (même année ou non)"""
+        driver = _calendar_driver(shown=("JUIL", "2024"))
+
+        assert click_shown_day(driver, datetime(2024, 8, 15)) == "same_year"
+        assert click_shown_day(driver, datetime(2023, 8, 15)) is None
+        assert driver.execute_script.call_count == 2
+
+    def test_missing_day_returns_false(self):
+        """Test du timeout quand les jours n'apparaissent pas"""
+        driver = _calendar_driver(missing=("day",))
+
+        assert click_shown_day(driver, datetime(2024, 1, 31), timeout=0.3) is False
@@ -0,0 +1,165 @@
+"""
+Tests du moteur capture (réponses lues en mémoire via CDP)
+"""
+
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from selenium.common.exceptions import WebDriverException
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    CapturedResponse,
+    archive_captured_response,
+    capture_period_data,
+    download_periods_ui,
+    iter_export_points,
+    wait_for_captured_response,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+API_URL = "https://example.com/api/mesures?start=2024-01-01&end=2024-01-03"
+
+
+def _log_entry(method, **params):
+    """Entrée du journal de performance de ChromeDriver"""
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+def _response_received(request_id, url=API_URL, mime_type="application/json", status=200):
+    return _log_entry(
+        "Network.responseReceived", requestId=request_id, response={"url": url, "mimeType": mime_type, "status": status}
+    )
+
+
+def _capture_driver(*batches, bodies=None):
+    """Mock d'un driver dont le journal de performance renvoie les lots d'évènements successifs"""
+    driver = MagicMock()
+    driver.get_log.side_effect = list(batches) + [[]] * 100
+    driver.execute_cdp_cmd.side_effect = lambda command, params: {"body": bodies[params["requestId"]]}
+    return driver
+
+
+class TestIterCapturedPoints:
+    """Tests de l'analyse d'une réponse capturée, sans fichier"""
+
+    def test_json_body(self):
+        """Test qu'une réponse JSON capturée donne les mêmes points que le fichier"""
+        path = FIXTURES_DIR / "measures_api_response.json"
+        captured = CapturedResponse(API_URL, "application/json", path.read_bytes())
+
+        assert list(iter_export_points(captured)) == list(iter_export_points(str(path)))
+
+    def test_csv_body(self):
+        """Test d'un export CSV capturé (séparateur ; et en-tête d'informations)"""
+        path = FIXTURES_DIR / "export_courbe_de_charge.csv"
+        captured = CapturedResponse("https://example.com/export", "text/csv", path.read_bytes())
+
+        assert len(list(iter_export_points(captured))) == 96
+
+
+class TestWaitForCapturedResponse:
+    """Tests pour la fonction wait_for_captured_response"""
+
+    @patch("conso_downloader.capture.time.sleep")
+    def test_body_read_once_loading_finished(self, mock_sleep):
+        """Test que le corps n'est lu qu'une fois la réponse entièrement reçue"""
+        body = (FIXTURES_DIR / "measures_api_response.json").read_text()
+        driver = _capture_driver(
+            [_response_received("1")],
+            [_log_entry("Network.loadingFinished", requestId="1")],
+            bodies={"1": body},
+        )
+
+        captured = wait_for_captured_response(driver, timeout=5)
+
+        assert captured.body == body.encode("utf-8")
+        driver.execute_cdp_cmd.assert_called_once_with("Network.getResponseBody", {"requestId": "1"})
+
+    @patch("conso_downloader.capture.time.sleep")
+    def test_unrelated_responses_ignored(self, mock_sleep):
+        """Test que les pages, scripts et réponses sans points de mesure sont ignorés"""
+        body = (FIXTURES_DIR / "measures_api_response.json").read_text()
+        driver = _capture_driver(
+            [
+                _response_received("html", url="https://example.com/mes-mesures/", mime_type="text/html"),
+                _response_received("error", status=500),
+                _response_received("config"),
+                _response_received("data"),
+                _log_entry("Network.loadingFinished", requestId="html"),
+                _log_entry("Network.loadingFinished", requestId="error"),
+                _log_entry("Network.loadingFinished", requestId="config"),
+                _log_entry("Network.loadingFinished", requestId="data"),
+            ],
+            bodies={"config": '{"libelles": {"mesures": "Mesures"}}', "data": body},
+        )
+
+        captured = wait_for_captured_response(driver, timeout=5)
+
+        assert len(list(iter_export_points(captured))) == 48
+        assert [call.args[1]["requestId"] for call in driver.execute_cdp_cmd.call_args_list] == ["config", "data"]
+
+    def test_timeout(self):
+        """Test qu'aucune réponse capturée renvoie None"""
+        driver = _capture_driver()
+
+        assert wait_for_captured_response(driver, timeout=0.3) is None
+
+
+class TestCapturePeriodData:
+    """Tests pour la fonction capture_period_data"""
+
+    def test_without_performance_log(self):
+        """Test qu'un navigateur lancé sans journal réseau ne fait pas échouer la période"""
+        driver = MagicMock()
+        driver.get_log.side_effect = WebDriverException("log type 'performance' not found")
+
+        assert capture_period_data(driver) is None
+
+
+class TestDownloadPeriodsUiCapture:
+    """Tests du moteur capture dans download_periods_ui"""
+
+    @patch("conso_downloader.download.visualize_and_download")
+    @patch("conso_downloader.download.capture_period_data")
+    @patch("conso_downloader.download.select_date_range", return_value=True)
+    def test_no_file_download_when_captured(self, mock_select, mock_capture, mock_download):
+        """Test que la réponse capturée est transmise sans cliquer sur Télécharger"""
+        captured = CapturedResponse(API_URL, "application/json", b"{}")
+        mock_capture.return_value = captured
+        on_success = MagicMock()
+
+        results = download_periods_ui(
+            MagicMock(), [(datetime(2024, 1, 1), datetime(2024, 1, 7))], on_success=on_success, capture=True
+        )
+
+        assert results == [(datetime(2024, 1, 1), datetime(2024, 1, 7), captured)]
+        on_success.assert_called_once_with(datetime(2024, 1, 1), datetime(2024, 1, 7), captured)
+        mock_download.assert_not_called()
+
+    @patch("conso_downloader.download.visualize_and_download", return_value="/tmp/export.csv")
+    @patch("conso_downloader.download.capture_period_data", return_value=None)
+    @patch("conso_downloader.download.select_date_range", return_value=True)
+    def test_falls_back_to_download_button(self, mock_select, mock_capture, mock_download):
+        """Test du repli sur le bouton Télécharger si la capture échoue"""
+        results = download_periods_ui(MagicMock(), [(datetime(2024, 1, 1), datetime(2024, 1, 7))], capture=True)
+
+        assert results[0][2] == "/tmp/export.csv"
+        mock_download.assert_called_once()
+
+
+class TestArchiveCapturedResponse:
+    """Tests pour la fonction archive_captured_response"""
+
+    def test_raw_body_written(self, tmp_path):
+        """Test de l'archive brute nommée d'après la période et le type de contenu"""
+        captured = CapturedResponse(API_URL, "application/json; charset=utf-8", b'{"points": []}')
+
+        path = archive_captured_response(captured, datetime(2024, 1, 1), datetime(2024, 1, 7), str(tmp_path))
+
+        assert Path(path).name == "conso_20240101_20240107.json"
+        assert Path(path).read_bytes() == b'{"points": []}'
@@ -0,0 +1,95 @@
+"""
+Tests du relevé groupé des éléments (snapshot_elements, find_in_snapshot)
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    ElementSnapshot,
+    RpcProfiler,
+    find_in_snapshot,
+    navigate_to_consumption,
+    snapshot_elements,
+)
+from conso_downloader.browser import _SNAPSHOT_JS  # noqa: E402
+
+
+def _item(text, visible=True, enabled=True):
+    return ElementSnapshot(MagicMock(), visible, enabled, text, "")
+
+
+class TestSnapshotElements:
+    """Tests pour la fonction snapshot_elements"""
+
+    def test_single_script_call(self):
+        """Test que tous les éléments du sélecteur sont relevés par un seul script"""
+        element = MagicMock()
+        driver = MagicMock()
+        driver.execute_script.return_value = [[element, True, False, "Télécharger", "Télécharger la courbe"]]
+
+        snapshot = snapshot_elements(driver, "button")
+
+        driver.execute_script.assert_called_once_with(_SNAPSHOT_JS, "button")
+        assert snapshot == [ElementSnapshot(element, True, False, "Télécharger", "Télécharger la courbe")]
+
+    def test_no_result(self):
+        """Test qu'un script sans résultat donne une liste vide"""
+        driver = MagicMock()
+        driver.execute_script.return_value = None
+
+        assert snapshot_elements(driver, "a") == []
+
+
+class TestFindInSnapshot:
+    """Tests pour la fonction find_in_snapshot"""
+
+    def test_first_visible_match(self):
+        """Test que les éléments masqués sont ignorés"""
+        hidden, visible = _item("Ma consommation", visible=False), _item("Ma consommation")
+
+        assert find_in_snapshot([hidden, visible], "consommation") is visible
+
+    def test_exact(self):
+        """Test que la recherche exacte ignore les libellés qui ne font que contenir le texte"""
+        snapshot = [_item("Jours (jusqu'à 3 ans)"), _item("Jours")]
+
+        assert find_in_snapshot(snapshot, "Jours", exact=True) is snapshot[1]
+        assert find_in_snapshot(snapshot, "Jours") is snapshot[0]
+
+    def test_ignore_case_and_enabled(self):
+        """Test de la recherche insensible à la casse parmi les éléments activés"""
+        disabled, enabled = _item("TÉLÉCHARGER", enabled=False), _item("Télécharger")
+
+        assert find_in_snapshot([disabled, enabled], "télécharger", ignore_case=True, enabled=True) is enabled
+        assert find_in_snapshot([disabled], "Télécharger", enabled=True) is None
+
+
+class TestSnapshotRequests:
+    """Tests du nombre de commandes WebDriver envoyées"""
+
+    @patch("conso_downloader.browser.accept_cookies")
+    @patch("conso_downloader.browser.WebDriverWait")
+    @patch("conso_downloader.browser.time.sleep")
+    def test_navigation_commands(self, mock_sleep, mock_wait_class, mock_accept_cookies, snapshot_driver):
+        """Test que la navigation ne coûte qu'un relevé et un clic par menu, quel que soit le nombre d'éléments"""
+        driver = snapshot_driver(button=["Aide"] * 30 + ["Ma consommation"], a=["Contact"] * 30 + ["Suivre ma consommation"])
+        commands = []
+        driver.command_executor.execute.side_effect = lambda command, params=None: commands.append(command)
+        script = driver.execute_script.side_effect
+
+        def execute_script(*args):
+            driver.command_executor.execute("executeScript")
+            return script(*args)
+
+        driver.execute_script.side_effect = execute_script
+        profiler = RpcProfiler()
+        profiler.attach(driver)
+
+        assert navigate_to_consumption(driver) is True
+
+        assert commands == ["executeScript"] * 4
+        assert profiler.summary()[0]["function"] == "navigate_to_consumption"
@@ -0,0 +1,73 @@
+"""
+Tests des attentes événementielles (MutationObserver)
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from selenium.common.exceptions import JavascriptException
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import switch_to_iframe, visualize_and_download, wait_for_dom  # noqa: E402
+
+
+class TestWaitForDom:
+    """Tests pour la fonction wait_for_dom"""
+
+    def test_single_request(self):
+        """Test qu'une attente ne coûte qu'une requête WebDriver"""
+        driver = MagicMock()
+        driver.execute_async_script.return_value = True
+
+        assert wait_for_dom(driver, "visibleText", "span", "Heures", timeout=8) is True
+
+        driver.execute_async_script.assert_called_once()
+        _, condition, args, timeout_ms = driver.execute_async_script.call_args.args
+        assert (condition, args) == ("visibleText", ["span", "Heures"])
+        assert 7000 < timeout_ms <= 8000
+
+    def test_timeout_in_browser(self):
+        """Test que le délai dépassé côté navigateur renvoie False"""
+        driver = MagicMock()
+        driver.execute_async_script.return_value = False
+
+        assert wait_for_dom(driver, "present", "#idToken2", timeout=1) is False
+
+    @patch("conso_downloader.browser.time.sleep")
+    def test_retry_after_page_unload(self, mock_sleep):
+        """Test qu'une navigation pendant l'attente relance l'attente sur la nouvelle page"""
+        driver = MagicMock()
+        driver.execute_async_script.side_effect = [JavascriptException("document unloaded"), True]
+
+        assert wait_for_dom(driver, "present", "button", timeout=5) is True
+        assert driver.execute_async_script.call_count == 2
+
+
+class TestEventDrivenWaits:
+    """Tests du remplacement des attentes par polling"""
+
+    @patch("conso_downloader.browser.wait_for_dom", return_value=True)
+    @patch("conso_downloader.browser.WebDriverWait")
+    def test_switch_to_iframe_no_attribute_polling(self, mock_wait_class, mock_wait_for_dom):
+        """Test que l'iframe est trouvée sans lire l'attribut src de chaque iframe"""
+        iframe = MagicMock()
+        driver = MagicMock()
+        driver.find_elements.return_value = [iframe]
+
+        assert switch_to_iframe(driver) is True
+
+        iframe.get_attribute.assert_not_called()
+        driver.switch_to.frame.assert_called_once_with(iframe)
+        conditions = [call.args[1] for call in mock_wait_for_dom.call_args_list]
+        assert conditions == ["iframeSrc", "visibleText"]
+
+    @patch("conso_downloader.browser.wait_for_download", return_value="/tmp/export.csv")
+    @patch("conso_downloader.browser.wait_for_dom", return_value=True)
+    def test_download_button_wait(self, mock_wait_for_dom, mock_wait_for_download, temp_download_dir, snapshot_driver):
+        """Test que l'attente du bouton Télécharger est faite dans le navigateur"""
+        driver = snapshot_driver(button=["Visualiser", "Télécharger"])
+
+        assert visualize_and_download(driver, temp_download_dir) == "/tmp/export.csv"
+        mock_wait_for_dom.assert_called_once_with(driver, "enabledButton", "télécharger", timeout=10)
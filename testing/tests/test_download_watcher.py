@@ -0,0 +1,142 @@
+"""
+Tests de la détection de fin de téléchargement
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+
+def _simulate_chrome_download(download_dir, name, delay=0.1):
+    """Simule Chrome : fichier .crdownload écrit en plusieurs fois puis renommé"""
+    partial = os.path.join(download_dir, f"{name}.crdownload")
+    time.sleep(delay)
+    with open(partial, "wb") as f:
+        f.write(b"Horodate;Valeur\n")
+    time.sleep(delay)
+    with open(partial, "ab") as f:
+        f.write(b"2024-01-01T00:30:00+01:00;512\n")
+    os.replace(partial, os.path.join(download_dir, name))
+
+
+@pytest.fixture(params=["polling", "inotify"])
+def watcher_mode(request):
+    """Exécute chaque test avec et sans inotify"""
+    from conso_downloader import download_watcher
+
+    if request.param == "inotify" and download_watcher.INotify is None:
+        pytest.skip("inotify_simple non installé")
+    if request.param == "polling":
+        with patch("conso_downloader.download_watcher.INotify", None):
+            yield request.param
+    else:
+        yield request.param
+
+
+class TestWaitForDownload:
+    """Tests pour la fonction wait_for_download"""
+
+    def test_returns_completed_file(self, temp_download_dir, watcher_mode):
+        """Test que le fichier final est retourné une fois le .crdownload disparu"""
+        from conso_downloader import wait_for_download
+
+        thread = threading.Thread(target=_simulate_chrome_download, args=(temp_download_dir, "export.csv"))
+        thread.start()
+        path = wait_for_download(temp_download_dir, set(), timeout=5, settle_time=0.2)
+        thread.join()
+
+        assert path == os.path.join(temp_download_dir, "export.csv")
+        assert Path(path).read_bytes().endswith(b";512\n")
+
+    def test_known_files_are_ignored(self, temp_download_dir, watcher_mode):
+        """Test qu'un fichier déjà présent avant le clic n'est pas retourné"""
+        from conso_downloader import list_download_files, wait_for_download
+
+        Path(temp_download_dir, "old.csv").write_text("old")
+        known = list_download_files(temp_download_dir)
+
+        thread = threading.Thread(target=_simulate_chrome_download, args=(temp_download_dir, "new.csv"))
+        thread.start()
+        path = wait_for_download(temp_download_dir, known, timeout=5, settle_time=0.2)
+        thread.join()
+
+        assert os.path.basename(path) == "new.csv"
+
+    def test_timeout_when_nothing_arrives(self, temp_download_dir, watcher_mode):
+        """Test du timeout sans téléchargement"""
+        from conso_downloader import wait_for_download
+
+        start = time.monotonic()
+        assert wait_for_download(temp_download_dir, set(), timeout=0.5) is None
+        assert time.monotonic() - start < 2
+
+    def test_unfinished_download_is_not_returned(self, temp_download_dir, watcher_mode):
+        """Test qu'un .crdownload encore présent bloque la détection"""
+        from conso_downloader import wait_for_download
+
+        Path(temp_download_dir, "export.csv.crdownload").write_text("partial")
+        Path(temp_download_dir, "other.csv").write_text("done")
+
+        assert wait_for_download(temp_download_dir, set(), timeout=0.5, settle_time=0.1) is None
+
+    def test_hidden_files_are_ignored(self, temp_download_dir, watcher_mode):
+        """Test que le manifeste n'est pas pris pour un export"""
+        from conso_downloader import wait_for_download
+
+        Path(temp_download_dir, ".manifest.json").write_text("{}")
+
+        assert wait_for_download(temp_download_dir, set(), timeout=0.5, settle_time=0.1) is None
+
+    def test_atomic_write_temp_files_do_not_block(self, temp_download_dir, watcher_mode):
+        """Test qu'une écriture du manifeste en cours (.manifest.json.tmp) ne bloque pas la détection"""
+        from conso_downloader import wait_for_download
+
+        Path(temp_download_dir, ".manifest.json.tmp").write_text("{")
+        Path(temp_download_dir, "export.csv").write_text("done")
+
+        path = wait_for_download(temp_download_dir, set(), timeout=2, settle_time=0.1)
+
+        assert path == os.path.join(temp_download_dir, "export.csv")
+
+    def test_chrome_hidden_temp_file_blocks(self, temp_download_dir, watcher_mode):
+        """Test que le fichier caché de Chrome reste un téléchargement en cours"""
+        from conso_downloader import wait_for_download
+
+        Path(temp_download_dir, ".com.google.Chrome.a1B2c3").write_text("partial")
+        Path(temp_download_dir, "export.csv").write_text("done")
+
+        assert wait_for_download(temp_download_dir, set(), timeout=0.5, settle_time=0.1) is None
+
+
+class TestVisualizeAndDownload:
+    """Tests pour la fonction visualize_and_download"""
+
+    @patch("conso_downloader.browser.wait_for_download")
+    @patch("conso_downloader.browser.WebDriverWait")
+    def test_returns_downloaded_path(self, mock_wait_class, mock_wait_for_download, temp_download_dir, snapshot_driver):
+        """Test que le chemin du fichier est lié à la période téléchargée"""
+        from conso_downloader import WAIT_TIMEOUTS, visualize_and_download
+
+        mock_driver = snapshot_driver(button=["Visualiser", "Télécharger"])
+        mock_wait_for_download.return_value = os.path.join(temp_download_dir, "export.csv")
+
+        path = visualize_and_download(mock_driver, temp_download_dir)
+
+        assert path == os.path.join(temp_download_dir, "export.csv")
+        mock_wait_for_download.assert_called_once_with(temp_download_dir, set(), timeout=WAIT_TIMEOUTS.timeout("download"))
+
+    @patch("conso_downloader.browser.WebDriverWait")
+    def test_missing_visualiser_button(self, mock_wait_class, temp_download_dir, snapshot_driver):
+        """Test quand le bouton Visualiser est absent"""
+        from conso_downloader import visualize_and_download
+
+        mock_driver = snapshot_driver()
+
+        assert visualize_and_download(mock_driver, temp_download_dir) is None
@@ -0,0 +1,225 @@
+"""
+Tests de la préparation de Chrome/chromedriver (cache des binaires, chromedriver partagé)
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    SharedDriverService,
+    driver_service,
+    load_driver_cache,
+    new_chrome_driver,
+    prepare_driver,
+    resolve_driver_binaries,
+)
+
+
+def _fake_binary(path, output):
+    """Exécutable affichant sa version comme Chrome et chromedriver"""
+    path.write_text(f"#!/bin/sh\necho '{output}'\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.fixture
+def binaries(tmp_path):
+    """Chrome et chromedriver factices, résolus par un Selenium Manager simulé"""
+    browser = _fake_binary(tmp_path / "chrome", "Google Chrome 120.0.6099.109")
+    driver = _fake_binary(tmp_path / "chromedriver", "ChromeDriver 120.0.6099.109 (3419140ab665596f21b385ce136419fde0924272)")
+    with patch("conso_downloader.driver_service.SeleniumManager") as mock_manager:
+        mock_manager.return_value.binary_paths.return_value = {"browser_path": browser, "driver_path": driver}
+        yield browser, driver, mock_manager.return_value.binary_paths
+
+
+@pytest.fixture
+def unprepared(monkeypatch):
+    """Aucun binaire préparé ni chromedriver partagé en dehors du test"""
+    monkeypatch.setattr(driver_service, "_prepared_binaries", None)
+    monkeypatch.setattr(driver_service, "_shared_service", None)
+    monkeypatch.setattr(driver_service, "_preparation_done", False)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="binaires factices en script shell")
+class TestResolveDriverBinaries:
+    """Tests pour la fonction resolve_driver_binaries"""
+
+    def test_resolved_once_then_cached(self, binaries, tmp_path):
+        """Test que Selenium Manager n'est appelé qu'à la première résolution"""
+        browser, driver, binary_paths = binaries
+        cache_file = str(tmp_path / "cache.json")
+
+        first = resolve_driver_binaries(browser, cache_file)
+        second = resolve_driver_binaries(browser, cache_file)
+
+        assert first == second
+        assert (first.browser_path, first.driver_path) == (browser, driver)
+        assert (first.browser_version, first.driver_version) == ("120.0.6099.109", "120.0.6099.109")
+        binary_paths.assert_called_once_with(["--browser", "chrome", "--browser-path", browser])
+        assert load_driver_cache(cache_file)["chrome"]["browser_mtime"] == os.stat(browser).st_mtime
+
+    def test_chrome_update_invalidates_cache(self, binaries, tmp_path):
+        """Test qu'un binaire Chrome modifié (mise à jour) entraîne une nouvelle résolution"""
+        browser, _, binary_paths = binaries
+        cache_file = str(tmp_path / "cache.json")
+        resolve_driver_binaries(browser, cache_file)
+
+        stat = os.stat(browser)
+        os.utime(browser, (stat.st_atime, stat.st_mtime + 60))
+        resolve_driver_binaries(browser, cache_file)
+
+        assert binary_paths.call_count == 2
+
+    def test_missing_driver_invalidates_cache(self, binaries, tmp_path):
+        """Test qu'un chromedriver supprimé du cache de Selenium Manager est résolu à nouveau"""
+        browser, driver, binary_paths = binaries
+        cache_file = str(tmp_path / "cache.json")
+        resolve_driver_binaries(browser, cache_file)
+
+        os.remove(driver)
+        resolve_driver_binaries(browser, cache_file)
+
+        assert binary_paths.call_count == 2
+
+    def test_other_browser_not_taken_from_cache(self, binaries, tmp_path):
+        """Test qu'un autre binaire Chrome demandé ne réutilise pas l'entrée du cache"""
+        browser, _, binary_paths = binaries
+        cache_file = str(tmp_path / "cache.json")
+        resolve_driver_binaries(browser, cache_file)
+
+        resolve_driver_binaries(_fake_binary(tmp_path / "chromium", "Chromium 121.0.6167.85"), cache_file)
+
+        assert binary_paths.call_count == 2
+
+    def test_selenium_manager_failure(self, tmp_path):
+        """Test qu'un échec de résolution laisse Selenium faire comme avant"""
+        with patch("conso_downloader.driver_service.SeleniumManager") as mock_manager:
+            mock_manager.return_value.binary_paths.side_effect = RuntimeError("offline")
+
+            assert resolve_driver_binaries(str(tmp_path / "chrome"), str(tmp_path / "cache.json")) is None
+
+    def test_corrupted_cache(self, binaries, tmp_path):
+        """Test qu'un cache illisible est ignoré"""
+        browser, _, binary_paths = binaries
+        cache_file = tmp_path / "cache.json"
+        cache_file.write_text("{not json")
+
+        assert resolve_driver_binaries(browser, str(cache_file)) is not None
+        assert json.loads(cache_file.read_text())["chrome"]["browser_path"] == browser
+
+
+@pytest.mark.skipif(os.name == "nt", reason="binaires factices en script shell")
+class TestNewChromeDriver:
+    """Tests pour les fonctions prepare_driver et new_chrome_driver"""
+
+    @patch("conso_downloader.driver_service.webdriver.Chrome")
+    def test_default_launch_without_preparation(self, mock_chrome, unprepared):
+        """Test que sans préparation le lancement reste celui de Selenium"""
+        options = MagicMock()
+
+        new_chrome_driver(options)
+
+        mock_chrome.assert_called_once_with(options=options)
+
+    @patch("conso_downloader.driver_service.AttachedChrome")
+    @patch("conso_downloader.driver_service.Service")
+    def test_prepared_on_first_launch(self, mock_service_class, mock_attached, binaries, unprepared, monkeypatch, tmp_path):
+        """Test que la préparation différée n'a lieu qu'au premier lancement de Chrome, une seule fois"""
+        browser, driver, binary_paths = binaries
+        monkeypatch.setattr(driver_service.settings, "DRIVER_PREPARATION", True)
+        monkeypatch.setattr(driver_service, "CHROME_BINARY", browser)
+        monkeypatch.setattr(driver_service, "DRIVER_CACHE_FILE", str(tmp_path / "cache.json"))
+
+        assert driver_service._prepared_binaries is None
+        binary_paths.assert_not_called()
+
+        options = MagicMock()
+        new_chrome_driver(options)
+        new_chrome_driver(options)
+
+        binary_paths.assert_called_once()
+        assert options.binary_location == browser
+        assert mock_attached.call_count == 2
+
+    @patch("conso_downloader.driver_service.AttachedChrome")
+    @patch("conso_downloader.driver_service.Service")
+    def test_sessions_share_one_chromedriver(self, mock_service_class, mock_attached, binaries, unprepared, tmp_path):
+        """Test que les sessions successives se rattachent au même processus chromedriver"""
+        browser, driver, _ = binaries
+        mock_service_class.return_value.is_connectable.return_value = True
+        with patch("conso_downloader.driver_service.DRIVER_CACHE_FILE", str(tmp_path / "cache.json")):
+            prepare_driver(shared=True, browser_path=browser)
+
+        options = MagicMock()
+        new_chrome_driver(options)
+        new_chrome_driver(options)
+
+        mock_service_class.assert_called_once_with(executable_path=driver)
+        mock_service_class.return_value.start.assert_called_once()
+        assert mock_attached.call_count == 2
+        assert options.binary_location == browser
+
+    @patch("conso_downloader.driver_service.webdriver.Chrome")
+    @patch("conso_downloader.driver_service.Service")
+    def test_child_process_uses_own_chromedriver(self, mock_service_class, mock_chrome, binaries, unprepared, tmp_path):
+        """Test qu'un processus fils (--workers) ne se rattache pas au chromedriver du parent"""
+        browser, driver, _ = binaries
+        with patch("conso_downloader.driver_service.DRIVER_CACHE_FILE", str(tmp_path / "cache.json")):
+            prepare_driver(shared=True, browser_path=browser)
+        driver_service._shared_service.pid = os.getpid() + 1
+
+        new_chrome_driver(MagicMock())
+
+        mock_service_class.assert_called_once_with(executable_path=driver)
+        mock_service_class.return_value.start.assert_not_called()
+        assert mock_chrome.call_args.kwargs["service"] is mock_service_class.return_value
+
+
+class TestSharedDriverService:
+    """Tests pour la classe SharedDriverService"""
+
+    @patch("conso_downloader.driver_service.AttachedChrome")
+    @patch("conso_downloader.driver_service.Service")
+    def test_dead_chromedriver_restarted(self, mock_service_class, mock_attached):
+        """Test qu'un chromedriver qui ne répond plus est remplacé à la session suivante"""
+        dead, alive = MagicMock(), MagicMock()
+        dead.is_connectable.return_value = False
+        mock_service_class.side_effect = [dead, alive]
+        service = SharedDriverService("/usr/bin/chromedriver")
+
+        service.new_driver(MagicMock())
+        service.new_driver(MagicMock())
+        service.stop()
+
+        dead.stop.assert_called_once()
+        alive.start.assert_called_once()
+        alive.stop.assert_called_once()
+
+    @patch("conso_downloader.driver_service.RemoteWebDriver.quit")
+    @patch("conso_downloader.driver_service.RemoteWebDriver.__init__", return_value=None)
+    @patch("conso_downloader.driver_service.Service")
+    def test_closing_one_session_keeps_chromedriver(self, mock_service_class, mock_init, mock_quit):
+        """Test que close_driver sur une session rattachée ne tue pas le chromedriver partagé"""
+        from conso_downloader import close_driver
+
+        service = mock_service_class.return_value
+        service.service_url = "http://localhost:9515"
+        service.process.poll.return_value = None
+        shared = SharedDriverService("/usr/bin/chromedriver")
+        first, second = shared.new_driver(MagicMock()), shared.new_driver(MagicMock())
+
+        with patch("conso_downloader.browser.time.sleep"), patch.object(type(first), "window_handles", []):
+            close_driver(first)
+
+        mock_quit.assert_called_once()
+        service.process.kill.assert_not_called()
+        assert second.service is service
+        shared.stop()
+        service.stop.assert_called_once()
@@ -8,13 +8,15 @@ import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 
 class TestSetupDriver:
     """Tests pour la fonction setup_driver"""
 
-    @patch("conso_downloader.webdriver.Chrome")
+    @patch("conso_downloader.browser.webdriver.Chrome")
     def test_setup_driver_creates_download_dir(self, mock_chrome):
         """Test que setup_driver crée le répertoire de téléchargement"""
         from conso_downloader import setup_driver
@@ -30,7 +32,7 @@ class TestSetupDriver:
             assert os.path.exists(download_dir)
             assert mock_chrome.called
 
-    @patch("conso_downloader.webdriver.Chrome")
+    @patch("conso_downloader.browser.webdriver.Chrome")
     def test_setup_driver_headless_mode(self, mock_chrome):
         """Test du mode headless"""
         from conso_downloader import setup_driver
@@ -47,7 +49,7 @@ class TestSetupDriver:
             # Vérifier que l'option headless est présente
             assert any("--headless" in arg for arg in options.arguments)
 
-    @patch("conso_downloader.webdriver.Chrome")
+    @patch("conso_downloader.browser.webdriver.Chrome")
     def test_setup_driver_visible_mode(self, mock_chrome):
         """Test du mode visible (non-headless)"""
         from conso_downloader import setup_driver
@@ -61,7 +63,7 @@ class TestSetupDriver:
             # Vérifier que Chrome est appelé
             assert mock_chrome.called
 
-    @patch("conso_downloader.webdriver.Chrome")
+    @patch("conso_downloader.browser.webdriver.Chrome")
     def test_setup_driver_sets_window_size(self, mock_chrome):
         """Test que la taille de fenêtre est définie"""
         from conso_downloader import setup_driver
@@ -74,7 +76,7 @@ class TestSetupDriver:
 
             mock_driver.set_window_size.assert_called_once()
 
-    @patch("conso_downloader.webdriver.Chrome")
+    @patch("conso_downloader.browser.webdriver.Chrome")
     def test_setup_driver_anti_detection(self, mock_chrome):
         """Test que les mécanismes anti-détection sont configurés"""
         from conso_downloader import setup_driver
@@ -89,3 +91,92 @@ class TestSetupDriver:
             assert mock_driver.execute_cdp_cmd.called
             # Vérifier que execute_script est appelé pour masquer webdriver
             assert mock_driver.execute_script.called
+
+    @patch("conso_downloader.browser.webdriver.Chrome")
+    def test_setup_driver_persistent_profile(self, mock_chrome):
+        """Test que le profil persistant est transmis à Chrome"""
+        from conso_downloader import setup_driver
+
+        mock_chrome.return_value = MagicMock()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile_dir = os.path.join(temp_dir, "profile")
+            _ = setup_driver(download_dir=temp_dir, profile_dir=profile_dir)
+
+            options = mock_chrome.call_args[1]["options"]
+            assert f"--user-data-dir={profile_dir}" in options.arguments
+            assert os.path.isdir(profile_dir)
+
+    @patch("conso_downloader.browser.webdriver.Chrome")
+    def test_setup_driver_resource_blocking(self, mock_chrome):
+        """Test que le profil de blocage est appliqué via CDP avant tout chargement"""
+        from conso_downloader import setup_driver
+
+        mock_driver = MagicMock()
+        mock_chrome.return_value = mock_driver
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            _ = setup_driver(download_dir=temp_dir, blocking="full")
+
+        commands = {call.args[0]: call.args[1] for call in mock_driver.execute_cdp_cmd.call_args_list}
+        assert "*.png" in commands["Network.setBlockedURLs"]["urls"]
+        assert "*tagcommander*" in commands["Network.setBlockedURLs"]["urls"]
+
+    @patch("conso_downloader.browser.webdriver.Chrome")
+    def test_setup_driver_no_blocking_by_default(self, mock_chrome):
+        """Test qu'aucune ressource n'est bloquée avec le profil none"""
+        from conso_downloader import setup_driver
+
+        mock_driver = MagicMock()
+        mock_chrome.return_value = mock_driver
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            _ = setup_driver(download_dir=temp_dir, blocking="none")
+
+        commands = [call.args[0] for call in mock_driver.execute_cdp_cmd.call_args_list]
+        assert "Network.setBlockedURLs" not in commands
+
+    @patch("conso_downloader.browser.webdriver.Chrome")
+    def test_setup_driver_capture(self, mock_chrome):
+        """Test que le moteur capture active le journal réseau et agrandit les tampons de réponses"""
+        from conso_downloader import setup_driver
+
+        mock_driver = MagicMock()
+        mock_chrome.return_value = mock_driver
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            _ = setup_driver(download_dir=temp_dir, blocking="none", capture=True)
+
+        options = mock_chrome.call_args[1]["options"]
+        assert options.capabilities["goog:loggingPrefs"] == {"performance": "ALL"}
+        commands = {call.args[0]: call.args[1] for call in mock_driver.execute_cdp_cmd.call_args_list}
+        assert commands["Network.enable"]["maxResourceBufferSize"] > 0
+
+
+class TestBlockedUrlPatterns:
+    """Tests pour la fonction blocked_url_patterns"""
+
+    def test_allow_list_wins(self):
+        """Test qu'un motif touchant le login, le captcha ou l'iframe des mesures est ignoré"""
+        from conso_downloader import blocked_url_patterns
+
+        patterns = blocked_url_patterns("static", ["*friendlycaptcha*", "*/mes-mesures/*", "*cdn.example.com*"])
+
+        assert "*cdn.example.com*" in patterns
+        assert not any("captcha" in pattern or "mes-mesures" in pattern for pattern in patterns)
+
+    def test_extra_patterns_from_environment(self):
+        """Test des motifs supplémentaires de BLOCKED_URLS"""
+        from conso_downloader import blocked_url_patterns
+
+        with patch.dict("os.environ", {"BLOCKED_URLS": "*ads.example.com*, *.gif"}):
+            patterns = blocked_url_patterns("none")
+
+        assert patterns == ["*ads.example.com*", "*.gif"]
+
+    def test_unknown_profile(self):
+        """Test d'un profil inconnu"""
+        from conso_downloader import blocked_url_patterns
+
+        with pytest.raises(ValueError):
+            blocked_url_patterns("tout")
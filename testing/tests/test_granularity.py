@@ -0,0 +1,169 @@
+"""
+Tests des pas de mesure (Heures, Jours, Mois) et du plan de téléchargement mixte
+"""
+
+import sys
+from datetime import date, datetime, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    append_points_to_store,
+    download_consumption_data,
+    fetch_period_http,
+    granularity_store_dir,
+    is_day_complete,
+    mark_period_downloaded,
+    plan_periods,
+)
+
+EMPTY_MANIFEST = {"version": 1, "days": {}}
+
+
+class TestPlanPeriods:
+    """Tests pour la fonction plan_periods"""
+
+    def test_hours_keeps_weekly_windows(self):
+        """Test que le pas 30 minutes garde des périodes de 7 jours"""
+        plan = plan_periods(EMPTY_MANIFEST, datetime(2024, 1, 1), datetime(2024, 12, 30))
+
+        assert [step for step, _ in plan] == ["hours"]
+        assert len(plan[0][1]) == 53
+
+    def test_days_covers_a_year_in_one_period(self):
+        """Test qu'une année au pas journalier tient en une seule période"""
+        plan = plan_periods(EMPTY_MANIFEST, datetime(2024, 1, 1), datetime(2024, 12, 30), "days")
+
+        assert plan == [("days", [(datetime(2024, 1, 1), datetime(2024, 12, 30))])]
+
+    def test_mixed_plan(self):
+        """Test du plan mixte : historique au pas journalier, derniers jours au pas 30 minutes"""
+        plan = plan_periods(EMPTY_MANIFEST, datetime(2024, 1, 1), datetime(2024, 12, 30), "mixed", hourly_days=14)
+
+        assert plan == [
+            ("days", [(datetime(2024, 1, 1), datetime(2024, 12, 16))]),
+            ("hours", [(datetime(2024, 12, 17), datetime(2024, 12, 23)), (datetime(2024, 12, 24), datetime(2024, 12, 30))]),
+        ]
+
+    def test_mixed_plan_shorter_than_hourly_history(self):
+        """Test qu'une période récente reste entièrement au pas 30 minutes"""
+        plan = plan_periods(EMPTY_MANIFEST, datetime(2024, 12, 24), datetime(2024, 12, 30), "mixed", hourly_days=30)
+
+        assert plan == [("hours", [(datetime(2024, 12, 24), datetime(2024, 12, 30))])]
+
+    def test_incremental_uses_requested_granularity(self):
+        """Test qu'une journée au pas journalier doit être re-téléchargée au pas 30 minutes, pas l'inverse"""
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(
+            manifest,
+            datetime(2024, 1, 1),
+            datetime(2024, 1, 7),
+            downloaded_at=datetime(2024, 2, 1),
+            granularity="days",
+        )
+
+        assert plan_periods(manifest, datetime(2024, 1, 1), datetime(2024, 1, 7), "days", incremental=True) == []
+        assert plan_periods(manifest, datetime(2024, 1, 1), datetime(2024, 1, 7), incremental=True) == [
+            ("hours", [(datetime(2024, 1, 1), datetime(2024, 1, 7))])
+        ]
+
+
+class TestIsDayCompleteGranularity:
+    """Tests de is_day_complete selon le pas de mesure"""
+
+    def test_finer_data_satisfies_coarser_request(self):
+        """Test qu'une journée au pas 30 minutes (entrée sans pas, manifeste existant) suffit au pas journalier"""
+        manifest = {"version": 1, "days": {"2024-01-01": {"downloaded_at": "2024-01-03T00:00:00", "intervals": 48}}}
+
+        assert is_day_complete(manifest, date(2024, 1, 1), "days")
+
+    def test_daily_point_expected(self):
+        """Test qu'au pas journalier un seul point suffit, zéro point non"""
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(
+            manifest,
+            datetime(2024, 1, 1),
+            datetime(2024, 1, 2),
+            downloaded_at=datetime(2024, 2, 1),
+            intervals_by_day={date(2024, 1, 1): 1},
+            granularity="days",
+        )
+
+        assert is_day_complete(manifest, date(2024, 1, 1), "days")
+        assert not is_day_complete(manifest, date(2024, 1, 2), "days")
+
+
+class TestCoarseStore:
+    """Tests du stockage des agrégats journaliers"""
+
+    def test_daily_points_counted_on_their_day(self, tmp_path):
+        """Test qu'un point journalier (minuit heure locale) est compté sur sa journée, sans décalage de 30 minutes"""
+        pytest.importorskip("pandas")
+        pytest.importorskip("pyarrow")
+        points = [
+            (datetime(2023, 12, 31, 23, tzinfo=timezone.utc), 12.5),
+            (datetime(2024, 1, 1, 23, tzinfo=timezone.utc), 9.0),
+        ]
+
+        intervals = append_points_to_store(points, str(tmp_path), "days")
+
+        assert intervals == {date(2024, 1, 1): 1, date(2024, 1, 2): 1}
+
+    def test_coarse_data_stored_apart(self):
+        """Test que les agrégats ne sont pas mélangés à la courbe 30 minutes"""
+        assert granularity_store_dir("/data/store", "hours") == "/data/store"
+        assert granularity_store_dir("/data/store/", "days") == "/data/store_days"
+
+
+class TestHttpGranularity:
+    """Tests du pas de mesure du moteur HTTP"""
+
+    def test_step_placeholder_and_file_name(self, temp_download_dir):
+        """Test de la variable {step} du gabarit et du suffixe du fichier"""
+        http = MagicMock()
+        http.get.return_value.headers = {"Content-Type": "application/json"}
+        http.get.return_value.content = b"{}"
+
+        path = fetch_period_http(
+            http,
+            datetime(2024, 1, 1),
+            datetime(2024, 12, 30),
+            "https://example.com/api/mesures?pas={step}&start={start}",
+            temp_download_dir,
+            granularity="days",
+        )
+
+        assert http.get.call_args.args[0] == "https://example.com/api/mesures?pas=jours&start=2024-01-01"
+        assert Path(path).name == "conso_20240101_20241230_days.json"
+
+
+class TestMixedDownload:
+    """Tests du plan mixte dans download_consumption_data"""
+
+    @patch("conso_downloader.download.close_driver")
+    @patch("conso_downloader.download.download_periods_ui")
+    @patch("conso_downloader.download.select_granularity", return_value=True)
+    @patch("conso_downloader.download.open_measures_page", return_value=True)
+    @patch("conso_downloader.download.setup_driver")
+    def test_mode_switched_per_group(self, mock_setup, mock_open, mock_select, mock_download, mock_close, temp_download_dir):
+        """Test que le pas est changé avant chaque groupe de périodes"""
+        selected = []
+        mock_select.side_effect = lambda driver, step: selected.append(step) or True
+        mock_download.side_effect = lambda driver, periods, *args, **kwargs: [
+            (start, end, f"{temp_download_dir}/{start:%Y%m%d}.csv") for start, end in periods
+        ]
+
+        assert download_consumption_data(
+            datetime(2024, 1, 1),
+            datetime(2024, 2, 29),
+            download_dir=temp_download_dir,
+            granularity="mixed",
+            hourly_days=14,
+        )
+
+        assert selected == ["days", "hours"]
+        assert [len(call.args[1]) for call in mock_download.call_args_list] == [1, 2]
@@ -0,0 +1,91 @@
+"""
+Tests du démarrage rapide : imports différés et absence d'effets de bord à l'import
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+
+HEAVY_PACKAGES = ("selenium", "requests", "urllib3", "playwright")
+
+
+def _run(tmp_path, *args):
+    """Lance l'interpréteur dans un répertoire vierge, sans identifiants ni config.py"""
+    env = {key: value for key, value in os.environ.items() if key not in ("ACCOUNT_EMAIL", "ACCOUNT_PASSWORD")}
+    env["PYTHONPATH"] = str(ROOT)
+    return subprocess.run([sys.executable, *args], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+
+
+def _loaded_modules(tmp_path, statement):
+    """Modules chargés après l'instruction donnée"""
+    script = f"import json, sys\n{statement}\nprint(json.dumps(sorted(sys.modules)))"
+    result = _run(tmp_path, "-c", script)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def _heavy(modules):
+    return [name for name in modules if name.split(".")[0] in HEAVY_PACKAGES]
+
+
+class TestImportSideEffects:
+    """Tests de l'import du paquet"""
+
+    def test_import_without_credentials(self, tmp_path):
+        """Test que l'import ne quitte pas sans identifiants et ne crée pas de fichier de log"""
+        modules = _loaded_modules(tmp_path, "import conso_downloader")
+
+        assert "conso_downloader.browser" not in modules
+        assert not list(tmp_path.iterdir())
+
+    def test_planning_without_heavy_dependencies(self, tmp_path):
+        """Test que le calcul d'un plan ne charge ni Selenium ni requests"""
+        modules = _loaded_modules(
+            tmp_path,
+            "from datetime import datetime\n"
+            "from conso_downloader import load_manifest, plan_periods\n"
+            "plan_periods(load_manifest('.'), datetime(2024, 1, 1), datetime(2024, 1, 31))",
+        )
+
+        assert _heavy(modules) == []
+
+    def test_capture_without_http_engine(self, tmp_path):
+        """Test que le moteur capture ne charge pas le moteur HTTP (requests)"""
+        modules = _loaded_modules(tmp_path, "import conso_downloader.capture")
+
+        assert "conso_downloader.http_engine" not in modules
+        assert "requests" not in modules
+
+    def test_names_resolved_on_demand(self):
+        """Test que les noms publics restent accessibles depuis le paquet"""
+        import conso_downloader
+
+        assert "download_consumption_data" in dir(conso_downloader)
+        assert conso_downloader.split_date_range is conso_downloader.planning.split_date_range
+
+
+class TestCliStartup:
+    """Tests du démarrage de la CLI"""
+
+    def test_help_is_fast_path(self, tmp_path):
+        """Test que l'aide s'affiche sans identifiants, sans Selenium et sans fichier de log"""
+        script = (
+            "import json, sys\n"
+            "sys.argv = ['conso_downloader', '--help']\n"
+            "from conso_downloader.cli import main\n"
+            "try:\n"
+            "    main()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print(json.dumps(sorted(sys.modules)))"
+        )
+        result = _run(tmp_path, "-c", script)
+
+        assert result.returncode == 0, result.stderr
+        assert "--start-date" in result.stdout
+        assert _heavy(json.loads(result.stdout.splitlines()[-1])) == []
+        assert not list(tmp_path.iterdir())
@@ -0,0 +1,105 @@
+"""
+Tests du manifeste de synchronisation incrémentale
+"""
+
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    MANIFEST_FILE,
+    compute_missing_periods,
+    is_day_complete,
+    load_manifest,
+    mark_period_downloaded,
+    save_manifest,
+)
+
+
+class TestManifestPersistence:
+    """Tests de lecture/écriture du manifeste"""
+
+    def test_load_missing_manifest_returns_empty(self, temp_download_dir):
+        """Test qu'un manifeste absent donne un manifeste vide"""
+        manifest = load_manifest(temp_download_dir)
+        assert manifest == {"version": 1, "days": {}}
+
+    def test_save_and_reload(self, temp_download_dir):
+        """Test de l'aller-retour disque"""
+        manifest = load_manifest(temp_download_dir)
+        mark_period_downloaded(manifest, datetime(2024, 1, 1), datetime(2024, 1, 3), downloaded_at=datetime(2024, 2, 1))
+        save_manifest(manifest, temp_download_dir)
+
+        reloaded = load_manifest(temp_download_dir)
+        assert sorted(reloaded["days"]) == ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+    @patch("conso_downloader.planning.logger")
+    def test_corrupted_manifest_is_reset(self, mock_logger, temp_download_dir):
+        """Test qu'un manifeste corrompu est ignoré"""
+        with open(os.path.join(temp_download_dir, MANIFEST_FILE), "w") as f:
+            f.write("{not json")
+
+        manifest = load_manifest(temp_download_dir)
+        assert manifest["days"] == {}
+        mock_logger.warning.assert_called_once()
+
+
+class TestIsDayComplete:
+    """Tests pour la fonction is_day_complete"""
+
+    def test_day_downloaded_after_publication(self):
+        """Test d'une journée téléchargée après publication"""
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(manifest, datetime(2024, 1, 1), datetime(2024, 1, 1), downloaded_at=datetime(2024, 1, 3))
+        assert is_day_complete(manifest, datetime(2024, 1, 1).date())
+
+    def test_day_downloaded_too_early_is_incomplete(self):
+        """Test d'une journée récupérée avant la fin de sa publication"""
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(manifest, datetime(2024, 1, 1), datetime(2024, 1, 1), downloaded_at=datetime(2024, 1, 2, 1))
+        assert not is_day_complete(manifest, datetime(2024, 1, 1).date())
+
+    def test_unknown_day(self):
+        """Test d'une journée absente du manifeste"""
+        assert not is_day_complete({"version": 1, "days": {}}, datetime(2024, 1, 1).date())
+
+
+class TestComputeMissingPeriods:
+    """Tests pour la fonction compute_missing_periods"""
+
+    def test_empty_manifest_matches_split(self):
+        """Test qu'un manifeste vide redonne le découpage complet"""
+        periods = compute_missing_periods({"version": 1, "days": {}}, datetime(2024, 1, 1), datetime(2024, 1, 15))
+        assert periods == [
+            (datetime(2024, 1, 1), datetime(2024, 1, 7)),
+            (datetime(2024, 1, 8), datetime(2024, 1, 14)),
+            (datetime(2024, 1, 15), datetime(2024, 1, 15)),
+        ]
+
+    def test_fully_downloaded_range(self):
+        """Test qu'aucune période n'est produite si tout est présent"""
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(manifest, datetime(2024, 1, 1), datetime(2024, 1, 7), downloaded_at=datetime(2024, 2, 1))
+        assert compute_missing_periods(manifest, datetime(2024, 1, 1), datetime(2024, 1, 7)) == []
+
+    def test_only_gaps_are_returned(self):
+        """Test que seuls les trous sont re-téléchargés"""
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(manifest, datetime(2024, 1, 3), datetime(2024, 1, 5), downloaded_at=datetime(2024, 2, 1))
+
+        periods = compute_missing_periods(manifest, datetime(2024, 1, 1), datetime(2024, 1, 8))
+        assert periods == [
+            (datetime(2024, 1, 1), datetime(2024, 1, 2)),
+            (datetime(2024, 1, 6), datetime(2024, 1, 8)),
+        ]
+
+    def test_time_component_is_ignored(self):
+        """Test que l'heure des dates par défaut (J-1 à l'instant présent) n'a pas d'effet"""
+        periods = compute_missing_periods(
+            {"version": 1, "days": {}}, datetime(2024, 1, 1, 15, 30), datetime(2024, 1, 2, 15, 30)
+        )
+        assert periods == [(datetime(2024, 1, 1), datetime(2024, 1, 2))]
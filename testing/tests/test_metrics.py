@@ -0,0 +1,117 @@
+"""
+Tests de l'instrumentation des étapes et de l'export OpenMetrics
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    METRICS,
+    StageMetrics,
+    open_measures_page,
+    stage_timer,
+    start_metrics_server,
+    write_metrics_file,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """Registre global vidé avant chaque test"""
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+
+class TestStageMetrics:
+    """Tests pour la classe StageMetrics"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test des buckets cumulés, de la somme et du nombre"""
+        metrics = StageMetrics(buckets=(1, 5))
+        metrics.observe("captcha", 0.5)
+        metrics.observe("captcha", 3)
+        metrics.observe("captcha", 12)
+
+        text = metrics.render()
+
+        assert 'enedis_stage_duration_seconds_bucket{stage="captcha",le="1.0"} 1' in text
+        assert 'enedis_stage_duration_seconds_bucket{stage="captcha",le="5.0"} 2' in text
+        assert 'enedis_stage_duration_seconds_bucket{stage="captcha",le="+Inf"} 3' in text
+        assert 'enedis_stage_duration_seconds_sum{stage="captcha"} 15.500000' in text
+        assert 'enedis_stage_duration_seconds_count{stage="captcha"} 3' in text
+        assert text.endswith("# EOF\n")
+
+    def test_counters(self):
+        """Test des compteurs de périodes par résultat"""
+        metrics = StageMetrics()
+        metrics.increment("periods", 3, result="success")
+        metrics.increment("periods", 1, result="error")
+        metrics.increment("periods", 2, result="success")
+
+        text = metrics.render()
+
+        assert "# TYPE enedis_periods counter" in text
+        assert 'enedis_periods_total{result="success"} 5' in text
+        assert 'enedis_periods_total{result="error"} 1' in text
+
+
+class TestStageTimer:
+    """Tests pour la fonction stage_timer"""
+
+    def test_duration_recorded_on_exception(self):
+        """Test qu'une étape en erreur est tout de même mesurée"""
+        with pytest.raises(RuntimeError), stage_timer("download"):
+            raise RuntimeError("boom")
+
+        assert METRICS.snapshot()["download"]["count"] == 1
+
+    @patch("conso_downloader.browser.select_granularity", return_value=True)
+    @patch("conso_downloader.browser.switch_to_iframe", return_value=True)
+    @patch("conso_downloader.browser.navigate_to_consumption", return_value=True)
+    @patch("conso_downloader.browser.accept_cookies")
+    @patch("conso_downloader.browser.WebDriverWait")
+    @patch("conso_downloader.browser.time.sleep")
+    def test_open_measures_page_stages(self, *_):
+        """Test que chaque étape de l'ouverture de la page est mesurée"""
+        driver = MagicMock()
+        driver.find_elements.return_value = []
+
+        assert open_measures_page(driver, "test@example.com", "pass") is True
+
+        assert set(METRICS.snapshot()) == {"page_load", "cookies", "navigation", "iframe", "heures_mode"}
+
+
+class TestMetricsExport:
+    """Tests de l'export fichier et HTTP"""
+
+    def test_write_metrics_file(self, tmp_path):
+        """Test de l'écriture du fichier OpenMetrics"""
+        METRICS.observe("login", 2.0)
+        path = tmp_path / "enedis.prom"
+
+        write_metrics_file(str(path))
+
+        assert 'stage="login"' in path.read_text()
+        assert not (tmp_path / "enedis.prom.tmp").exists()
+
+    def test_http_endpoint(self):
+        """Test du point de collecte /metrics"""
+        METRICS.observe("iframe", 1.0)
+        server = start_metrics_server(0)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            response = requests.get(f"{base}/metrics")
+
+            assert response.headers["Content-Type"].startswith("application/openmetrics-text")
+            assert 'stage="iframe"' in response.text
+            assert requests.get(f"{base}/autre").status_code == 404
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,102 @@
+"""
+Tests du portail simulé utilisé par les benchmarks (testing/benchmarks/)
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from mock_portal import MOCK_EMAIL, MOCK_PASSWORD, MockPortal, build_export_csv  # noqa: E402
+
+
+@pytest.fixture
+def portal():
+    """Portail simulé sans latence"""
+    with MockPortal(today=date(2024, 12, 31)) as server:
+        yield server
+
+
+def _login(portal):
+    http = requests.Session()
+    response = http.post(portal.url + "login", json={"email": MOCK_EMAIL, "password": MOCK_PASSWORD})
+    assert response.status_code == 204
+    return http
+
+
+class TestMockPortal:
+    """Tests du portail simulé"""
+
+    def test_login_form_until_authenticated(self, portal):
+        """Test que le formulaire de login est servi tant qu'aucune session n'existe"""
+        page = requests.get(portal.url).text
+        assert 'id="idToken1"' in page
+        assert 'id="popin_tc_privacy_button_3"' in page
+
+        home = _login(portal).get(portal.url).text
+        assert 'id="idToken1"' not in home
+        assert "Ma consommation" in home
+        assert portal.logins == 1
+
+    def test_assets_served_without_session(self, portal):
+        """Test que les ressources annexes (images, polices, traceurs) sont servies aux pages de login"""
+        page = requests.get(portal.url).text
+
+        assert "/tc/tagcommander.js" in page
+        assert requests.get(portal.url + "assets/banniere.png").headers["Content-Type"] == "image/png"
+
+    def test_wrong_password_refused(self, portal):
+        """Test qu'un mauvais mot de passe ne crée pas de session"""
+        response = requests.post(portal.url + "login", json={"email": MOCK_EMAIL, "password": "faux"})
+
+        assert response.status_code == 401
+        assert requests.get(portal.url + "export?start=2024-01-01&end=2024-01-07").status_code == 401
+
+    def test_export_is_downloadable_attachment(self, portal):
+        """Test de l'export CSV déclenché par Télécharger"""
+        response = _login(portal).get(portal.url + "export?start=2024-01-01&end=2024-01-07")
+
+        assert response.headers["Content-Disposition"].startswith("attachment")
+        assert response.content == build_export_csv(date(2024, 1, 1), date(2024, 1, 7))
+        assert portal.downloads == [(date(2024, 1, 1), date(2024, 1, 7))]
+
+    def test_export_has_real_interval_counts(self, tmp_path):
+        """Test que l'export respecte les changements d'heure (lu par le module)"""
+        from conso_downloader import iter_export_points
+
+        export = tmp_path / "export.csv"
+        export.write_bytes(build_export_csv(date(2024, 3, 30), date(2024, 3, 31)))
+
+        points = list(iter_export_points(str(export)))
+        assert len(points) == 48 + 46
+        assert points[0][0].hour == 23 and points[0][0].minute == 30
+
+    def test_api_requires_bearer_token(self, portal):
+        """Test que l'API du moteur http exige le jeton de l'iframe"""
+        http = _login(portal)
+        url = portal.api_url_template.format(
+            prm="1", step="heures", start=datetime(2024, 1, 1).date(), end_exclusive=date(2024, 1, 8)
+        )
+
+        assert http.get(url).status_code == 401
+
+        token = next(iter(portal.sessions.values()))["token"]
+        response = http.get(url, headers={"Authorization": f"Bearer {token}"})
+        assert len(response.json()["meter_reading"]["interval_reading"]) == 7 * 48
+
+    def test_api_daily_step(self, portal):
+        """Test du pas journalier : un point par jour, lu par le module sur la bonne journée"""
+        from conso_downloader import CapturedResponse, iter_export_points
+        from conso_downloader.store import _local_day
+
+        http = _login(portal)
+        token = next(iter(portal.sessions.values()))["token"]
+        url = portal.api_url_template.format(prm="1", step="jours", start=date(2024, 1, 1), end_exclusive=date(2024, 1, 8))
+        response = http.get(url, headers={"Authorization": f"Bearer {token}"})
+
+        points = list(iter_export_points(CapturedResponse(url, "application/json", response.content)))
+        assert [_local_day(timestamp) for timestamp, _ in points] == [date(2024, 1, day) for day in range(1, 8)]
@@ -0,0 +1,110 @@
+"""
+Tests du profilage des commandes WebDriver (--profile)
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import RpcProfiler, accept_cookies, rpc_profiler, setup_driver  # noqa: E402
+
+
+class _Executor:
+    """Exécuteur de commandes factice (une requête HTTP vers chromedriver dans Selenium)"""
+
+    def __init__(self, value=None):
+        self.value = value
+        self.commands = []
+
+    def execute(self, command, params=None):
+        self.commands.append(command)
+        return {"value": self.value}
+
+
+class _Driver:
+    """Driver minimal dont les commandes passent par command_executor, comme WebDriver"""
+
+    def __init__(self, value=None):
+        self.command_executor = _Executor(value)
+
+    def execute(self, command, params=None):
+        return self.command_executor.execute(command, params)["value"]
+
+    def execute_script(self, script, *args):
+        return self.execute("executeScript", {"script": script, "args": list(args)})
+
+
+class TestRpcProfiler:
+    """Tests pour la classe RpcProfiler"""
+
+    def test_commands_attributed_to_calling_function(self):
+        """Test que les commandes sont comptées pour la fonction du paquet qui les déclenche"""
+        profiler = RpcProfiler()
+        driver = _Driver()
+        profiler.attach(driver)
+
+        accept_cookies(driver)
+        accept_cookies(driver)
+        driver.execute("getTitle")
+
+        summary = {entry["function"]: entry for entry in profiler.summary()}
+        assert summary["accept_cookies"]["count"] == 2
+        assert summary["accept_cookies"]["commands"]["executeScript"]["count"] == 2
+        assert list(summary["<hors paquet>"]["commands"]) == ["getTitle"]
+        assert driver.command_executor.commands == ["executeScript", "executeScript", "getTitle"]
+
+    def test_attach_twice_counts_once(self):
+        """Test qu'un driver déjà profilé n'est pas enveloppé une seconde fois"""
+        profiler = RpcProfiler()
+        driver = _Driver()
+        profiler.attach(driver)
+        profiler.attach(driver)
+
+        accept_cookies(driver)
+
+        assert profiler.summary()[0]["count"] == 1
+
+    def test_report_sorted_by_total_time(self):
+        """Test que le rapport liste d'abord les fonctions les plus coûteuses"""
+        profiler = RpcProfiler()
+        profiler.record("accept_cookies", "executeScript", 0.01)
+        profiler.record("navigate_to_consumption", "findElements", 0.5)
+        profiler.record("navigate_to_consumption", "getElementText", 0.2)
+
+        lines = profiler.report().splitlines()
+
+        assert "3 en 0.71s" in lines[0]
+        assert lines[2].split()[0] == "navigate_to_consumption"
+        assert "findElements ×1, getElementText ×1" in lines[2]
+        assert lines[3].split()[0] == "accept_cookies"
+
+
+class TestProfileDriver:
+    """Tests du profilage des drivers lancés par setup_driver"""
+
+    @patch("conso_downloader.browser.new_chrome_driver")
+    def test_setup_driver_profiled_when_enabled(self, mock_new_driver, monkeypatch, tmp_path):
+        """Test que --profile enveloppe le driver dès son lancement"""
+        monkeypatch.setattr(rpc_profiler, "RPC_PROFILER", None)
+        profiler = rpc_profiler.enable_rpc_profiler()
+        driver = MagicMock()
+        executor = driver.command_executor
+        mock_new_driver.return_value = driver
+
+        setup_driver(download_dir=str(tmp_path))
+
+        assert executor._rpc_profiler is profiler
+
+    @patch("conso_downloader.browser.new_chrome_driver")
+    def test_setup_driver_untouched_by_default(self, mock_new_driver, monkeypatch, tmp_path):
+        """Test que sans --profile l'exécuteur de commandes n'est pas modifié"""
+        monkeypatch.setattr(rpc_profiler, "RPC_PROFILER", None)
+        driver = MagicMock()
+        execute = driver.command_executor.execute
+        mock_new_driver.return_value = driver
+
+        setup_driver(download_dir=str(tmp_path))
+
+        assert driver.command_executor.execute is execute
@@ -0,0 +1,141 @@
+"""
+Tests du journal de reprise et des nouvelles tentatives par période
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    RUN_JOURNAL_FILE,
+    download_consumption_data,
+    download_with_retries,
+    journal_plan,
+    load_run_journal,
+    mark_journal_window,
+    new_run_journal,
+    save_run_journal,
+)
+
+RUN = {"start": "2024-01-01", "end": "2024-01-21", "granularity": "hours"}
+PLAN = [
+    (
+        "hours",
+        [
+            (datetime(2024, 1, 1), datetime(2024, 1, 7)),
+            (datetime(2024, 1, 8), datetime(2024, 1, 14)),
+            (datetime(2024, 1, 15), datetime(2024, 1, 21)),
+        ],
+    )
+]
+
+
+class TestRunJournal:
+    """Tests du journal de reprise"""
+
+    def test_plan_skips_done_windows(self):
+        """Test que seules les périodes en attente ou en échec sont replanifiées"""
+        journal = new_run_journal(RUN, PLAN)
+        mark_journal_window(journal, "hours", datetime(2024, 1, 1), datetime(2024, 1, 7), "done")
+        mark_journal_window(journal, "hours", datetime(2024, 1, 8), datetime(2024, 1, 14), "failed")
+
+        assert journal_plan(journal) == [("hours", PLAN[0][1][1:])]
+        assert [window["attempts"] for window in journal["windows"]] == [1, 1, 0]
+
+    def test_save_and_reload(self, temp_download_dir):
+        """Test de l'aller-retour disque pour les mêmes paramètres d'exécution"""
+        save_run_journal(new_run_journal(RUN, PLAN), temp_download_dir)
+
+        assert journal_plan(load_run_journal(RUN, temp_download_dir)) == PLAN
+
+    def test_other_run_is_ignored(self, temp_download_dir):
+        """Test qu'un journal d'une autre exécution (autres dates) n'est pas repris"""
+        save_run_journal(new_run_journal(RUN, PLAN), temp_download_dir)
+
+        assert load_run_journal({**RUN, "end": "2024-01-28"}, temp_download_dir) is None
+
+    @patch("conso_downloader.planning.logger")
+    def test_corrupted_journal_is_ignored(self, mock_logger, temp_download_dir):
+        """Test qu'un journal illisible donne une nouvelle exécution"""
+        with open(os.path.join(temp_download_dir, RUN_JOURNAL_FILE), "w") as f:
+            f.write("{not json")
+
+        assert load_run_journal(RUN, temp_download_dir) is None
+        mock_logger.warning.assert_called_once()
+
+
+class TestDownloadWithRetries:
+    """Tests pour la fonction download_with_retries"""
+
+    @patch("conso_downloader.planning.time.sleep")
+    def test_only_failed_periods_are_retried_with_backoff(self, mock_sleep):
+        """Test du délai exponentiel et du nouvel essai limité aux périodes en échec"""
+        periods = PLAN[0][1]
+        outcomes = iter([["a", None, None], [None, "c"], ["b"]])
+        fetch = MagicMock(
+            side_effect=lambda batch: [(start, end, result) for (start, end), result in zip(batch, next(outcomes))]
+        )
+
+        results = download_with_retries(periods, fetch, retries=3, backoff=10)
+
+        assert [result for _, _, result in results] == ["a", "b", "c"]
+        assert [len(call.args[0]) for call in fetch.call_args_list] == [3, 2, 1]
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [10, 20]
+
+    @patch("conso_downloader.planning.time.sleep")
+    def test_unreachable_page_skips_attempt(self, mock_sleep):
+        """Test qu'une page impossible à réouvrir ne relance pas le téléchargement"""
+        fetch = MagicMock(return_value=[(datetime(2024, 1, 1), datetime(2024, 1, 7), None)])
+        before_retry = MagicMock(return_value=False)
+
+        results = download_with_retries(PLAN[0][1][:1], fetch, retries=2, before_retry=before_retry)
+
+        assert results[0][2] is None
+        fetch.assert_called_once()
+        assert before_retry.call_count == 2
+
+
+class TestResumedRun:
+    """Tests de la reprise d'une exécution interrompue dans download_consumption_data"""
+
+    @patch("conso_downloader.download.time.sleep")
+    @patch("conso_downloader.download.close_driver")
+    @patch("conso_downloader.download.download_periods_ui")
+    @patch("conso_downloader.download.open_measures_page", return_value=True)
+    @patch("conso_downloader.download.setup_driver")
+    def test_failed_window_resumed_by_next_run(
+        self, mock_setup, mock_open, mock_download, mock_close, mock_sleep, temp_download_dir
+    ):
+        """Test qu'une période toujours en échec après les nouvelles tentatives est seule rejouée ensuite"""
+
+        def failing_second_window(driver, periods, download_dir, on_success=None, capture=False):
+            results = []
+            for start, end in periods:
+                path = None if start == datetime(2024, 1, 8) else f"{download_dir}/{start:%Y%m%d}.csv"
+                if path:
+                    on_success(start, end, path)
+                results.append((start, end, path))
+            return results
+
+        mock_download.side_effect = failing_second_window
+        assert not download_consumption_data(datetime(2024, 1, 1), datetime(2024, 1, 21), download_dir=temp_download_dir)
+
+        # Nouvelles tentatives dans la même session, après retour à la page des mesures
+        assert [len(call.args[1]) for call in mock_download.call_args_list] == [3, 1, 1]
+        assert mock_open.call_count == 3
+        with open(os.path.join(temp_download_dir, RUN_JOURNAL_FILE)) as f:
+            states = [window["state"] for window in json.load(f)["windows"]]
+        assert states == ["done", "failed", "done"]
+
+        mock_download.reset_mock()
+        mock_download.side_effect = None
+        mock_download.return_value = [(datetime(2024, 1, 8), datetime(2024, 1, 14), "/tmp/b.csv")]
+        assert download_consumption_data(datetime(2024, 1, 1), datetime(2024, 1, 21), download_dir=temp_download_dir)
+
+        assert mock_download.call_args.args[1] == [(datetime(2024, 1, 8), datetime(2024, 1, 14))]
+        assert not os.path.exists(os.path.join(temp_download_dir, RUN_JOURNAL_FILE))
@@ -0,0 +1,109 @@
+"""
+Tests de la planification du mode boucle selon la publication des données
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import PublicationScheduler, is_day_published, mark_period_downloaded  # noqa: E402
+
+PARIS = ZoneInfo("Europe/Paris")
+
+
+def _scheduler():
+    """Fenêtre 6h-20h, sans décalage aléatoire"""
+    return PublicationScheduler(window=(6, 20), backoff=900, max_backoff=3600, jitter=0)
+
+
+class TestPublicationScheduler:
+    """Tests pour la classe PublicationScheduler"""
+
+    @patch("conso_downloader.scheduler.secrets.randbelow", return_value=0)
+    def test_exponential_backoff_in_window(self, mock_randbelow):
+        """Test que les relevés s'espacent tant que la veille manque, dans la limite du délai maximal"""
+        scheduler = _scheduler()
+        now = datetime(2024, 3, 12, 7, tzinfo=PARIS)
+
+        delays = [scheduler.next_delay(now, published=False) for _ in range(4)]
+
+        assert delays == [(900, False), (1800, False), (3600, False), (3600, False)]
+
+    def test_idle_until_next_window_once_published(self):
+        """Test qu'une fois la veille récupérée, plus rien n'est relevé avant le lendemain"""
+        scheduler = _scheduler()
+        scheduler.next_delay(datetime(2024, 3, 12, 7, tzinfo=PARIS), published=False)
+
+        delay, idle = scheduler.next_delay(datetime(2024, 3, 12, 9, tzinfo=PARIS), published=True)
+
+        assert idle
+        assert delay == 21 * 3600
+        assert scheduler.attempt == 0
+
+    def test_waits_for_window_opening(self):
+        """Test qu'avant la fenêtre, le premier relevé est prévu à son ouverture"""
+        assert _scheduler().next_delay(datetime(2024, 3, 12, 2, 30, tzinfo=PARIS), published=False) == (3.5 * 3600, True)
+
+    @patch("conso_downloader.scheduler.secrets.randbelow", return_value=0)
+    def test_last_poll_at_window_end(self, mock_randbelow):
+        """Test que le dernier relevé a lieu à la fermeture de la fenêtre, puis attente du lendemain"""
+        scheduler = _scheduler()
+
+        assert scheduler.next_delay(datetime(2024, 3, 12, 19, 50, tzinfo=PARIS), published=False) == (600, False)
+        assert scheduler.next_delay(datetime(2024, 3, 12, 20, tzinfo=PARIS), published=False) == (10 * 3600, True)
+
+    def test_dst_night_counted_in_real_time(self):
+        """Test que la nuit du passage à l'heure d'été dure une heure de moins"""
+        delay, _ = _scheduler().next_delay(datetime(2024, 3, 30, 20, tzinfo=PARIS), published=True)
+
+        assert delay == 9 * 3600
+
+    def test_jitter_delays_window_opening(self):
+        """Test que l'ouverture de la fenêtre est décalée aléatoirement, dans la limite fixée"""
+        scheduler = PublicationScheduler(window=(6, 20), jitter=900)
+
+        delays = {scheduler.next_delay(datetime(2024, 3, 12, 5, tzinfo=PARIS), published=False)[0] for _ in range(20)}
+
+        assert all(3600 <= delay <= 3600 + 900 for delay in delays)
+        assert len(delays) > 1
+
+
+class TestIsDayPublished:
+    """Tests pour la fonction is_day_published"""
+
+    def test_complete_curve_published_early(self):
+        """Test qu'une courbe complète récupérée le matin même compte comme publiée"""
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(
+            manifest,
+            datetime(2024, 3, 11),
+            datetime(2024, 3, 11),
+            downloaded_at=datetime(2024, 3, 12, 7),
+            intervals_by_day={date(2024, 3, 11): 48},
+        )
+
+        assert is_day_published(manifest, date(2024, 3, 11))
+
+    def test_partial_curve_not_published(self):
+        """Test qu'une courbe incomplète n'arrête pas les relevés"""
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(
+            manifest,
+            datetime(2024, 3, 11),
+            datetime(2024, 3, 11),
+            downloaded_at=datetime(2024, 3, 12, 7),
+            intervals_by_day={date(2024, 3, 11): 12},
+        )
+
+        assert not is_day_published(manifest, date(2024, 3, 11))
+
+    def test_unknown_point_count_uses_publication_delay(self):
+        """Test que sans nombre de points, la journée n'est publiée qu'après le délai de publication"""
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(manifest, datetime(2024, 3, 11), datetime(2024, 3, 11), downloaded_at=datetime(2024, 3, 12, 7))
+
+        assert not is_day_published(manifest, date(2024, 3, 11))
@@ -12,49 +12,54 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 class TestAcceptCookies:
     """Tests pour la fonction accept_cookies"""
 
-    @patch("conso_downloader.WebDriverWait")
-    def test_accept_cookies_success(self, mock_wait_class):
+    def test_accept_cookies_success(self):
         """Test d'acceptation réussie des cookies"""
         from conso_downloader import accept_cookies
 
         # Setup
         mock_driver = MagicMock()
-        mock_button = MagicMock()
-        mock_wait = MagicMock()
-        mock_wait.until.return_value = mock_button
-        mock_wait_class.return_value = mock_wait
+        mock_driver.execute_script.return_value = "test_button_id"
 
         # Test
-        result = accept_cookies(mock_driver, "test_button_id")
+        result = accept_cookies(mock_driver, ("test_button_id",))
 
         # Vérifications
         assert result is True
         mock_driver.execute_script.assert_called_once()
+        assert mock_driver.execute_script.call_args.args[1:] == (["test_button_id"], "TC_PRIVACY")
 
-    @patch("conso_downloader.WebDriverWait")
-    @patch("conso_downloader.TimeoutException", Exception)
-    def test_accept_cookies_timeout(self, mock_wait_class):
-        """Test quand le popup n'apparaît pas"""
+    @patch("conso_downloader.browser.time.sleep")
+    def test_accept_cookies_absent_does_not_wait(self, mock_sleep):
+        """Test quand le popup n'apparaît pas : aucune attente"""
         from conso_downloader import accept_cookies
 
         # Setup
         mock_driver = MagicMock()
-        mock_wait = MagicMock()
-        mock_wait.until.side_effect = Exception("Timeout")
-        mock_wait_class.return_value = mock_wait
+        mock_driver.execute_script.return_value = ""
 
         # Test
         result = accept_cookies(mock_driver)
 
         # Vérifications
         assert result is False
+        mock_sleep.assert_not_called()
+
+    def test_accept_cookies_consent_stored(self):
+        """Test que le consentement mémorisé dans le profil évite toute recherche"""
+        from conso_downloader import accept_cookies
+
+        mock_driver = MagicMock()
+        mock_driver.execute_script.return_value = "stored"
+
+        assert accept_cookies(mock_driver) is False
+        mock_driver.find_element.assert_not_called()
 
 
 class TestLoginStep1Email:
     """Tests pour la fonction login_step1_email"""
 
-    @patch("conso_downloader.WebDriverWait")
-    @patch("conso_downloader.time.sleep")
+    @patch("conso_downloader.browser.WebDriverWait")
+    @patch("conso_downloader.browser.time.sleep")
     def test_login_step1_success(self, mock_sleep, mock_wait_class):
         """Test de saisie email réussie"""
         from conso_downloader import login_step1_email
@@ -79,7 +84,7 @@ class TestLoginStep1Email:
         mock_email_field.clear.assert_called_once()
         mock_email_field.send_keys.assert_called_once_with("test@example.com")
 
-    @patch("conso_downloader.WebDriverWait")
+    @patch("conso_downloader.browser.WebDriverWait")
     def test_login_step1_failure(self, mock_wait_class):
         """Test d'échec de saisie email"""
         from conso_downloader import login_step1_email
@@ -100,8 +105,8 @@ class TestLoginStep1Email:
 class TestLoginStep2Password:
     """Tests pour la fonction login_step2_password"""
 
-    @patch("conso_downloader.WebDriverWait")
-    @patch("conso_downloader.time.sleep")
+    @patch("conso_downloader.browser.WebDriverWait")
+    @patch("conso_downloader.browser.time.sleep")
     def test_login_step2_success(self, mock_sleep, mock_wait_class):
         """Test de saisie mot de passe réussie"""
         from conso_downloader import login_step2_password
@@ -125,7 +130,7 @@ class TestLoginStep2Password:
         mock_password_field.clear.assert_called_once()
         mock_password_field.send_keys.assert_called_once_with("password123")
 
-    @patch("conso_downloader.WebDriverWait")
+    @patch("conso_downloader.browser.WebDriverWait")
     def test_login_step2_failure(self, mock_wait_class):
         """Test d'échec de saisie mot de passe"""
         from conso_downloader import login_step2_password
@@ -146,30 +151,15 @@ class TestLoginStep2Password:
 class TestNavigateToConsumption:
     """Tests pour la fonction navigate_to_consumption"""
 
-    @patch("conso_downloader.accept_cookies")
-    @patch("conso_downloader.WebDriverWait")
-    @patch("conso_downloader.time.sleep")
-    def test_navigate_success(self, mock_sleep, mock_wait_class, mock_accept_cookies):
+    @patch("conso_downloader.browser.accept_cookies")
+    @patch("conso_downloader.browser.WebDriverWait")
+    @patch("conso_downloader.browser.time.sleep")
+    def test_navigate_success(self, mock_sleep, mock_wait_class, mock_accept_cookies, snapshot_driver):
         """Test de navigation réussie"""
         from conso_downloader import navigate_to_consumption
 
-        # Setup
-        mock_driver = MagicMock()
-
-        # Mock bouton "Ma consommation"
-        mock_menu_button = MagicMock()
-        mock_menu_button.is_displayed.return_value = True
-        mock_menu_button.text = "Ma consommation"
-
-        # Mock lien "Suivre ma consommation"
-        mock_link = MagicMock()
-        mock_link.is_displayed.return_value = True
-        mock_link.text = "Suivre ma consommation"
-
-        mock_driver.find_elements.side_effect = [
-            [mock_menu_button],  # Première recherche de boutons
-            [mock_link],  # Recherche de liens
-        ]
+        # Setup : bouton "Ma consommation" et lien "Suivre ma consommation"
+        mock_driver = snapshot_driver(button=["Accueil", "Ma consommation"], a=["Suivre ma consommation"])
 
         mock_wait = MagicMock()
         mock_wait_class.return_value = mock_wait
@@ -180,12 +170,29 @@ class TestNavigateToConsumption:
         # Vérifications
         assert result is True
         mock_accept_cookies.assert_called_once()
+        clicked = [call.args[1] for call in mock_driver.execute_script.call_args_list if len(call.args) > 1]
+        assert clicked[1::2] == [mock_driver.elements["button"][1], mock_driver.elements["a"][0]]
+
+    @patch("conso_downloader.browser.accept_cookies")
+    @patch("conso_downloader.browser.WebDriverWait")
+    @patch("conso_downloader.browser.time.sleep")
+    def test_navigate_one_request_per_lookup(self, mock_sleep, mock_wait_class, mock_accept_cookies, snapshot_driver):
+        """Test que les menus sont lus sans requête par élément (is_displayed, text)"""
+        from conso_downloader import navigate_to_consumption
+
+        mock_driver = snapshot_driver(button=["Aide"] * 50 + ["Ma consommation"], a=["Contact"] * 50)
+
+        assert navigate_to_consumption(mock_driver) is True
+
+        mock_driver.find_elements.assert_not_called()
+        assert mock_driver.execute_script.call_count == 3  # deux relevés et un clic
+        assert all(element.method_calls == [] for element in mock_driver.elements["button"])
 
 
 class TestSwitchToIframe:
     """Tests pour la fonction switch_to_iframe"""
 
-    @patch("conso_downloader.WebDriverWait")
+    @patch("conso_downloader.browser.WebDriverWait")
     def test_switch_to_iframe_success(self, mock_wait_class):
         """Test de basculement réussi vers iframe"""
         from conso_downloader import switch_to_iframe
@@ -209,7 +216,7 @@ class TestSwitchToIframe:
         assert result is True
         mock_driver.switch_to.frame.assert_called_once_with(mock_iframe)
 
-    @patch("conso_downloader.WebDriverWait")
+    @patch("conso_downloader.browser.WebDriverWait")
     def test_switch_to_iframe_not_found(self, mock_wait_class):
         """Test quand iframe n'est pas trouvée"""
         from conso_downloader import switch_to_iframe
@@ -229,45 +236,49 @@ class TestSwitchToIframe:
         assert result is False
 
 
-class TestSelectHeuresMode:
-    """Tests pour la fonction select_heures_mode"""
+class TestSelectGranularity:
+    """Tests pour la fonction select_granularity"""
 
-    @patch("conso_downloader.WebDriverWait")
-    @patch("conso_downloader.time.sleep")
-    def test_select_heures_mode_success(self, mock_sleep, mock_wait_class):
+    @patch("conso_downloader.browser.WebDriverWait")
+    @patch("conso_downloader.browser.time.sleep")
+    def test_select_heures_mode_success(self, mock_sleep, mock_wait_class, snapshot_driver):
         """Test de sélection mode Heures réussie"""
-        from conso_downloader import select_heures_mode
+        from conso_downloader import select_granularity
 
         # Setup
-        mock_driver = MagicMock()
-        mock_span = MagicMock()
-        mock_span.is_displayed.return_value = True
-        mock_span.text = "Heures"
-        mock_label = MagicMock()
-        mock_span.find_element.return_value = mock_label
-
-        mock_driver.find_elements.return_value = [mock_span]
+        mock_driver = snapshot_driver(span=["Jours", "Heures"])
 
         mock_wait = MagicMock()
         mock_wait_class.return_value = mock_wait
 
         # Test
-        result = select_heures_mode(mock_driver)
+        result = select_granularity(mock_driver)
 
         # Vérifications
         assert result is True
-        mock_driver.execute_script.assert_called_once()
+        click = mock_driver.execute_script.call_args
+        assert "parentElement.click()" in click.args[0]
+        assert click.args[1] is mock_driver.elements["span"][1]
+
+    @patch("conso_downloader.browser.WebDriverWait")
+    def test_select_jours_mode(self, mock_wait_class, snapshot_driver):
+        """Test que le libellé recherché suit le pas demandé"""
+        from conso_downloader import select_granularity
+
+        mock_driver = snapshot_driver(span=["Heures", "Jours (jusqu'à 3 ans)", "Jours"])
+
+        assert select_granularity(mock_driver, "days") is True
+        assert mock_driver.execute_script.call_args.args[1] is mock_driver.elements["span"][2]
 
-    def test_select_heures_mode_not_found(self):
+    def test_select_heures_mode_not_found(self, snapshot_driver):
         """Test quand bouton Heures n'est pas trouvé"""
-        from conso_downloader import select_heures_mode
+        from conso_downloader import select_granularity
 
-        # Setup
-        mock_driver = MagicMock()
-        mock_driver.find_elements.return_value = []
+        # Setup : libellé présent mais masqué
+        mock_driver = snapshot_driver(span=[("Heures", False, True)])
 
         # Test
-        result = select_heures_mode(mock_driver)
+        result = select_granularity(mock_driver)
 
         # Vérifications
         assert result is False
@@ -0,0 +1,141 @@
+"""
+Tests de la session navigateur persistante
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, PropertyMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+
+class TestOpenMeasuresPage:
+    """Tests pour la fonction open_measures_page"""
+
+    @patch("conso_downloader.browser.select_granularity", return_value=True)
+    @patch("conso_downloader.browser.switch_to_iframe", return_value=True)
+    @patch("conso_downloader.browser.navigate_to_consumption", return_value=True)
+    @patch("conso_downloader.browser.login_step2_password")
+    @patch("conso_downloader.browser.login_step1_email")
+    @patch("conso_downloader.browser.accept_cookies")
+    @patch("conso_downloader.browser.WebDriverWait")
+    @patch("conso_downloader.browser.time.sleep")
+    def test_login_skipped_when_session_valid(self, mock_sleep, mock_wait, mock_cookies, mock_step1, mock_step2, *_):
+        """Test qu'aucune connexion n'a lieu si le formulaire de login est absent"""
+        from conso_downloader import open_measures_page
+
+        mock_driver = MagicMock()
+        mock_driver.find_elements.return_value = []
+
+        assert open_measures_page(mock_driver, "test@example.com", "pass") is True
+        mock_step1.assert_not_called()
+        mock_step2.assert_not_called()
+
+    @patch("conso_downloader.browser.select_granularity", return_value=True)
+    @patch("conso_downloader.browser.switch_to_iframe", return_value=True)
+    @patch("conso_downloader.browser.navigate_to_consumption", return_value=True)
+    @patch("conso_downloader.browser.login_step2_password", return_value=True)
+    @patch("conso_downloader.browser.login_step1_email", return_value=True)
+    @patch("conso_downloader.browser.accept_cookies")
+    @patch("conso_downloader.browser.WebDriverWait")
+    @patch("conso_downloader.browser.time.sleep")
+    def test_login_when_session_expired(self, mock_sleep, mock_wait, mock_cookies, mock_step1, mock_step2, *_):
+        """Test que la connexion complète est rejouée si le formulaire réapparaît"""
+        from conso_downloader import open_measures_page
+
+        mock_driver = MagicMock()
+        mock_driver.find_elements.return_value = [MagicMock()]
+
+        assert open_measures_page(mock_driver, "test@example.com", "pass") is True
+        mock_step1.assert_called_once_with(mock_driver, "test@example.com")
+        mock_step2.assert_called_once_with(mock_driver, "pass")
+
+    @patch("conso_downloader.browser.select_granularity", return_value=True)
+    @patch("conso_downloader.browser.switch_to_iframe", return_value=True)
+    @patch("conso_downloader.browser.navigate_to_consumption", return_value=True)
+    @patch("conso_downloader.browser.accept_cookies")
+    @patch("conso_downloader.browser.time.sleep")
+    def test_page_ready_without_popin(self, mock_sleep, *_):
+        """Test que la page est prête sans popup (consentement mémorisé) : formulaire ou menu suffisent"""
+        from conso_downloader import PAGE_READY_BUTTON, PAGE_READY_SELECTOR, open_measures_page
+
+        mock_driver = MagicMock()
+        mock_driver.find_elements.return_value = []
+        mock_driver.execute_async_script.return_value = True
+
+        assert open_measures_page(mock_driver, "test@example.com", "pass") is True
+
+        condition, args = mock_driver.execute_async_script.call_args.args[1:3]
+        assert (condition, args) == ("pageReady", [PAGE_READY_SELECTOR, PAGE_READY_BUTTON])
+        assert "#idToken1" in PAGE_READY_SELECTOR
+        mock_sleep.assert_not_called()
+
+
+class TestBrowserSession:
+    """Tests pour la classe BrowserSession"""
+
+    @patch("conso_downloader.browser.open_measures_page", return_value=True)
+    @patch("conso_downloader.browser.setup_driver")
+    def test_driver_reused_between_cycles(self, mock_setup, mock_open):
+        """Test que le navigateur n'est lancé qu'une fois sur plusieurs cycles"""
+        from conso_downloader import BrowserSession
+
+        mock_setup.return_value = MagicMock()
+        session = BrowserSession(headless=True)
+
+        first = session.prepare()
+        second = session.prepare()
+
+        assert first is second
+        mock_setup.assert_called_once()
+        assert mock_open.call_count == 2
+
+    @patch("conso_downloader.browser.close_driver")
+    @patch("conso_downloader.browser.open_measures_page", return_value=True)
+    @patch("conso_downloader.browser.setup_driver")
+    def test_dead_driver_is_replaced(self, mock_setup, mock_open, mock_close):
+        """Test qu'un navigateur mort est remplacé"""
+        from selenium.common.exceptions import WebDriverException
+
+        from conso_downloader import BrowserSession
+
+        dead_driver = MagicMock()
+        type(dead_driver).window_handles = PropertyMock(side_effect=WebDriverException("gone"))
+        new_driver = MagicMock()
+        mock_setup.return_value = new_driver
+
+        session = BrowserSession()
+        session.driver = dead_driver
+
+        assert session.prepare() is new_driver
+        mock_close.assert_called_once_with(dead_driver)
+
+    @patch("conso_downloader.browser.close_driver")
+    @patch("conso_downloader.browser.open_measures_page", side_effect=[False, True])
+    @patch("conso_downloader.browser.setup_driver")
+    def test_unusable_session_restarts_browser(self, mock_setup, mock_open, mock_close):
+        """Test qu'une page inutilisable déclenche un redémarrage complet"""
+        from conso_downloader import BrowserSession
+
+        old_driver = MagicMock()
+        new_driver = MagicMock()
+        mock_setup.return_value = new_driver
+
+        session = BrowserSession()
+        session.driver = old_driver
+
+        assert session.prepare() is new_driver
+        mock_close.assert_called_once_with(old_driver)
+
+    @patch("conso_downloader.browser.close_driver")
+    def test_close(self, mock_close):
+        """Test de la fermeture de la session"""
+        from conso_downloader import BrowserSession
+
+        session = BrowserSession()
+        driver = MagicMock()
+        session.driver = driver
+        session.close()
+
+        mock_close.assert_called_once_with(driver)
+        assert session.driver is None
@@ -0,0 +1,138 @@
+"""
+Tests de l'analyse des exports et du stockage Parquet
+"""
+
+import sys
+from datetime import date, datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import (  # noqa: E402
+    append_points_to_store,
+    compute_missing_periods,
+    expected_intervals,
+    ingest_export,
+    is_day_complete,
+    iter_export_points,
+    mark_period_downloaded,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+CSV_EXPORT = str(FIXTURES_DIR / "export_courbe_de_charge.csv")
+JSON_EXPORT = str(FIXTURES_DIR / "measures_api_response.json")
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+
+class TestIterExportPoints:
+    """Tests pour la fonction iter_export_points"""
+
+    def test_csv_export_is_normalized_to_utc(self):
+        """Test que l'en-tête est sauté et les horodatages convertis en UTC"""
+        points = list(iter_export_points(CSV_EXPORT))
+
+        assert len(points) == 96
+        assert points[0] == (datetime(2023, 12, 31, 23, 30, tzinfo=timezone.utc), 300.0)
+
+    def test_json_response_naive_timestamps(self):
+        """Test des horodatages sans fuseau (interprétés Europe/Paris)"""
+        points = list(iter_export_points(JSON_EXPORT))
+
+        assert len(points) == 48
+        assert points[0][0] == datetime(2023, 12, 31, 23, 30, tzinfo=timezone.utc)
+
+    def test_decimal_comma_and_blank_values(self, tmp_path):
+        """Test des virgules décimales et des valeurs manquantes"""
+        export = tmp_path / "export.csv"
+        export.write_text("Horodate;Valeur\n2024-07-01T00:30:00+02:00;1,5\n2024-07-01T01:00:00+02:00;\n", encoding="latin-1")
+
+        assert list(iter_export_points(str(export))) == [(datetime(2024, 6, 30, 22, 30, tzinfo=timezone.utc), 1.5)]
+
+
+class TestAppendPointsToStore:
+    """Tests pour la fonction append_points_to_store"""
+
+    def test_partitioned_by_month(self, tmp_path):
+        """Test du partitionnement mensuel (mois UTC)"""
+        append_points_to_store(iter_export_points(CSV_EXPORT), str(tmp_path))
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["month=2023-12", "month=2024-01"]
+        frame = pd.read_parquet(tmp_path)
+        assert len(frame) == 96
+        assert str(frame["value"].dtype) == "float64"
+
+    def test_overlapping_exports_are_deduplicated(self, tmp_path):
+        """Test que deux exports qui se chevauchent ne dupliquent pas les points"""
+        append_points_to_store(iter_export_points(CSV_EXPORT), str(tmp_path))
+        append_points_to_store(iter_export_points(JSON_EXPORT), str(tmp_path))
+
+        frame = pd.read_parquet(tmp_path / "month=2024-01" / "data.parquet")
+        assert frame["timestamp"].is_unique
+        assert frame["timestamp"].is_monotonic_increasing
+        assert len(frame) == 95
+
+    def test_intervals_counted_per_local_day(self, tmp_path):
+        """Test du comptage de points par journée locale"""
+        intervals = append_points_to_store(iter_export_points(CSV_EXPORT), str(tmp_path))
+
+        assert intervals == {date(2024, 1, 1): 48, date(2024, 1, 2): 48}
+
+
+class TestIngestExport:
+    """Tests pour la fonction ingest_export"""
+
+    def test_unreadable_file_returns_none(self, tmp_path):
+        """Test qu'un export illisible ne fait pas échouer le téléchargement"""
+        broken = tmp_path / "broken.json"
+        broken.write_text("{not json")
+
+        assert ingest_export(str(broken), str(tmp_path / "store")) is None
+
+    def test_xlsx_without_openpyxl_returns_none(self, tmp_path):
+        """Test qu'un export Excel sans openpyxl est un échec, pas des journées à 0 point"""
+        export = tmp_path / "export.xlsx"
+        export.write_bytes(b"PK\x03\x04")
+
+        with patch.dict(sys.modules, {"openpyxl": None}):
+            assert ingest_export(str(export), str(tmp_path / "store")) is None
+
+    def test_partial_day_is_incomplete_in_manifest(self, tmp_path):
+        """Test qu'une journée partielle dans l'export sera re-téléchargée"""
+        # Export tronqué : 10 derniers points de la seconde journée absents
+        export = tmp_path / "export.csv"
+        lines = Path(CSV_EXPORT).read_text().splitlines()
+        export.write_text("\n".join(lines[:-10]) + "\n")
+
+        intervals = ingest_export(str(export), str(tmp_path / "store"))
+        manifest = {"version": 1, "days": {}}
+        mark_period_downloaded(
+            manifest,
+            datetime(2024, 1, 1),
+            datetime(2024, 1, 2),
+            downloaded_at=datetime(2024, 2, 1),
+            intervals_by_day=intervals,
+        )
+
+        assert is_day_complete(manifest, date(2024, 1, 1))
+        assert not is_day_complete(manifest, date(2024, 1, 2))
+        assert compute_missing_periods(manifest, datetime(2024, 1, 1), datetime(2024, 1, 2)) == [
+            (datetime(2024, 1, 2), datetime(2024, 1, 2))
+        ]
+
+
+class TestExpectedIntervals:
+    """Tests pour la fonction expected_intervals"""
+
+    def test_regular_day(self):
+        """Test d'une journée normale"""
+        assert expected_intervals(date(2024, 1, 1)) == 48
+
+    def test_daylight_saving_days(self):
+        """Test des changements d'heure"""
+        assert expected_intervals(date(2024, 3, 31)) == 46
+        assert expected_intervals(date(2024, 10, 27)) == 50
@@ -5,16 +5,19 @@ Tests des fonctions utilitaires
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-from unittest.mock import patch
 
 import pytest
 
 # Ajouter le répertoire racine du projet au PYTHONPATH
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-# Import avec gestion des dépendances
-with patch.dict("os.environ", {"ACCOUNT_EMAIL": "test@test.com", "ACCOUNT_PASSWORD": "test123"}):
-    from conso_downloader import USER_AGENTS, get_random_user_agent, mask_sensitive_data, split_date_range, validate_date_range
+from conso_downloader import (  # noqa: E402
+    USER_AGENTS,
+    get_random_user_agent,
+    mask_sensitive_data,
+    split_date_range,
+    validate_date_range,
+)
 
 
 class TestMaskSensitiveData:
@@ -0,0 +1,102 @@
+"""
+Tests du pool de navigateurs parallèles (--workers)
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from conso_downloader import download_periods_parallel, download_periods_ui, shard_periods, split_date_range  # noqa: E402
+
+
+def _year_of_periods():
+    """53 périodes de 7 jours maximum (365 jours)"""
+    return split_date_range(datetime(2024, 1, 1), datetime(2024, 1, 1) + timedelta(days=365))
+
+
+def _fake_worker(worker_id, periods, headless, download_dir, *credentials):
+    """Worker simulé : un fichier par période dans son répertoire dédié"""
+    os.makedirs(download_dir, exist_ok=True)
+    results = []
+    for start, end in periods:
+        path = os.path.join(download_dir, f"export_{start:%Y%m%d}.csv")
+        Path(path).write_text(f"worker {worker_id}")
+        results.append((start, end, path))
+    return {"worker": worker_id, "results": results, "duration": 1.0}
+
+
+class TestShardPeriods:
+    """Tests pour la fonction shard_periods"""
+
+    def test_shards_are_contiguous_and_complete(self):
+        """Test que la concaténation des tranches redonne les périodes dans l'ordre"""
+        periods = _year_of_periods()
+        shards = shard_periods(periods, 4)
+
+        assert len(periods) == 53
+        assert len(shards) == 4
+        assert [period for shard in shards for period in shard] == periods
+        assert sorted(len(shard) for shard in shards) == [13, 13, 13, 14]
+
+    def test_more_workers_than_periods(self):
+        """Test qu'aucun worker n'est lancé sans période"""
+        periods = split_date_range(datetime(2024, 1, 1), datetime(2024, 1, 10))
+        assert shard_periods(periods, 8) == [[periods[0]], [periods[1]]]
+
+
+class TestDownloadPeriodsParallel:
+    """Tests pour la fonction download_periods_parallel"""
+
+    @patch("conso_downloader.download.ProcessPoolExecutor", ThreadPoolExecutor)
+    @patch("conso_downloader.download._download_worker", side_effect=_fake_worker)
+    def test_results_are_merged_in_order(self, mock_worker, temp_download_dir):
+        """Test du regroupement des fichiers et des résultats de tous les workers"""
+        periods = _year_of_periods()
+
+        results = download_periods_parallel(periods, 4, download_dir=temp_download_dir)
+
+        assert [(start, end) for start, end, _ in results] == periods
+        assert all(os.path.dirname(path) == temp_download_dir for _, _, path in results)
+        assert len(os.listdir(temp_download_dir)) == 53
+        assert mock_worker.call_count == 4
+        download_dirs = {call.args[3] for call in mock_worker.call_args_list}
+        assert len(download_dirs) == 4
+
+    @patch("conso_downloader.download.ProcessPoolExecutor", ThreadPoolExecutor)
+    @patch("conso_downloader.download._download_worker")
+    def test_crashed_worker_marks_its_periods_failed(self, mock_worker, temp_download_dir):
+        """Test qu'un worker planté n'empêche pas les autres de rendre leurs résultats"""
+        periods = split_date_range(datetime(2024, 1, 1), datetime(2024, 1, 14))
+
+        def worker(worker_id, shard, headless, download_dir, *credentials):
+            if worker_id == 1:
+                raise RuntimeError("chrome crash")
+            return _fake_worker(worker_id, shard, headless, download_dir)
+
+        mock_worker.side_effect = worker
+        results = download_periods_parallel(periods, 2, download_dir=temp_download_dir)
+
+        assert results[0][2] is not None
+        assert results[1][2] is None
+
+
+class TestDownloadPeriodsUi:
+    """Tests pour la fonction download_periods_ui"""
+
+    @patch("conso_downloader.download.time.sleep")
+    @patch("conso_downloader.download.visualize_and_download", side_effect=["/tmp/a.csv", None])
+    @patch("conso_downloader.download.select_date_range", return_value=True)
+    def test_failed_period_does_not_stop_the_loop(self, mock_select, mock_download, mock_sleep):
+        """Test qu'une période en échec est signalée sans interrompre les suivantes"""
+        periods = split_date_range(datetime(2024, 1, 1), datetime(2024, 1, 14))
+        on_success = MagicMock()
+
+        results = download_periods_ui(MagicMock(), periods, "/tmp", on_success=on_success)
+
+        assert results == [(periods[0][0], periods[0][1], "/tmp/a.csv"), (periods[1][0], periods[1][1], None)]
+        on_success.assert_called_once_with(periods[0][0], periods[0][1], "/tmp/a.csv")